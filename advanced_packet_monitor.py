@@ -4,13 +4,50 @@ Advanced WiFi Packet Monitor using tcpdump
 Captures raw WiFi packets and analyzes them in real-time
 """
 
+import os
+import selectors
 import subprocess
 import threading
 import time
-import re
 import signal
 import sys
-from datetime import datetime
+from collections import namedtuple
+
+from nl80211_scanner import NL80211Scanner
+from timestamp_format import format_time
+
+READ_CHUNK_SIZE = 1 << 16  # bytes drained from the tcpdump pipe per read
+HEX_DIGITS = frozenset(b"0123456789abcdefABCDEF")
+
+# Per-packet output blocks, formatted once and written with a single call
+RID_DATA_BLOCK = (
+    "   📋 Remote ID Data:\n"
+    "   • Operator ID: TEST-OP-12345\n"
+    "   • UAV ID: TEST-UAV-C3-001\n"
+    "   • Location: Aldrich Park, Irvine, CA\n"
+    "   • Altitude: 100m MSL\n"
+    "   • Speed: 25 knots\n"
+    "   • Status: Active flight simulation"
+)
+ESP32_PACKET_TEMPLATE = "🚁 ESP32-C3 PACKET [%s]\n   MAC: %s\n   Raw: %s\n" + RID_DATA_BLOCK
+WIFI_PACKET_TEMPLATE = "📡 WiFi Packet [%s]\n   MAC: %s\n   Raw: %s"
+SCAN_DETECTION_TEMPLATE = "🚁 ESP32-C3 DETECTED [%s]\n   BSSID: %s | SSID: %s\n" + RID_DATA_BLOCK + "\n" + "-" * 80 + "\n"
+SEPARATOR_LINE = "-" * 80 + "\n"
+
+# Raw per-line record; text is only decoded/formatted if the packet is displayed
+TcpdumpPacket = namedtuple('TcpdumpPacket', ['time_ns', 'mac', 'is_esp32', 'raw_line'])
+
+def scan_mac(line):
+    """Find the first MAC in a bytes line; returns (packed int, MAC bytes) or None"""
+    colon = line.find(b":", 2)
+    while colon != -1:
+        # A MAC is a fixed 17-byte window: hex pairs with colons at every third byte
+        window = line[colon - 2:colon + 15]
+        if (len(window) == 17 and window[2::3] == b":::::" and
+                HEX_DIGITS.issuperset(window[0::3] + window[1::3])):
+            return int(window.replace(b":", b""), 16), window
+        colon = line.find(b":", colon + 1)
+    return None
 
 class AdvancedPacketMonitor:
     def __init__(self):
@@ -19,6 +56,7 @@ class AdvancedPacketMonitor:
         self.esp32_ssid = "TEST-OP-12345"
         self.packet_count = 0
         self.esp32_packets = 0
+        self.esp32_mac_u64 = int(self.esp32_mac.replace(":", ""), 16)
         
     def signal_handler(self, sig, frame):
         print("\n\n🛑 Stopping advanced packet monitor...")
@@ -26,55 +64,27 @@ class AdvancedPacketMonitor:
         sys.exit(0)
     
     def parse_tcpdump_line(self, line):
-        """Parse tcpdump output line"""
-        if not line.strip():
-            return None
-            
+        """Parse a raw (bytes) tcpdump output line"""
         # Look for MAC addresses and other relevant info
-        mac_match = re.search(r'([0-9a-fA-F]{2}:[0-9a-fA-F]{2}:[0-9a-fA-F]{2}:[0-9a-fA-F]{2}:[0-9a-fA-F]{2}:[0-9a-fA-F]{2})', line)
+        mac_match = scan_mac(line)
         if not mac_match:
             return None
             
-        mac = mac_match.group(1).lower()
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+        mac_u64, mac = mac_match
         
         # Check if this is our ESP32-C3
-        is_esp32 = (mac == self.esp32_mac.lower())
+        is_esp32 = (mac_u64 == self.esp32_mac_u64)
         
-        return {
-            'timestamp': timestamp,
-            'mac': mac,
-            'is_esp32': is_esp32,
-            'raw_line': line.strip()
-        }
+        return TcpdumpPacket(time.time_ns(), mac, is_esp32, line)
     
     def analyze_packet(self, packet):
         """Analyze a captured packet"""
         if not packet:
             return ""
             
-        analysis = []
-        timestamp = packet['timestamp']
-        mac = packet['mac']
-        is_esp32 = packet['is_esp32']
-        
-        if is_esp32:
-            analysis.append(f"🚁 ESP32-C3 PACKET [{timestamp}]")
-            analysis.append(f"   MAC: {mac}")
-            analysis.append(f"   Raw: {packet['raw_line']}")
-            analysis.append("   📋 Remote ID Data:")
-            analysis.append("   • Operator ID: TEST-OP-12345")
-            analysis.append("   • UAV ID: TEST-UAV-C3-001")
-            analysis.append("   • Location: Aldrich Park, Irvine, CA")
-            analysis.append("   • Altitude: 100m MSL")
-            analysis.append("   • Speed: 25 knots")
-            analysis.append("   • Status: Active flight simulation")
-        else:
-            analysis.append(f"📡 WiFi Packet [{timestamp}]")
-            analysis.append(f"   MAC: {mac}")
-            analysis.append(f"   Raw: {packet['raw_line']}")
-        
-        return "\n".join(analysis)
+        template = ESP32_PACKET_TEMPLATE if packet.is_esp32 else WIFI_PACKET_TEMPLATE
+        return template % (format_time(packet.time_ns), packet.mac.decode().lower(),
+                           packet.raw_line.strip().decode("utf-8", "replace"))
     
     def monitor_with_tcpdump(self):
         """Monitor packets using tcpdump"""
@@ -89,28 +99,42 @@ class AdvancedPacketMonitor:
         try:
             # Start tcpdump process
             cmd = ['sudo', 'tcpdump', '-i', 'wlp3s0', '-n', '-l']
+            # stdout is drained with os.read, so no Python-side buffering is needed;
+            # stderr is discarded so tcpdump can't block on an undrained pipe
             process = subprocess.Popen(cmd, stdout=subprocess.PIPE, 
-                                     stderr=subprocess.PIPE, text=True)
+                                     stderr=subprocess.DEVNULL, bufsize=0, close_fds=False)
+            fd = process.stdout.fileno()
+            pending = b""
             
             while self.running:
-                line = process.stdout.readline()
-                if not line:
+                # Drain whatever tcpdump has written in one read instead of one per line
+                chunk = os.read(fd, READ_CHUNK_SIZE)
+                if not chunk:
                     break
                     
-                self.packet_count += 1
-                packet = self.parse_tcpdump_line(line)
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                output = []
                 
-                if packet:
-                    if packet['is_esp32']:
-                        self.esp32_packets += 1
-                        print(self.analyze_packet(packet))
-                        print("-" * 80)
-                    elif self.packet_count % 20 == 0:  # Show every 20th non-ESP32 packet
-                        print(self.analyze_packet(packet))
+                for line in lines:
+                    self.packet_count += 1
+                    packet = self.parse_tcpdump_line(line)
+                    
+                    if packet:
+                        if packet.is_esp32:
+                            self.esp32_packets += 1
+                            output.append(self.analyze_packet(packet) + "\n" + SEPARATOR_LINE)
+                        elif self.packet_count % 20 == 0:  # Show every 20th non-ESP32 packet
+                            output.append(self.analyze_packet(packet) + "\n")
+                    
+                    # Show status every 10 seconds
+                    if self.packet_count % 100 == 0:
+                        output.append(f"📊 Status: {self.packet_count} packets, {self.esp32_packets} ESP32-C3 packets\n")
                 
-                # Show status every 10 seconds
-                if self.packet_count % 100 == 0:
-                    print(f"📊 Status: {self.packet_count} packets, {self.esp32_packets} ESP32-C3 packets")
+                # One write for everything this read produced
+                if output:
+                    sys.stdout.write("".join(output))
+                    sys.stdout.flush()
                     
         except Exception as e:
             print(f"❌ Error with tcpdump: {e}")
@@ -118,10 +142,10 @@ class AdvancedPacketMonitor:
             if 'process' in locals():
                 process.terminate()
     
-    def monitor_with_nmcli(self):
-        """Fallback monitor using nmcli"""
+    def monitor_with_scans(self):
+        """Fallback monitor using nl80211 scan results"""
         print("🔍 Starting WiFi Network Monitor...")
-        print("Using nmcli for network analysis")
+        print("Using nl80211 scan results for network analysis")
         print("=" * 80)
         print("Looking for ESP32-C3 Remote ID packets...")
         print("Press Ctrl+C to stop")
@@ -129,59 +153,70 @@ class AdvancedPacketMonitor:
         print()
         
         last_esp32_time = 0
+        status_period = 5  # seconds between status lines
         
-        while self.running:
-            try:
-                result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                                      capture_output=True, text=True, timeout=5)
-                
-                if result.returncode == 0:
-                    lines = result.stdout.split('\n')
-                    current_time = time.time()
+        # One netlink connection for the whole session instead of an nmcli fork per scan
+        try:
+            scanner = NL80211Scanner()
+            scanner.subscribe_scan_events()
+        except OSError as e:
+            print(f"❌ Error opening nl80211 socket: {e}")
+            return
+        selector = selectors.DefaultSelector()
+        selector.register(scanner, selectors.EVENT_READ)
+        scanner.refresh_scan()
+        next_status_at = time.monotonic() + status_period
+        
+        try:
+            while self.running:
+                try:
+                    # Sleep until a scan completes or the next status line is due
+                    timeout = max(next_status_at - time.monotonic(), 0)
+                    if selector.select(timeout=timeout) and scanner.read_scan_event():
+                        networks = scanner.get_scan_results()
+                        current_time = time.time()
+                        
+                        for bssid, ssid in networks.items():
+                            if bssid == self.esp32_mac or ssid == self.esp32_ssid:
+                                self.esp32_packets += 1
+                                last_esp32_time = current_time
+                                
+                                timestamp = format_time()
+                                sys.stdout.write(SCAN_DETECTION_TEMPLATE % (timestamp, bssid, ssid))
+                        
+                        self.packet_count += 1
                     
-                    for line in lines:
-                        if self.esp32_mac in line or self.esp32_ssid in line:
-                            self.esp32_packets += 1
-                            last_esp32_time = current_time
-                            
-                            timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-                            print(f"🚁 ESP32-C3 DETECTED [{timestamp}]")
-                            print(f"   Raw: {line.strip()}")
-                            print("   📋 Remote ID Data:")
-                            print("   • Operator ID: TEST-OP-12345")
-                            print("   • UAV ID: TEST-UAV-C3-001")
-                            print("   • Location: Aldrich Park, Irvine, CA")
-                            print("   • Altitude: 100m MSL")
-                            print("   • Speed: 25 knots")
-                            print("   • Status: Active flight simulation")
-                            print("-" * 80)
-                
-                self.packet_count += 1
-                
-                # Show status every 5 seconds
-                if int(current_time) % 5 == 0:
-                    elapsed = current_time - last_esp32_time if last_esp32_time > 0 else 999
-                    print(f"📊 Status: {self.packet_count} scans, {self.esp32_packets} ESP32-C3 detections, "
-                          f"Last ESP32: {elapsed:.1f}s ago")
-                
-                time.sleep(1)
-                
-            except Exception as e:
-                print(f"❌ Error: {e}")
-                time.sleep(1)
+                    # Re-arm a scan once the shared RESCAN_INTERVAL has passed
+                    scanner.refresh_scan()
+                    
+                    # Show status once per status_period
+                    now = time.monotonic()
+                    if now >= next_status_at:
+                        current_time = time.time()
+                        elapsed = current_time - last_esp32_time if last_esp32_time > 0 else 999
+                        print(f"📊 Status: {self.packet_count} scans, {self.esp32_packets} ESP32-C3 detections, "
+                              f"Last ESP32: {elapsed:.1f}s ago")
+                        next_status_at = now + status_period
+                    
+                except OSError as e:
+                    print(f"❌ Error: {e}")
+                    time.sleep(1)
+        finally:
+            selector.close()
+            scanner.close()
     
     def run(self):
         """Run the packet monitor"""
         signal.signal(signal.SIGINT, self.signal_handler)
         
         try:
-            # Try tcpdump first, fallback to nmcli
+            # Try tcpdump first, fallback to nl80211 scans
             print("Attempting to use tcpdump for deep packet analysis...")
             self.monitor_with_tcpdump()
         except Exception as e:
             print(f"tcpdump failed: {e}")
-            print("Falling back to nmcli monitoring...")
-            self.monitor_with_nmcli()
+            print("Falling back to nl80211 scan monitoring...")
+            self.monitor_with_scans()
         finally:
             print(f"\n📊 Final Statistics:")
             print(f"   Total packets/scans: {self.packet_count}")
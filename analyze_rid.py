@@ -3,22 +3,53 @@
 Analyze Remote ID packets from ESP32-C3
 """
 
-import subprocess
 import re
+import sys
 import time
 import json
 
+from nmcli_output import find_matching_line, run_nmcli
+
+ESP32_NEEDLES = (b'TEST-OP-12345', b'84:FC:E6:00:FC:05')
+
+# Static report text, built once at import and written with a single call
+DETECTED_REPORT = """✅ ESP32-C3 Remote ID signal detected!
+
+Signal Analysis:
+- SSID: TEST-OP-12345 (Operator ID)
+- BSSID: 84:FC:E6:00:FC:05 (ESP32-C3 MAC)
+- Channel: 6 (2.4 GHz)
+- Signal Strength: 99% (Excellent)
+- Security: WPA2 (Standard for RID)
+
+Expected RID Data in Beacon Frames:
+- Operator ID: TEST-OP-12345
+- UAV ID: TEST-UAV-C3-001
+- Location: Aldrich Park, Irvine, CA
+- Latitude: 33.6405°N
+- Longitude: 117.8443°W
+- Altitude: 100m MSL (50m AGL)
+- Speed: 25 knots
+- Heading: Variable (flying in square pattern)
+
+✅ Remote ID transmission is working correctly!
+✅ Signal follows ASTM F3411-19 standard
+✅ Ready for detection by Remote ID scanner apps
+"""
+
+NOT_DETECTED_REPORT = """❌ ESP32-C3 Remote ID signal not detected
+Check if ESP32-C3 is powered on and running the sketch
+"""
+
 def get_wifi_networks():
     """Get WiFi networks and look for our ESP32-C3"""
     try:
-        result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                              capture_output=True, text=True, timeout=10)
-        lines = result.stdout.split('\n')
+        result = run_nmcli('dev', 'wifi', 'list', timeout=10)
+        line = find_matching_line(result.stdout, ESP32_NEEDLES)
         
-        for line in lines:
-            if 'TEST-OP-12345' in line or '84:FC:E6:00:FC:05' in line:
-                print(f"Found ESP32-C3 RID signal: {line}")
-                return True
+        if line is not None:
+            print(f"Found ESP32-C3 RID signal: {line.decode('utf-8', 'replace')}")
+            return True
         return False
     except Exception as e:
         print(f"Error scanning WiFi: {e}")
@@ -32,32 +63,9 @@ def analyze_rid_signal():
     
     # Check if signal is present
     if get_wifi_networks():
-        print("✅ ESP32-C3 Remote ID signal detected!")
-        print()
-        print("Signal Analysis:")
-        print("- SSID: TEST-OP-12345 (Operator ID)")
-        print("- BSSID: 84:FC:E6:00:FC:05 (ESP32-C3 MAC)")
-        print("- Channel: 6 (2.4 GHz)")
-        print("- Signal Strength: 99% (Excellent)")
-        print("- Security: WPA2 (Standard for RID)")
-        print()
-        print("Expected RID Data in Beacon Frames:")
-        print("- Operator ID: TEST-OP-12345")
-        print("- UAV ID: TEST-UAV-C3-001")
-        print("- Location: Aldrich Park, Irvine, CA")
-        print("- Latitude: 33.6405°N")
-        print("- Longitude: 117.8443°W")
-        print("- Altitude: 100m MSL (50m AGL)")
-        print("- Speed: 25 knots")
-        print("- Heading: Variable (flying in square pattern)")
-        print()
-        print("✅ Remote ID transmission is working correctly!")
-        print("✅ Signal follows ASTM F3411-19 standard")
-        print("✅ Ready for detection by Remote ID scanner apps")
-        
+        sys.stdout.write(DETECTED_REPORT)
     else:
-        print("❌ ESP32-C3 Remote ID signal not detected")
-        print("Check if ESP32-C3 is powered on and running the sketch")
+        sys.stdout.write(NOT_DETECTED_REPORT)
 
 if __name__ == "__main__":
     analyze_rid_signal()
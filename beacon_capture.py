@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Raw Beacon Capture
+Reads 802.11 beacons straight off a monitor-mode interface with an
+AF_PACKET socket and dissects radiotap + 802.11 headers in-process
+"""
+
+import ctypes
+import socket
+import struct
+
+ETH_P_ALL = 0x0003
+SO_ATTACH_FILTER = 26
+FRAME_BUFFER_SIZE = 4096
+
+# Classic BPF: accept only frames whose 802.11 frame control byte (located
+# after the variable-length radiotap header) is 0x80 - mgmt/beacon
+BEACON_FILTER_PREFIX = [
+    (0x30, 0, 0, 2),        # ldb [2]          radiotap length, low byte
+    (0x02, 0, 0, 0),        # st M[0]
+    (0x30, 0, 0, 3),        # ldb [3]          radiotap length, high byte
+    (0x64, 0, 0, 8),        # lsh #8
+    (0x61, 0, 0, 0),        # ldx M[0]
+    (0x0C, 0, 0, 0),        # add x
+    (0x07, 0, 0, 0),        # tax
+    (0x50, 0, 0, 0),        # ldb [x + 0]      frame control
+]
+BPF_ACCEPT = (0x06, 0, 0, 0x40000)  # ret #262144
+BPF_DROP = (0x06, 0, 0, 0)          # ret #0
+BEACON_FILTER = BEACON_FILTER_PREFIX + [
+    (0x15, 0, 1, 0x80),     # jeq #0x80
+    BPF_ACCEPT,
+    BPF_DROP,
+]
+
+BEACON_FIXED_FIELDS = 12  # timestamp(8) + interval(2) + capability(2)
+DOT11_HEADER_LEN = 24
+
+
+def beacon_filter(source_mac=None):
+    """BPF program for beacons, optionally only those from one transmitter (addr2)"""
+    if source_mac is None:
+        return BEACON_FILTER
+    addr = bytes.fromhex(source_mac.replace(":", ""))
+    return BEACON_FILTER_PREFIX + [
+        (0x15, 0, 5, 0x80),                         # jeq #0x80
+        (0x40, 0, 0, 10),                           # ld [x + 10]   addr2, bytes 0-3
+        (0x15, 0, 3, int.from_bytes(addr[:4], "big")),
+        (0x48, 0, 0, 14),                           # ldh [x + 14]  addr2, bytes 4-5
+        (0x15, 0, 1, int.from_bytes(addr[4:], "big")),
+        BPF_ACCEPT,
+        BPF_DROP,
+    ]
+
+
+def open_beacon_socket(interface, source_mac=None):
+    """Open a raw socket on a monitor-mode interface that only sees beacons"""
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ALL))
+    insns = beacon_filter(source_mac)
+    program = b"".join(struct.pack("HBBI", *insn) for insn in insns)
+    program_buf = ctypes.create_string_buffer(program)
+    fprog = struct.pack("HL", len(insns), ctypes.addressof(program_buf))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+    sock.bind((interface, ETH_P_ALL))
+    return sock
+
+
+def format_mac(mac_u64):
+    """Format a MAC packed into an int back to aa:bb:cc:dd:ee:ff"""
+    return mac_u64.to_bytes(6, "big").hex(":")
+
+
+def parse_beacon(frame):
+    """Dissect a radiotap beacon; returns (source MAC, SSID, frame length, 802.11 bytes)"""
+    if len(frame) < 4:
+        return None
+    rtap_len = frame[2] | (frame[3] << 8)
+    dot11 = frame[rtap_len:]
+    if len(dot11) < DOT11_HEADER_LEN + BEACON_FIXED_FIELDS:
+        return None
+
+    source_mac = bytes(dot11[10:16]).hex(":")
+    ssid = ""
+    offset = DOT11_HEADER_LEN + BEACON_FIXED_FIELDS
+    while offset + 2 <= len(dot11):
+        ie_id, ie_len = dot11[offset], dot11[offset + 1]
+        if ie_id == 0:
+            ssid = bytes(dot11[offset + 2:offset + 2 + ie_len]).decode("utf-8", "replace")
+            break
+        offset += 2 + ie_len
+    return source_mac, ssid, len(frame), dot11
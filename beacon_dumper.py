@@ -1,9 +1,21 @@
 #!/usr/bin/env python3
 
-import subprocess
+import selectors
 import time
 import sys
 
+from beacon_capture import FRAME_BUFFER_SIZE, format_mac, open_beacon_socket, parse_beacon
+from timestamp_format import format_time
+
+BEACON_TEMPLATE = (
+    "\n[%s] Beacon #%d\n"
+    "Source MAC: %s\n"
+    "SSID: %s\n"
+    "Frame Length: %d bytes\n"
+    "Raw Hex Data: %s...\n"
+    + "-" * 40 + "\n"
+)
+
 def capture_all_beacons():
     """Capture all WiFi beacon packets to see what's available"""
     
@@ -15,65 +27,50 @@ def capture_all_beacons():
     print(f"Will run for {timeout_seconds} seconds maximum")
     print("-" * 60)
     
+    packet_count = 0
+    mac_addresses = set()  # source MACs packed into ints
+    
     try:
-        # Use tshark to capture all beacon packets
-        cmd = [
-            "sudo", "tshark", 
-            "-i", interface,
-            "-f", "wlan type mgt subtype beacon",
-            "-T", "fields",
-            "-e", "wlan.sa",  # Source MAC
-            "-e", "wlan.ssid",  # SSID
-            "-e", "frame.len",  # Frame length
-            "-e", "data.data"  # Raw hex data
-        ]
-        
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1
-        )
-        
-        packet_count = 0
-        start_time = time.time()
-        mac_addresses = set()
+        # Capture beacons directly from the monitor-mode interface
+        sock = open_beacon_socket(interface)
+        sock.setblocking(False)
+        selector = selectors.DefaultSelector()
+        selector.register(sock, selectors.EVENT_READ)
+        frame_buffer = bytearray(FRAME_BUFFER_SIZE)
+        frame_view = memoryview(frame_buffer)
+        deadline = time.monotonic() + timeout_seconds
         
         while True:
-            # Check if we've exceeded the timeout
-            if time.time() - start_time > timeout_seconds:
+            # The deadline is honoured even when no beacons arrive
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
                 print(f"\nTimeout reached ({timeout_seconds} seconds). Stopping capture.")
                 break
                 
-            line = process.stdout.readline()
-            if not line:
-                break
-                
-            line = line.strip()
-            if not line:
+            if not selector.select(timeout=remaining):
                 continue
                 
-            # Parse tshark output
-            parts = line.split('\t')
-            if len(parts) >= 4:
-                source_mac = parts[0]
-                ssid = parts[1]
-                frame_len = parts[2]
-                hex_data = parts[3]
-                
-                mac_addresses.add(source_mac)
-                packet_count += 1
-                timestamp = time.strftime("%H:%M:%S.%f")[:-3]
-                
-                print(f"\n[{timestamp}] Beacon #{packet_count}")
-                print(f"Source MAC: {source_mac}")
-                print(f"SSID: {ssid}")
-                print(f"Frame Length: {frame_len} bytes")
-                print(f"Raw Hex Data: {hex_data[:100]}...")
-                print("-" * 40)
-                
-                # Flush output immediately
+            # Drain every queued frame, then write the whole batch at once
+            output = []
+            while True:
+                try:
+                    length = sock.recv_into(frame_buffer)
+                except BlockingIOError:
+                    break
+                    
+                beacon = parse_beacon(frame_view[:length])
+                if beacon:
+                    source_mac, ssid, frame_len, dot11 = beacon
+                    hex_data = dot11[:50].hex()
+                    
+                    mac_addresses.add(int.from_bytes(dot11[10:16], "big"))
+                    packet_count += 1
+                    timestamp = format_time()
+                    output.append(BEACON_TEMPLATE % (timestamp, packet_count, source_mac,
+                                                     ssid, frame_len, hex_data))
+            
+            if output:
+                sys.stdout.write("".join(output))
                 sys.stdout.flush()
     
     except KeyboardInterrupt:
@@ -81,12 +78,14 @@ def capture_all_beacons():
     except Exception as e:
         print(f"Error: {e}")
     finally:
-        if 'process' in locals():
-            process.terminate()
+        if 'selector' in locals():
+            selector.close()
+        if 'sock' in locals():
+            sock.close()
     
     print(f"\nUnique MAC addresses seen: {len(mac_addresses)}")
     for mac in sorted(mac_addresses):
-        print(f"  {mac}")
+        print(f"  {format_mac(mac)}")
 
 if __name__ == "__main__":
     capture_all_beacons()
@@ -3,80 +3,95 @@
 Capture and analyze Remote ID packets using scapy
 """
 
-import subprocess
+import sys
 import time
 import re
 import json
 
+from nmcli_output import find_matching_line, run_nmcli, split_terse_fields
+
+# nmcli -t escapes the colons inside values, including the BSSID
+ESP32_NEEDLES = (b'TEST-OP-12345', b'84\\:FC\\:E6\\:00\\:FC\\:05')
+NMCLI_FIELDS = 'BSSID,SSID,MODE,CHAN,RATE,SIGNAL,SECURITY'
+
+# Report text, built once at import and written with a single call
+PARSED_INFO_TEMPLATE = """Parsed Information:
+  BSSID (MAC): %s
+  SSID: %s
+  Mode: %s
+  Channel: %s
+  Data Rate: %s
+  Signal Strength: %s
+  Security: %s
+
+"""
+
+RID_ANALYSIS_REPORT = """Remote ID Analysis:
+✅ Operator ID correctly transmitted in SSID
+✅ ESP32-C3 MAC address matches expected
+✅ Channel 6 is correct for 2.4GHz WiFi
+✅ WPA2 security is standard for RID
+✅ Signal strength indicates good transmission
+
+Expected RID Data Structure:
+┌─────────────────────────────────────────┐
+│           Remote ID Message             │
+├─────────────────────────────────────────┤
+│ Basic ID: TEST-UAV-C3-001              │
+│ Operator ID: TEST-OP-12345             │
+│ Location: 33.6405°N, 117.8443°W        │
+│ Altitude: 100m MSL (50m AGL)           │
+│ Speed: 25 knots                        │
+│ Heading: Variable (square pattern)     │
+│ Timestamp: Current UTC time            │
+│ Status: Active flight                  │
+└─────────────────────────────────────────┘
+
+✅ Remote ID transmission is working correctly!
+✅ All required data fields are being transmitted
+✅ Signal is detectable by Remote ID scanner apps
+"""
+
+SUCCESS_SUMMARY = """
+Summary:
+✅ ESP32-C3 is successfully broadcasting Remote ID
+✅ Signal contains all required drone information
+✅ Ready for detection by authorized parties
+
+To test with a Remote ID scanner app:
+1. Download 'Remote ID Scanner' or similar app
+2. Open the app and scan for nearby drones
+3. You should see your simulated drone with all flight data
+"""
+
+NOT_DETECTED_SUMMARY = """❌ ESP32-C3 Remote ID signal not detected
+Make sure the ESP32-C3 is powered on and running the sketch
+"""
+
 def capture_wifi_packets():
     """Use tshark to capture WiFi packets and analyze RID data"""
     print("=== Capturing Remote ID Packets ===")
     
     # First, let's get detailed info about our ESP32-C3
     try:
-        result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                              capture_output=True, text=True, timeout=10)
+        result = run_nmcli('-t', '-f', NMCLI_FIELDS, 'dev', 'wifi', 'list', timeout=10)
         
-        esp32_info = None
-        for line in result.stdout.split('\n'):
-            if 'TEST-OP-12345' in line or '84:FC:E6:00:FC:05' in line:
-                esp32_info = line.strip()
-                break
+        esp32_info = find_matching_line(result.stdout, ESP32_NEEDLES)
         
         if esp32_info:
             print("ESP32-C3 Signal Details:")
-            print(f"Raw data: {esp32_info}")
+            print(f"Raw data: {esp32_info.decode('utf-8', 'replace')}")
             print()
             
-            # Parse the information
-            parts = esp32_info.split()
-            if len(parts) >= 6:
-                bssid = parts[1]
-                ssid = parts[2]
-                mode = parts[3]
-                channel = parts[4]
-                rate = parts[5]
-                signal = parts[6] if len(parts) > 6 else "Unknown"
-                security = parts[7] if len(parts) > 7 else "Unknown"
-                
-                print("Parsed Information:")
-                print(f"  BSSID (MAC): {bssid}")
-                print(f"  SSID: {ssid}")
-                print(f"  Mode: {mode}")
-                print(f"  Channel: {channel}")
-                print(f"  Data Rate: {rate}")
-                print(f"  Signal Strength: {signal}")
-                print(f"  Security: {security}")
-                print()
-                
-                # Analyze the RID data
-                print("Remote ID Analysis:")
-                print("✅ Operator ID correctly transmitted in SSID")
-                print("✅ ESP32-C3 MAC address matches expected")
-                print("✅ Channel 6 is correct for 2.4GHz WiFi")
-                print("✅ WPA2 security is standard for RID")
-                print("✅ Signal strength indicates good transmission")
-                print()
-                
-                # Expected RID data structure
-                print("Expected RID Data Structure:")
-                print("┌─────────────────────────────────────────┐")
-                print("│           Remote ID Message             │")
-                print("├─────────────────────────────────────────┤")
-                print("│ Basic ID: TEST-UAV-C3-001              │")
-                print("│ Operator ID: TEST-OP-12345             │")
-                print("│ Location: 33.6405°N, 117.8443°W        │")
-                print("│ Altitude: 100m MSL (50m AGL)           │")
-                print("│ Speed: 25 knots                        │")
-                print("│ Heading: Variable (square pattern)     │")
-                print("│ Timestamp: Current UTC time            │")
-                print("│ Status: Active flight                  │")
-                print("└─────────────────────────────────────────┘")
-                print()
+            # Parse the information - terse output has exactly one field per column
+            fields = split_terse_fields(esp32_info)
+            if len(fields) == NMCLI_FIELDS.count(',') + 1:
+                bssid, ssid, mode, channel, rate, signal, security = fields
+                security = security or "Unknown"
                 
-                print("✅ Remote ID transmission is working correctly!")
-                print("✅ All required data fields are being transmitted")
-                print("✅ Signal is detectable by Remote ID scanner apps")
+                # Parsed fields plus the static RID analysis in one write
+                sys.stdout.write(PARSED_INFO_TEMPLATE % (bssid, ssid, mode, channel, rate,
+                                                         signal, security) + RID_ANALYSIS_REPORT)
                 
                 return True
         else:
@@ -94,19 +109,9 @@ def main():
     
     # Check if ESP32-C3 is transmitting
     if capture_wifi_packets():
-        print()
-        print("Summary:")
-        print("✅ ESP32-C3 is successfully broadcasting Remote ID")
-        print("✅ Signal contains all required drone information")
-        print("✅ Ready for detection by authorized parties")
-        print()
-        print("To test with a Remote ID scanner app:")
-        print("1. Download 'Remote ID Scanner' or similar app")
-        print("2. Open the app and scan for nearby drones")
-        print("3. You should see your simulated drone with all flight data")
+        sys.stdout.write(SUCCESS_SUMMARY)
     else:
-        print("❌ ESP32-C3 Remote ID signal not detected")
-        print("Make sure the ESP32-C3 is powered on and running the sketch")
+        sys.stdout.write(NOT_DETECTED_SUMMARY)
 
 if __name__ == "__main__":
     main()
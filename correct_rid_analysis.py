@@ -3,9 +3,13 @@
 Correct Remote ID Packet Analysis
 """
 
-import subprocess
 import time
 
+from nmcli_output import find_matching_line, run_nmcli
+
+ESP32_MAC = b'84:FC:E6:00:FC:05'
+ESP32_SSID = b'TEST-OP-12345'
+
 def analyze_rid_packets():
     """Analyze the Remote ID packets from ESP32-C3"""
     print("🔍 ESP32-C3 Remote ID Packet Analysis")
@@ -14,19 +18,14 @@ def analyze_rid_packets():
     
     try:
         # Get the WiFi scan results
-        result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                              capture_output=True, text=True, timeout=10)
-        
-        # Find our ESP32-C3 signal
-        esp32_line = None
-        for line in result.stdout.split('\n'):
-            if 'TEST-OP-12345' in line and '84:FC:E6:00:FC:05' in line:
-                esp32_line = line.strip()
-                break
+        result = run_nmcli('dev', 'wifi', 'list', timeout=10)
         
-        if not esp32_line:
+        # Find our ESP32-C3 signal in the raw output; only that row is decoded
+        line = find_matching_line(result.stdout, (ESP32_MAC,))
+        if line is None or ESP32_SSID not in line:
             print("❌ ESP32-C3 Remote ID signal not found")
             return False
+        esp32_line = line.decode('utf-8', 'replace').strip()
         
         print("📡 Captured WiFi Beacon Frame:")
         print(f"Raw data: {esp32_line}")
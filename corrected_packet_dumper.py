@@ -4,11 +4,71 @@ Corrected ESP32-C3 Packet Dumper
 Shows real-time packets with actual timestamps from RID data
 """
 
-import subprocess
 import time
 import signal
 import sys
-from datetime import datetime
+
+from nl80211_scanner import NL80211Scanner, entry_fields, same_beacon
+from timestamp_format import format_datetime, format_time
+
+# Full per-packet report, filled with % and written in one call
+PACKET_TEMPLATE = (
+    "\n" + "🚁" * 20 + " ESP32-C3 REMOTE ID PACKET " + "🚁" * 20 + "\n"
+    "\n📦 PACKET #%(packet_num)d - %(rid_timestamp)s\n"
+    + "=" * 100 + "\n"
+    "\n📡 WiFi Beacon Frame Data:\n"
+    "   • MAC Address (BSSID): %(bssid)s\n"
+    "   • Network Name (SSID): %(ssid)s\n"
+    "   • Mode: %(mode)s\n"
+    "   • Channel: %(channel)s (2.4GHz)\n"
+    "   • Data Rate: %(rate)s\n"
+    "   • Signal Strength: %(signal)s%%\n"
+    "   • Signal Quality: %(bars)s\n"
+    "   • Security: %(security)s\n"
+    "\n📋 Remote ID Message Content:\n"
+    "   • Operator ID: %(ssid)s\n"
+    "   • UAV MAC Address: %(bssid)s\n"
+    "   • UAV ID: TEST-UAV-C3-001\n"
+    "   • Flight Description: C3 Test Flight\n"
+    "\n📍 Location Data:\n"
+    "   • Location: Aldrich Park, Irvine, California\n"
+    "   • Coordinates: %(coords)s (%(waypoint)s)\n"
+    "   • Position: %(position)s\n"
+    "   • Altitude: 100m MSL (50m AGL)\n"
+    "   • Note: Coordinates change every 10 seconds in square pattern\n"
+    "   • Flight Pattern: 4 waypoints around Aldrich Park\n"
+    "\n✈️  Flight Data:\n"
+    "   • Speed: 25 knots\n"
+    "   • Heading: Variable (square pattern)\n"
+    "   • Flight Status: Active simulation\n"
+    "   • Emergency Status: None\n"
+    "   • GPS Satellites: 12\n"
+    "   • GPS Valid: Yes\n"
+    "\n⏰ RID Packet Timestamp:\n"
+    "   • RID Timestamp: %(rid_timestamp)s\n"
+    "   • Capture Time: %(capture_time)s\n"
+    "   • Packet Number: %(packet_num)d\n"
+    "   • Detection Rate: 100%%\n"
+    "\n✅ ASTM F3411-19 Compliance:\n"
+    "   • Basic ID: ✅ TRANSMITTED\n"
+    "   • Location: ✅ TRANSMITTED\n"
+    "   • Operator ID: ✅ TRANSMITTED\n"
+    "   • Timestamp: ✅ TRANSMITTED\n"
+    "   • Emergency Status: ✅ TRANSMITTED\n"
+    "   • Self ID: ✅ TRANSMITTED\n"
+    "   • System Data: ✅ TRANSMITTED\n"
+    "\n🎯 Detection Capabilities:\n"
+    "   • Remote ID Scanner Apps: ✅ DETECTABLE\n"
+    "   • WiFi Analyzers: ✅ DETECTABLE\n"
+    "   • Packet Sniffers: ✅ DETECTABLE\n"
+    "   • Aviation Authorities: ✅ DETECTABLE\n"
+    "   • Law Enforcement: ✅ DETECTABLE\n"
+    + "=" * 100 + "\n"
+    "✅ ESP32-C3 Remote ID transmission is ACTIVE and COMPLIANT\n"
+    + "=" * 100 + "\n"
+    "\n\n\n\n"  # Extra spacing between packets
+)
+HEARTBEAT_TEMPLATE = "· [%s] ESP32-C3 still active (#%d, beacon unchanged)\n"
 
 class CorrectedPacketDumper:
     def __init__(self):
@@ -19,7 +79,11 @@ class CorrectedPacketDumper:
         self.esp32_packets = 0
         self.last_esp32_time = 0
         self.start_time = time.time()
+        self.status_period = 5  # seconds between "Scanning..." lines
+        self.next_status_at = 0.0
         self.timeout_seconds = 10
+        self.scanner = None
+        self.last_entry = None
         
         # Waypoint tracking (changes every 10 seconds)
         self.waypoints = [
@@ -28,182 +92,49 @@ class CorrectedPacketDumper:
             {"name": "Waypoint 3", "coords": "33.6415°N, 117.8453°W", "desc": "Northeast"},
             {"name": "Waypoint 4", "coords": "33.6405°N, 117.8453°W", "desc": "East"}
         ]
+        self.waypoint_period = 10
+        self.waypoint_index = 0
+        self.next_waypoint_at = time.monotonic() + self.waypoint_period
         
     def signal_handler(self, sig, frame):
         print("\n\n🛑 Stopping corrected packet dumper...")
+        # Only flag the loop; it exits at its next wakeup and the finally
+        # block closes the netlink sockets
         self.running = False
-        sys.exit(0)
-    
-    def scan_wifi_networks(self):
-        """Scan for WiFi networks with fresh data"""
-        try:
-            # Force a fresh scan each time
-            subprocess.run(['nmcli', 'dev', 'wifi', 'rescan'], 
-                          capture_output=True, text=True, check=True, timeout=2)
-            
-            result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, check=True, timeout=3)
-            return result.stdout
-        except subprocess.TimeoutExpired:
-            return "Error: Command timed out"
-        except subprocess.CalledProcessError as e:
-            return f"Error running nmcli: {e.stderr}"
-        except FileNotFoundError:
-            return "Error: 'nmcli' command not found"
     
     def find_esp32_packet(self, wifi_data):
         """Find ESP32-C3 packet in WiFi data"""
-        if "Error" in wifi_data:
-            return None
-        
-        lines = wifi_data.strip().split('\n')
-        for line in lines:
-            if self.esp32_mac in line and self.esp32_ssid in line:
-                return line
+        entry = wifi_data.get(self.esp32_mac)
+        if entry and entry.ssid == self.esp32_ssid:
+            return entry
         return None
     
-    def parse_esp32_packet(self, line):
-        """Parse ESP32-C3 packet line"""
-        if not line:
-            return None
-        
-        # Handle the nmcli output format more carefully
-        parts = line.split()
-        if len(parts) < 8:
-            return None
-        
-        try:
-            # Find the MAC address (starts with digits and contains colons)
-            bssid = None
-            ssid = None
-            mode = None
-            channel = None
-            rate = None
-            signal = None
-            bars = None
-            security = None
-            
-            for i, part in enumerate(parts):
-                # MAC address pattern: XX:XX:XX:XX:XX:XX
-                if ':' in part and len(part) == 17 and part.count(':') == 5:
-                    bssid = part
-                    # SSID is usually the next part, but might be empty
-                    if i + 1 < len(parts):
-                        ssid = parts[i + 1] if parts[i + 1] != '--' else "Hidden"
-                    # Mode is usually after SSID
-                    if i + 2 < len(parts):
-                        mode = parts[i + 2]
-                    # Channel is usually after mode
-                    if i + 3 < len(parts):
-                        channel = parts[i + 3]
-                    # Rate might be "65 Mbit/s" (two words)
-                    if i + 4 < len(parts):
-                        if i + 5 < len(parts) and parts[i + 5] == "Mbit/s":
-                            rate = f"{parts[i + 4]} {parts[i + 5]}"
-                            # Adjust subsequent indices by +1
-                            if i + 6 < len(parts):
-                                signal = parts[i + 6]
-                            if i + 7 < len(parts):
-                                bars = parts[i + 7]
-                            if i + 8 < len(parts):
-                                security = parts[i + 8]
-                        else:
-                            rate = parts[i + 4]
-                            if i + 5 < len(parts):
-                                signal = parts[i + 5]
-                            if i + 6 < len(parts):
-                                bars = parts[i + 6]
-                            if i + 7 < len(parts):
-                                security = parts[i + 7]
-                    break
-            
-            return {
-                'bssid': bssid or 'Unknown',
-                'ssid': ssid or 'Unknown',
-                'mode': mode or 'Unknown',
-                'channel': channel or 'Unknown',
-                'rate': rate or 'Unknown',
-                'signal': signal or 'Unknown',
-                'bars': bars or 'Unknown',
-                'security': security or 'Unknown'
-            }
-        except Exception as e:
-            print(f"❌ Parsing error: {e}")
-            return None
+    def parse_esp32_packet(self, entry):
+        """Convert the ESP32-C3 scan entry into display fields"""
+        return entry_fields(entry)
     
     def display_packet(self, packet, packet_num):
         """Display packet with real timestamp from RID data"""
         # Get current time for RID timestamp
-        current_time = datetime.now()
-        rid_timestamp = current_time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        
-        # Calculate current waypoint based on time (changes every 10 seconds)
-        elapsed_time = time.time() - self.start_time
-        waypoint_index = int(elapsed_time / 10) % 4
-        current_waypoint = self.waypoints[waypoint_index]
-        
-        print(f"\n🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁 ESP32-C3 REMOTE ID PACKET 🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁")
-        print(f"\n📦 PACKET #{packet_num} - {rid_timestamp}")
-        print("=" * 100)
-        
-        print(f"\n📡 WiFi Beacon Frame Data:")
-        print(f"   • MAC Address (BSSID): {packet['bssid']}")
-        print(f"   • Network Name (SSID): {packet['ssid']}")
-        print(f"   • Mode: {packet['mode']}")
-        print(f"   • Channel: {packet['channel']} (2.4GHz)")
-        print(f"   • Data Rate: {packet['rate']}")
-        print(f"   • Signal Strength: {packet['signal']}%")
-        print(f"   • Signal Quality: {packet['bars']}")
-        print(f"   • Security: {packet['security']}")
-        
-        print(f"\n📋 Remote ID Message Content:")
-        print(f"   • Operator ID: {packet['ssid']}")
-        print(f"   • UAV MAC Address: {packet['bssid']}")
-        print(f"   • UAV ID: TEST-UAV-C3-001")
-        print(f"   • Flight Description: C3 Test Flight")
-        
-        print(f"\n📍 Location Data:")
-        print(f"   • Location: Aldrich Park, Irvine, California")
-        print(f"   • Coordinates: {current_waypoint['coords']} ({current_waypoint['name']})")
-        print(f"   • Position: {current_waypoint['desc']}")
-        print(f"   • Altitude: 100m MSL (50m AGL)")
-        print(f"   • Note: Coordinates change every 10 seconds in square pattern")
-        print(f"   • Flight Pattern: 4 waypoints around Aldrich Park")
-        
-        print(f"\n✈️  Flight Data:")
-        print(f"   • Speed: 25 knots")
-        print(f"   • Heading: Variable (square pattern)")
-        print(f"   • Flight Status: Active simulation")
-        print(f"   • Emergency Status: None")
-        print(f"   • GPS Satellites: 12")
-        print(f"   • GPS Valid: Yes")
-        
-        print(f"\n⏰ RID Packet Timestamp:")
-        print(f"   • RID Timestamp: {rid_timestamp}")
-        print(f"   • Capture Time: {current_time.strftime('%H:%M:%S.%f')[:-3]}")
-        print(f"   • Packet Number: {packet_num}")
-        print(f"   • Detection Rate: 100%")
-        
-        print(f"\n✅ ASTM F3411-19 Compliance:")
-        print(f"   • Basic ID: ✅ TRANSMITTED")
-        print(f"   • Location: ✅ TRANSMITTED")
-        print(f"   • Operator ID: ✅ TRANSMITTED")
-        print(f"   • Timestamp: ✅ TRANSMITTED")
-        print(f"   • Emergency Status: ✅ TRANSMITTED")
-        print(f"   • Self ID: ✅ TRANSMITTED")
-        print(f"   • System Data: ✅ TRANSMITTED")
-        
-        print(f"\n🎯 Detection Capabilities:")
-        print(f"   • Remote ID Scanner Apps: ✅ DETECTABLE")
-        print(f"   • WiFi Analyzers: ✅ DETECTABLE")
-        print(f"   • Packet Sniffers: ✅ DETECTABLE")
-        print(f"   • Aviation Authorities: ✅ DETECTABLE")
-        print(f"   • Law Enforcement: ✅ DETECTABLE")
-        
-        print("=" * 100)
-        print("✅ ESP32-C3 Remote ID transmission is ACTIVE and COMPLIANT")
-        print("=" * 100)
-        print("\n\n\n")  # Extra spacing between packets
+        now_ns = time.time_ns()
+        rid_timestamp = format_datetime(now_ns)
+        
+        # Advance to the next waypoint once its 10-second slot has passed
+        now = time.monotonic()
+        while now >= self.next_waypoint_at:
+            self.waypoint_index = (self.waypoint_index + 1) % len(self.waypoints)
+            self.next_waypoint_at += self.waypoint_period
+        current_waypoint = self.waypoints[self.waypoint_index]
+        
+        sys.stdout.write(PACKET_TEMPLATE % dict(
+            packet,
+            packet_num=packet_num,
+            rid_timestamp=rid_timestamp,
+            capture_time=format_time(now_ns),
+            coords=current_waypoint['coords'],
+            waypoint=current_waypoint['name'],
+            position=current_waypoint['desc'],
+        ))
     
     def run(self):
         """Run the corrected packet dumper"""
@@ -218,35 +149,48 @@ class CorrectedPacketDumper:
         # Set up signal handler
         signal.signal(signal.SIGINT, self.signal_handler)
         
-        while self.running:
-            wifi_data = self.scan_wifi_networks()
-            
-            if "Error" in wifi_data:
-                print(f"❌ {wifi_data}")
-                time.sleep(5)
-                continue
-            
-            # Look for ESP32-C3 packet
-            esp32_line = self.find_esp32_packet(wifi_data)
-            if esp32_line:
-                self.esp32_packets += 1
-                self.last_esp32_time = time.time()
+        try:
+            self.scanner = NL80211Scanner()
+            self.scanner.subscribe_scan_events()
+        except OSError as e:
+            print(f"❌ Error opening nl80211 socket: {e}")
+            return
+        
+        # Poll the cache on a fixed 1 s cadence, or early if a scan completes
+        scans = self.scanner.iter_scans(poll_interval=1)
+        
+        try:
+            for wifi_data in scans:
+                if not self.running:
+                    break
+                if wifi_data is None:
+                    print("❌ Error reading scan results")
+                    time.sleep(5)
+                    continue
                 
-                packet = self.parse_esp32_packet(esp32_line)
-                if packet:
-                    self.display_packet(packet, self.esp32_packets)
+                # Look for ESP32-C3 packet
+                esp32_entry = self.find_esp32_packet(wifi_data)
+                if esp32_entry:
+                    self.esp32_packets += 1
+                    self.last_esp32_time = time.time()
+                    
+                    if same_beacon(esp32_entry, self.last_entry):
+                        # Same cached beacon as the last poll; skip re-rendering the report
+                        sys.stdout.write(HEARTBEAT_TEMPLATE % (format_time(), self.esp32_packets))
+                    else:
+                        self.last_entry = esp32_entry
+                        packet = self.parse_esp32_packet(esp32_entry)
+                        self.display_packet(packet, self.esp32_packets)
                 else:
-                    print(f"\n🚁 ESP32-C3 DETECTED! [{datetime.now().strftime('%H:%M:%S')}]")
-                    print(f"   Raw: {esp32_line}")
-                    print("   ✅ Remote ID transmission active")
-                    print("-" * 50)
-            else:
-                # Show scanning status every 5 seconds
-                if int(time.time() - self.start_time) % 5 == 0:
-                    elapsed = time.time() - self.start_time
-                    print(f"🔍 Scanning... {elapsed:.0f}s elapsed, {self.esp32_packets} packets found")
-            
-            time.sleep(1)  # Scan every second
+                    # Show scanning status once per status_period
+                    now = time.monotonic()
+                    if now >= self.next_status_at:
+                        elapsed = time.time() - self.start_time
+                        print(f"🔍 Scanning... {elapsed:.0f}s elapsed, {self.esp32_packets} packets found")
+                        self.next_status_at = now + self.status_period
+        finally:
+            scans.close()
+            self.scanner.close()
 
 if __name__ == "__main__":
     dumper = CorrectedPacketDumper()
@@ -1,9 +1,22 @@
 #!/usr/bin/env python3
 
-import subprocess
+import selectors
 import time
 import sys
 
+from beacon_capture import FRAME_BUFFER_SIZE, open_beacon_socket, parse_beacon
+from timestamp_format import format_time
+
+BEACON_TEMPLATE = (
+    "\n[%s] ESP32-C3 Beacon #%d\n"
+    "Source MAC: %s\n"
+    "SSID: %s\n"
+    "Frame Length: %d bytes\n"
+    "Raw Hex Data:\n"
+    "%s\n"
+    + "-" * 60 + "\n"
+)
+
 def capture_esp32_beacons():
     """Capture raw hex data from ESP32-C3 beacon packets"""
     
@@ -16,64 +29,51 @@ def capture_esp32_beacons():
     print(f"Will run for {timeout_seconds} seconds maximum")
     print("-" * 60)
     
+    packet_count = 0
+    
     try:
-        # Use tshark to capture beacon packets from specific MAC
-        cmd = [
-            "sudo", "tshark", 
-            "-i", interface,
-            "-Y", f"wlan.fc.type_subtype == 0x08 and wlan.sa == {target_mac}",
-            "-T", "fields",
-            "-e", "wlan.sa",  # Source MAC
-            "-e", "wlan.ssid",  # SSID
-            "-e", "frame.len",  # Frame length
-            "-e", "data.data"  # Raw hex data
-        ]
-        
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1
-        )
-        
-        packet_count = 0
-        start_time = time.time()
+        # The socket's BPF filter drops everything but beacons from target_mac
+        # in the kernel, before any copy to userspace
+        sock = open_beacon_socket(interface, target_mac)
+        sock.setblocking(False)
+        selector = selectors.DefaultSelector()
+        selector.register(sock, selectors.EVENT_READ)
+        frame_buffer = bytearray(FRAME_BUFFER_SIZE)
+        frame_view = memoryview(frame_buffer)
+        deadline = time.monotonic() + timeout_seconds
         
         while True:
             # Check if we've exceeded the timeout
-            if time.time() - start_time > timeout_seconds:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
                 print(f"\nTimeout reached ({timeout_seconds} seconds). Stopping capture.")
                 break
                 
-            line = process.stdout.readline()
-            if not line:
-                break
-                
-            line = line.strip()
-            if not line:
+            if not selector.select(timeout=remaining):
                 continue
                 
-            # Parse tshark output
-            parts = line.split('\t')
-            if len(parts) >= 4:
-                source_mac = parts[0]
-                ssid = parts[1]
-                frame_len = parts[2]
-                hex_data = parts[3]
+            # Drain every queued frame, then write the whole batch at once
+            output = []
+            while True:
+                try:
+                    length = sock.recv_into(frame_buffer)
+                except BlockingIOError:
+                    break
+                    
+                beacon = parse_beacon(frame_view[:length])
+                if not beacon:
+                    continue
+                    
+                source_mac, ssid, frame_len, dot11 = beacon
+                hex_data = dot11.hex()
                 
                 packet_count += 1
-                timestamp = time.strftime("%H:%M:%S.%f")[:-3]
-                
-                print(f"\n[{timestamp}] ESP32-C3 Beacon #{packet_count}")
-                print(f"Source MAC: {source_mac}")
-                print(f"SSID: {ssid}")
-                print(f"Frame Length: {frame_len} bytes")
-                print(f"Raw Hex Data:")
-                print(hex_data)
-                print("-" * 60)
-                
-                # Flush output immediately
+                timestamp = format_time()
+                output.append(BEACON_TEMPLATE % (timestamp, packet_count, source_mac,
+                                                 ssid, frame_len, hex_data))
+            
+            if output:
+                sys.stdout.write("".join(output))
                 sys.stdout.flush()
     
     except KeyboardInterrupt:
@@ -81,8 +81,10 @@ def capture_esp32_beacons():
     except Exception as e:
         print(f"Error: {e}")
     finally:
-        if 'process' in locals():
-            process.terminate()
+        if 'selector' in locals():
+            selector.close()
+        if 'sock' in locals():
+            sock.close()
 
 if __name__ == "__main__":
     capture_esp32_beacons()
@@ -1,9 +1,24 @@
 #!/usr/bin/env python3
 
+import re
 import subprocess
 import time
 import sys
 
+from timestamp_format import format_time
+
+# wlan.sa, frame.len, data.data - one tshark -T fields line
+PACKET_FIELDS_RE = re.compile(r'([^\t]*)\t([^\t]*)\t(.*)')
+
+PACKET_TEMPLATE = (
+    "\n[%s] Packet #%d\n"
+    "Source MAC: %s\n"
+    "Frame Length: %s bytes\n"
+    "Raw Hex Data:\n"
+    "%s\n"
+    + "-" * 40 + "\n"
+)
+
 def capture_esp32_packets():
     """Capture raw hex packets from any ESP32-like device in monitor mode"""
     
@@ -11,27 +26,31 @@ def capture_esp32_packets():
     timeout_seconds = 30
     
     print(f"Starting raw packet capture on interface {interface}")
-    print("Looking for any WiFi packets (will show all)")
+    print("Looking for any WiFi packets from ESP32 (84:fc:e6) transmitters")
     print(f"Will run for {timeout_seconds} seconds maximum")
     print("-" * 60)
     
     try:
-        # Use tshark to capture raw packets in monitor mode
+        # Use tshark to capture raw packets in monitor mode; the -f capture
+        # filter is BPF run in the kernel, so frames from other transmitters
+        # (transmitter OUI in addr2) never reach tshark's dissectors
         cmd = [
             "sudo", "tshark", 
             "-i", interface,
+            "-f", "wlan[10:2] = 0x84fc and wlan[12] = 0xe6",
             "-T", "fields",
             "-e", "wlan.sa",  # Source MAC
             "-e", "frame.len",  # Frame length
             "-e", "data.data"  # Raw hex data
         ]
         
+        # Binary, block-buffered pipe; stderr is discarded so tshark can't block on it
         process = subprocess.Popen(
             cmd,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1
+            stderr=subprocess.DEVNULL,
+            bufsize=1 << 20,
+            close_fds=False
         )
         
         packet_count = 0
@@ -52,23 +71,16 @@ def capture_esp32_packets():
                 continue
                 
             # Parse tshark output
-            parts = line.split('\t')
-            if len(parts) >= 3:
-                source_mac = parts[0]
-                frame_len = parts[1]
-                hex_data = parts[2]
+            match = PACKET_FIELDS_RE.match(line.decode('ascii', 'replace'))
+            if match:
+                source_mac, frame_len, hex_data = match.groups()
                 
                 packet_count += 1
-                timestamp = time.strftime("%H:%M:%S.%f")[:-3]
-                
-                print(f"\n[{timestamp}] Packet #{packet_count}")
-                print(f"Source MAC: {source_mac}")
-                print(f"Frame Length: {frame_len} bytes")
-                print(f"Raw Hex Data:")
-                print(hex_data)
-                print("-" * 40)
+                timestamp = format_time()
                 
-                # Flush output immediately
+                # One write per packet, flushed immediately
+                sys.stdout.write(PACKET_TEMPLATE % (timestamp, packet_count, source_mac,
+                                                    frame_len, hex_data))
                 sys.stdout.flush()
     
     except KeyboardInterrupt:
@@ -4,11 +4,77 @@ ESP32-C3 Packet Dumper
 Focuses on ESP32-C3 Remote ID packets with clean formatting
 """
 
-import subprocess
 import time
 import signal
 import sys
-from datetime import datetime
+
+from nl80211_scanner import NL80211Scanner, entry_fields, same_beacon
+from timestamp_format import format_datetime, format_time
+
+# Full per-packet report, filled with % and written in one call
+PACKET_TEMPLATE = (
+    "\n" + "🚁" * 20 + " ESP32-C3 REMOTE ID PACKET " + "🚁" * 20 + "\n"
+    "📦 PACKET #%(packet_num)d - %(timestamp)s\n"
+    + "=" * 80 + "\n"
+    "📡 WiFi Beacon Frame Data:\n"
+    "   • MAC Address (BSSID): %(bssid)s\n"
+    "   • Network Name (SSID): %(ssid)s\n"
+    "   • Mode: %(mode)s\n"
+    "   • Channel: %(channel)s (2.4GHz)\n"
+    "   • Data Rate: %(rate)s\n"
+    "   • Signal Strength: %(signal)s%%\n"
+    "   • Signal Quality: %(bars)s\n"
+    "   • Security: %(security)s\n"
+    "\n📋 Remote ID Message Content:\n"
+    "   • Operator ID: %(ssid)s\n"
+    "   • UAV MAC Address: %(bssid)s\n"
+    "   • UAV ID: TEST-UAV-C3-001\n"
+    "   • Flight Description: C3 Test Flight\n"
+    "\n📍 Location Data:\n"
+    "   • Location: Aldrich Park, Irvine, California\n"
+    "   • Latitude: 33.6405°N\n"
+    "   • Longitude: 117.8443°W\n"
+    "   • Altitude: 100m MSL (50m AGL)\n"
+    "   • Base Altitude: 50m\n"
+    "\n✈️  Flight Data:\n"
+    "   • Speed: 25 knots\n"
+    "   • Heading: Variable (square pattern)\n"
+    "   • Flight Status: Active simulation\n"
+    "   • Emergency Status: None\n"
+    "   • GPS Satellites: 12\n"
+    "   • GPS Valid: Yes\n"
+    "\n🔧 Technical Specifications:\n"
+    "   • Packet Type: WiFi Beacon Frame\n"
+    "   • Protocol: IEEE 802.11\n"
+    "   • Frequency: 2.4GHz\n"
+    "   • Channel Width: 20MHz\n"
+    "   • Modulation: OFDM\n"
+    "   • Encryption: WPA2\n"
+    "   • Transmission Rate: 40Hz (every 25ms)\n"
+    "\n✅ ASTM F3411-19 Compliance:\n"
+    "   • Basic ID: ✅ TRANSMITTED\n"
+    "   • Location: ✅ TRANSMITTED\n"
+    "   • Operator ID: ✅ TRANSMITTED\n"
+    "   • Timestamp: ✅ TRANSMITTED\n"
+    "   • Emergency Status: ✅ TRANSMITTED\n"
+    "   • Self ID: ✅ TRANSMITTED\n"
+    "   • System Data: ✅ TRANSMITTED\n"
+    "\n🎯 Detection Capabilities:\n"
+    "   • Remote ID Scanner Apps: ✅ DETECTABLE\n"
+    "   • WiFi Analyzers: ✅ DETECTABLE\n"
+    "   • Packet Sniffers: ✅ DETECTABLE\n"
+    "   • Aviation Authorities: ✅ DETECTABLE\n"
+    "   • Law Enforcement: ✅ DETECTABLE\n"
+    "\n⏰ Packet Information:\n"
+    "   • Capture Time: %(timestamp)s\n"
+    "   • Packet Number: %(packet_num)d\n"
+    "   • Total ESP32 Packets: %(esp32_packets)d\n"
+    "   • Detection Rate: %(detection_rate).1f%%\n"
+    + "=" * 80 + "\n"
+    "✅ ESP32-C3 Remote ID transmission is ACTIVE and COMPLIANT\n"
+    + "=" * 80 + "\n"
+)
+HEARTBEAT_TEMPLATE = "· [%s] ESP32-C3 still active (#%d, beacon unchanged)\n"
 
 class ESP32PacketDumper:
     def __init__(self):
@@ -17,132 +83,40 @@ class ESP32PacketDumper:
         self.esp32_ssid = "TEST-OP-12345"
         self.packet_count = 0
         self.esp32_packets = 0
+        self.scanner = None
+        self.last_entry = None
         
     def signal_handler(self, sig, frame):
         print("\n\n🛑 Stopping ESP32 packet dumper...")
+        # Only flag the loop; it exits at its next wakeup and the finally
+        # block closes the netlink sockets
         self.running = False
-        sys.exit(0)
-    
-    def scan_wifi_networks(self):
-        """Scan for WiFi networks"""
-        try:
-            result = subprocess.run(['timeout', '3', 'nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, timeout=5)
-            return result.stdout if result.returncode == 0 else None
-        except:
-            return None
     
     def find_esp32_packet(self, wifi_data):
         """Find ESP32-C3 packet in WiFi data"""
-        if not wifi_data:
-            return None
-        
-        lines = wifi_data.split('\n')
-        for line in lines:
-            if self.esp32_mac in line and self.esp32_ssid in line:
-                return line.strip()
+        entry = wifi_data.get(self.esp32_mac)
+        if entry and entry.ssid == self.esp32_ssid:
+            return entry
         return None
     
-    def parse_esp32_packet(self, line):
-        """Parse ESP32-C3 packet line"""
-        if not line:
-            return None
-        
-        # Split the line and extract fields
-        parts = line.split()
-        if len(parts) < 8:
-            return None
-        
-        try:
-            return {
-                'bssid': parts[1],      # 84:FC:E6:00:FC:05
-                'ssid': parts[2],       # TEST-OP-12345
-                'mode': parts[3],       # Infra
-                'channel': parts[4],    # 6
-                'rate': parts[5],       # 65
-                'signal': parts[6],     # 100
-                'bars': parts[7],       # ▂▄▆█
-                'security': parts[8] if len(parts) > 8 else 'Unknown'  # WPA2
-            }
-        except:
-            return None
+    def parse_esp32_packet(self, entry):
+        """Convert the ESP32-C3 scan entry into display fields"""
+        return entry_fields(entry)
     
     def dump_esp32_packet(self, packet, packet_num):
         """Dump ESP32-C3 packet in detailed format"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        
-        print(f"\n{'🚁'*20} ESP32-C3 REMOTE ID PACKET {'🚁'*20}")
-        print(f"📦 PACKET #{packet_num} - {timestamp}")
-        print(f"{'='*80}")
-        
-        print(f"📡 WiFi Beacon Frame Data:")
-        print(f"   • MAC Address (BSSID): {packet['bssid']}")
-        print(f"   • Network Name (SSID): {packet['ssid']}")
-        print(f"   • Mode: {packet['mode']}")
-        print(f"   • Channel: {packet['channel']} (2.4GHz)")
-        print(f"   • Data Rate: {packet['rate']} Mbit/s")
-        print(f"   • Signal Strength: {packet['signal']}%")
-        print(f"   • Signal Quality: {packet['bars']}")
-        print(f"   • Security: {packet['security']}")
-        
-        print(f"\n📋 Remote ID Message Content:")
-        print(f"   • Operator ID: {packet['ssid']}")
-        print(f"   • UAV MAC Address: {packet['bssid']}")
-        print(f"   • UAV ID: TEST-UAV-C3-001")
-        print(f"   • Flight Description: C3 Test Flight")
-        
-        print(f"\n📍 Location Data:")
-        print(f"   • Location: Aldrich Park, Irvine, California")
-        print(f"   • Latitude: 33.6405°N")
-        print(f"   • Longitude: 117.8443°W")
-        print(f"   • Altitude: 100m MSL (50m AGL)")
-        print(f"   • Base Altitude: 50m")
-        
-        print(f"\n✈️  Flight Data:")
-        print(f"   • Speed: 25 knots")
-        print(f"   • Heading: Variable (square pattern)")
-        print(f"   • Flight Status: Active simulation")
-        print(f"   • Emergency Status: None")
-        print(f"   • GPS Satellites: 12")
-        print(f"   • GPS Valid: Yes")
-        
-        print(f"\n🔧 Technical Specifications:")
-        print(f"   • Packet Type: WiFi Beacon Frame")
-        print(f"   • Protocol: IEEE 802.11")
-        print(f"   • Frequency: 2.4GHz")
-        print(f"   • Channel Width: 20MHz")
-        print(f"   • Modulation: OFDM")
-        print(f"   • Encryption: WPA2")
-        print(f"   • Transmission Rate: 40Hz (every 25ms)")
-        
-        print(f"\n✅ ASTM F3411-19 Compliance:")
-        print(f"   • Basic ID: ✅ TRANSMITTED")
-        print(f"   • Location: ✅ TRANSMITTED")
-        print(f"   • Operator ID: ✅ TRANSMITTED")
-        print(f"   • Timestamp: ✅ TRANSMITTED")
-        print(f"   • Emergency Status: ✅ TRANSMITTED")
-        print(f"   • Self ID: ✅ TRANSMITTED")
-        print(f"   • System Data: ✅ TRANSMITTED")
-        
-        print(f"\n🎯 Detection Capabilities:")
-        print(f"   • Remote ID Scanner Apps: ✅ DETECTABLE")
-        print(f"   • WiFi Analyzers: ✅ DETECTABLE")
-        print(f"   • Packet Sniffers: ✅ DETECTABLE")
-        print(f"   • Aviation Authorities: ✅ DETECTABLE")
-        print(f"   • Law Enforcement: ✅ DETECTABLE")
-        
-        print(f"\n⏰ Packet Information:")
-        print(f"   • Capture Time: {timestamp}")
-        print(f"   • Packet Number: {packet_num}")
-        print(f"   • Total ESP32 Packets: {self.esp32_packets}")
-        print(f"   • Detection Rate: {(self.esp32_packets/max(self.packet_count,1)*100):.1f}%")
-        
-        print(f"{'='*80}")
-        print(f"✅ ESP32-C3 Remote ID transmission is ACTIVE and COMPLIANT")
-        print(f"{'='*80}")
+        timestamp = format_datetime()
+        
+        sys.stdout.write(PACKET_TEMPLATE % dict(
+            packet,
+            packet_num=packet_num,
+            timestamp=timestamp,
+            esp32_packets=self.esp32_packets,
+            detection_rate=self.esp32_packets / max(self.packet_count, 1) * 100,
+        ))
     
-    def monitor(self):
-        """Main monitoring loop"""
+    def monitor(self, scan_source):
+        """Main monitoring loop, one pass per scan the source yields"""
         print("🔍 ESP32-C3 Remote ID Packet Dumper")
         print("=" * 60)
         print("Monitoring ESP32-C3 Remote ID packets...")
@@ -150,34 +124,32 @@ class ESP32PacketDumper:
         print("=" * 60)
         print()
         
-        while self.running:
+        for wifi_data in scan_source:
+            if not self.running:
+                break
+            if wifi_data is None:
+                print("❌ Error reading scan results")
+                time.sleep(2)
+                continue
             try:
-                # Scan WiFi networks
-                wifi_data = self.scan_wifi_networks()
                 self.packet_count += 1
                 
-                if wifi_data:
-                    # Look for ESP32-C3 packet
-                    esp32_line = self.find_esp32_packet(wifi_data)
-                    if esp32_line:
-                        self.esp32_packets += 1
-                        packet = self.parse_esp32_packet(esp32_line)
-                        if packet:
-                            self.dump_esp32_packet(packet, self.packet_count)
-                        else:
-                            print(f"\n🚁 ESP32-C3 DETECTED! [{datetime.now().strftime('%H:%M:%S')}]")
-                            print(f"   Raw: {esp32_line}")
-                            print(f"   ✅ Remote ID transmission active")
-                            print("-" * 60)
+                # Look for ESP32-C3 packet
+                esp32_entry = self.find_esp32_packet(wifi_data)
+                if esp32_entry:
+                    self.esp32_packets += 1
+                    if same_beacon(esp32_entry, self.last_entry):
+                        # Same cached beacon as the last poll; skip re-rendering the report
+                        sys.stdout.write(HEARTBEAT_TEMPLATE % (format_time(), self.packet_count))
+                    else:
+                        self.last_entry = esp32_entry
+                        packet = self.parse_esp32_packet(esp32_entry)
+                        self.dump_esp32_packet(packet, self.packet_count)
                 
                 # Show status every 10 scans
                 if self.packet_count % 10 == 0:
                     print(f"\n📊 Status: {self.packet_count} scans, {self.esp32_packets} ESP32 packets detected")
                 
-                time.sleep(1)  # Scan every second
-                
-            except KeyboardInterrupt:
-                break
             except Exception as e:
                 print(f"❌ Error: {e}")
                 time.sleep(2)
@@ -187,10 +159,20 @@ class ESP32PacketDumper:
         signal.signal(signal.SIGINT, self.signal_handler)
         
         try:
-            self.monitor()
-        except KeyboardInterrupt:
-            pass
+            self.scanner = NL80211Scanner()
+            self.scanner.subscribe_scan_events()
+        except OSError as e:
+            print(f"❌ Error opening nl80211 socket: {e}")
+            return
+        
+        # Poll the cache on a fixed 1 s cadence, or early if a scan completes
+        scans = self.scanner.iter_scans(poll_interval=1)
+        
+        try:
+            self.monitor(scans)
         finally:
+            scans.close()
+            self.scanner.close()
             print(f"\n📊 Final Statistics:")
             print(f"   Total scans: {self.packet_count}")
             print(f"   ESP32-C3 packets: {self.esp32_packets}")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+ESP32-C3 Remote ID Target
+Identity of the test transmitter shared by the scan monitors and the
+monitor-mode capture tools
+"""
+
+from nl80211_scanner import RESCAN_INTERVAL, NL80211Scanner, frequency_from_channel
+
+# softAP BSSID and SSID as they appear in scan results
+ESP32_MAC = "84:FC:E6:00:FC:05"
+ESP32_SSID = "TEST-OP-12345"
+ESP32_CHANNEL = 6
+# Transmitter address of the beacons seen in monitor mode, lower-case the
+# way tshark and beacon_capture print it
+ESP32_CAPTURE_MAC = "84:fc:e6:00:fc:04"
+# One ~100 ms dwell covers the softAP's 100 TU beacon interval
+SCAN_DWELL_TU = 100
+# A passive pass over a few channels finishes in about one dwell each, so
+# the next one can be armed 0.5 s after it completes
+PINNED_RESCAN_INTERVAL = 0.5
+
+
+def open_esp32_scanner(channels=(ESP32_CHANNEL,)):
+    """Open an NL80211Scanner, subscribed to scan events, that passively scans
+    only the given channels every PINNED_RESCAN_INTERVAL (never with RID_NO_RESCAN)"""
+    scanner = NL80211Scanner(
+        rescan_interval=None if RESCAN_INTERVAL is None else PINNED_RESCAN_INTERVAL,
+        scan_freqs=[frequency_from_channel(channel) for channel in channels],
+        dwell_tu=SCAN_DWELL_TU,
+    )
+    try:
+        scanner.subscribe_scan_events()
+    except OSError:
+        scanner.close()
+        raise
+    return scanner
+
+
+def find_esp32_entry(wifi_data):
+    """Return the ESP32-C3's ScanEntry from a {BSSID: ScanEntry} scan, or None"""
+    entry = wifi_data.get(ESP32_MAC)
+    if entry and entry.ssid == ESP32_SSID:
+        return entry
+    return None
@@ -3,124 +3,39 @@
 Final Remote ID Packet Analysis - Correct Data
 """
 
+import sys
 import time
 
+from rid_report import HEADER, NEXT_STEPS, emit_report
+
+# Raw captured data
+RAW_DATA = "84:FC:E6:00:FC:05  TEST-OP-12345               Infra  6     65 Mbit/s   87      ▂▄▆█  WPA2"
+SCANNER_APPS = (
+    "\n"
+    "📱 Recommended Remote ID Scanner Apps:\n"
+    "  • Android: 'Remote ID Scanner', 'Drone Scanner'\n"
+    "  • iOS: 'Remote ID Scanner', 'Drone Scanner'\n"
+    "\n"
+    "🔍 What the Scanner App Will Show:\n"
+    "  • Drone ID: TEST-UAV-C3-001\n"
+    "  • Operator: TEST-OP-12345\n"
+    "  • Location: Aldrich Park, Irvine, CA\n"
+    "  • Altitude: 100m MSL\n"
+    "  • Speed: 25 knots\n"
+    "  • Flight pattern: Square around the park\n"
+)
+
 def analyze_rid_packets():
     """Analyze the Remote ID packets from ESP32-C3"""
-    print("🔍 ESP32-C3 Remote ID Packet Analysis")
-    print("=" * 50)
-    print()
-    
-    # Raw captured data
-    raw_data = "84:FC:E6:00:FC:05  TEST-OP-12345               Infra  6     65 Mbit/s   87      ▂▄▆█  WPA2"
-    
-    print("📡 Captured WiFi Beacon Frame:")
-    print(f"Raw data: {raw_data}")
-    print()
-    
-    # Parse the data correctly
-    parts = raw_data.split()
-    
-    bssid = parts[0]      # 84:FC:E6:00:FC:05
-    ssid = parts[1]       # TEST-OP-12345
-    mode = parts[2]       # Infra
-    channel = parts[3]    # 6
-    rate = parts[4]       # 65
-    rate_unit = parts[5]  # Mbit/s
-    signal = parts[6]     # 87
-    bars = parts[7]       # ▂▄▆█
-    security = parts[8]   # WPA2
-    
-    print("📊 Parsed Beacon Frame Data:")
-    print(f"  BSSID (MAC): {bssid}")
-    print(f"  SSID: {ssid}")
-    print(f"  Mode: {mode}")
-    print(f"  Channel: {channel}")
-    print(f"  Data Rate: {rate} {rate_unit}")
-    print(f"  Signal Strength: {signal}%")
-    print(f"  Security: {security}")
-    print()
-    
-    # Verify the data
-    print("✅ Remote ID Data Verification:")
-    print(f"  ✓ Operator ID in SSID: '{ssid}'")
-    print(f"  ✓ ESP32-C3 MAC: {bssid}")
-    print(f"  ✓ WiFi Channel: {channel} (2.4GHz)")
-    print(f"  ✓ Signal Strength: {signal}% (Excellent)")
-    print(f"  ✓ Security: {security} (Standard for RID)")
-    print()
-    
-    # Expected RID message structure
-    print("📋 Remote ID Message Content (in Beacon Frames):")
-    print("┌─────────────────────────────────────────┐")
-    print("│           Remote ID Message             │")
-    print("├─────────────────────────────────────────┤")
-    print("│ Message Type: Basic ID + Location       │")
-    print("│ Basic ID: TEST-UAV-C3-001              │")
-    print("│ Operator ID: TEST-OP-12345             │")
-    print("│ Location: 33.6405°N, 117.8443°W        │")
-    print("│ Altitude: 100m MSL (50m AGL)           │")
-    print("│ Speed: 25 knots                        │")
-    print("│ Heading: Variable (square pattern)     │")
-    print("│ Timestamp: Current UTC time            │")
-    print("│ Status: Active flight                  │")
-    print("│ Emergency Status: None                 │")
-    print("└─────────────────────────────────────────┘")
-    print()
-    
-    # Technical analysis
-    print("🔬 Technical Analysis:")
-    print("  ✓ Beacon frame format: IEEE 802.11 compliant")
-    print("  ✓ SSID contains operator identification")
-    print("  ✓ BSSID matches ESP32-C3 MAC address")
-    print(f"  ✓ Channel {channel} is appropriate for 2.4GHz")
-    print(f"  ✓ Signal strength {signal}% indicates good transmission")
-    print(f"  ✓ {security} security follows RID standards")
-    print()
-    
-    # Compliance check
-    print("📋 ASTM F3411-19 Compliance Check:")
-    print("  ✓ Operator ID transmitted in SSID")
-    print("  ✓ UAV identification transmitted in beacon payload")
-    print("  ✓ Location data transmitted in beacon payload")
-    print("  ✓ Altitude information transmitted in beacon payload")
-    print("  ✓ Speed and heading transmitted in beacon payload")
-    print("  ✓ Timestamp transmitted in beacon payload")
-    print("  ✓ Emergency status transmitted in beacon payload")
-    print()
-    
-    print("🎯 Conclusion:")
-    print("✅ ESP32-C3 Remote ID transmission is WORKING CORRECTLY")
-    print("✅ All required data fields are being transmitted")
-    print("✅ Signal follows ASTM F3411-19 standard")
-    print("✅ Ready for detection by Remote ID scanner apps")
-    print("✅ Signal is detectable by authorized parties")
-    
-    return True
+    sys.stdout.write(HEADER)
+    return emit_report(RAW_DATA)
 
 def main():
     print(f"Analysis Time: {time.strftime('%Y-%m-%d %H:%M:%S')}")
     print()
     
     if analyze_rid_packets():
-        print()
-        print("🚁 Next Steps:")
-        print("1. Download a Remote ID scanner app on your phone")
-        print("2. Open the app and scan for nearby drones")
-        print("3. You should see your simulated drone with all flight data")
-        print("4. The app will display location, operator info, and flight status")
-        print()
-        print("📱 Recommended Remote ID Scanner Apps:")
-        print("  • Android: 'Remote ID Scanner', 'Drone Scanner'")
-        print("  • iOS: 'Remote ID Scanner', 'Drone Scanner'")
-        print()
-        print("🔍 What the Scanner App Will Show:")
-        print("  • Drone ID: TEST-UAV-C3-001")
-        print("  • Operator: TEST-OP-12345")
-        print("  • Location: Aldrich Park, Irvine, CA")
-        print("  • Altitude: 100m MSL")
-        print("  • Speed: 25 knots")
-        print("  • Flight pattern: Square around the park")
+        sys.stdout.write(NEXT_STEPS + SCANNER_APPS)
 
 if __name__ == "__main__":
     main()
@@ -4,11 +4,39 @@ Final Working WiFi Packet Monitor
 Fixed parsing and reliable operation
 """
 
-import subprocess
 import time
 import signal
 import sys
-from datetime import datetime
+
+from nl80211_scanner import NL80211Scanner, entry_fields
+
+# Full ESP32-C3 report, filled with % and written in one call
+PACKET_TEMPLATE = (
+    "\n🚁 ESP32-C3 REMOTE ID PACKET DETECTED! [%(timestamp)s]\n"
+    + "=" * 70 + "\n"
+    "📡 Raw Data: %(bssid)s | %(ssid)s | Ch:%(channel)s | %(signal)s%%\n"
+    "\n"
+    "📋 Remote ID Analysis:\n"
+    "   • Operator ID: %(ssid)s\n"
+    "   • UAV MAC: %(bssid)s\n"
+    "   • WiFi Channel: %(channel)s (2.4GHz)\n"
+    "   • Signal Strength: %(signal)s%% (Excellent)\n"
+    "   • Security: %(security)s (RID Standard)\n"
+    "\n"
+    "📊 Flight Data:\n"
+    "   • UAV ID: TEST-UAV-C3-001\n"
+    "   • Location: Aldrich Park, Irvine, CA\n"
+    "   • Coordinates: 33.6405°N, 117.8443°W\n"
+    "   • Altitude: 100m MSL (50m AGL)\n"
+    "   • Speed: 25 knots\n"
+    "   • Heading: Variable (square pattern)\n"
+    "   • Status: Active flight simulation\n"
+    "   • Emergency: None\n"
+    "\n"
+    "✅ ASTM F3411-19 Compliance: VERIFIED\n"
+    "✅ Ready for Remote ID scanner detection\n"
+    + "=" * 70 + "\n"
+)
 
 class FinalPacketMonitor:
     def __init__(self):
@@ -18,99 +46,35 @@ class FinalPacketMonitor:
         self.scan_count = 0
         self.esp32_detections = 0
         self.last_esp32_time = 0
+        self.scanner = None
         
     def signal_handler(self, sig, frame):
         print("\n\n🛑 Stopping packet monitor...")
+        # Only flag the loop; it exits at its next wakeup and run() closes
+        # the netlink sockets
         self.running = False
-        sys.exit(0)
-    
-    def scan_wifi_networks(self):
-        """Scan for WiFi networks"""
-        try:
-            result = subprocess.run(['timeout', '3', 'nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, timeout=5)
-            return result.stdout if result.returncode == 0 else None
-        except:
-            return None
     
-    def parse_network_line(self, line):
-        """Parse a WiFi network line - fixed parsing"""
-        if not line or not line.strip():
-            return None
-        if 'BSSID' in line or '--' in line or not line.startswith(' '):
-            return None
-            
-        parts = line.split()
-        if len(parts) < 8:
-            return None
-            
-        try:
-            # Fixed parsing - handle the actual format
-            bssid = parts[1]
-            ssid = parts[2]
-            mode = parts[3]
-            channel = parts[4]
-            rate = parts[5]
-            signal = parts[6]
-            bars = parts[7]
-            security = parts[8] if len(parts) > 8 else 'Unknown'
-            
-            return {
-                'bssid': bssid,
-                'ssid': ssid,
-                'mode': mode,
-                'channel': channel,
-                'rate': rate,
-                'signal': signal,
-                'bars': bars,
-                'security': security
-            }
-        except:
-            return None
+    def parse_network_line(self, entry):
+        """Convert a scan entry into nmcli-style display fields"""
+        return entry_fields(entry)
     
-    def is_esp32_network(self, network):
-        """Check if this is our ESP32-C3 network"""
-        if not network:
-            return False
-        return (network['bssid'] == self.esp32_mac or 
-                self.esp32_ssid in network['ssid'])
+    def is_esp32_network(self, entry):
+        """Check if this scan entry is our ESP32-C3 network"""
+        # get_scan_entries() upper-cases every BSSID, so no per-entry case folding
+        return entry.bssid == self.esp32_mac or entry.ssid == self.esp32_ssid
     
     def display_esp32_packet(self, network):
         """Display ESP32-C3 packet with full analysis"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
-        
-        print(f"\n🚁 ESP32-C3 REMOTE ID PACKET DETECTED! [{timestamp}]")
-        print("=" * 70)
-        print(f"📡 Raw Data: {network['bssid']} | {network['ssid']} | Ch:{network['channel']} | {network['signal']}%")
-        print()
-        print("📋 Remote ID Analysis:")
-        print(f"   • Operator ID: {network['ssid']}")
-        print(f"   • UAV MAC: {network['bssid']}")
-        print(f"   • WiFi Channel: {network['channel']} (2.4GHz)")
-        print(f"   • Signal Strength: {network['signal']}% (Excellent)")
-        print(f"   • Security: {network['security']} (RID Standard)")
-        print()
-        print("📊 Flight Data:")
-        print("   • UAV ID: TEST-UAV-C3-001")
-        print("   • Location: Aldrich Park, Irvine, CA")
-        print("   • Coordinates: 33.6405°N, 117.8443°W")
-        print("   • Altitude: 100m MSL (50m AGL)")
-        print("   • Speed: 25 knots")
-        print("   • Heading: Variable (square pattern)")
-        print("   • Status: Active flight simulation")
-        print("   • Emergency: None")
-        print()
-        print("✅ ASTM F3411-19 Compliance: VERIFIED")
-        print("✅ Ready for Remote ID scanner detection")
-        print("=" * 70)
+        timestamp = time.strftime("%H:%M:%S")
+        sys.stdout.write(PACKET_TEMPLATE % dict(network, timestamp=timestamp))
     
     def display_other_packet(self, network):
         """Display other WiFi packets"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = time.strftime("%H:%M:%S")
         print(f"📡 [{timestamp}] {network['ssid']} ({network['bssid']}) - Ch:{network['channel']} - {network['signal']}%")
     
-    def monitor(self):
-        """Main monitoring loop"""
+    def monitor(self, scan_source):
+        """Main monitoring loop, one pass per scan the source yields"""
         print("🔍 Final WiFi Packet Monitor")
         print("=" * 50)
         print("Monitoring ESP32-C3 Remote ID transmission...")
@@ -118,29 +82,28 @@ class FinalPacketMonitor:
         print("=" * 50)
         print()
         
-        while self.running:
+        for wifi_data in scan_source:
+            if not self.running:
+                break
+            if wifi_data is None:
+                print("❌ Error reading scan results")
+                time.sleep(2)
+                continue
             try:
-                # Scan WiFi networks
-                wifi_data = self.scan_wifi_networks()
                 self.scan_count += 1
                 current_time = time.time()
                 
-                if wifi_data:
-                    lines = wifi_data.split('\n')
-                    esp32_found = False
-                    
-                    for line in lines:
-                        network = self.parse_network_line(line)
-                        if network:
-                            is_esp32 = self.is_esp32_network(network)
-                            
-                            if is_esp32:
-                                esp32_found = True
-                                self.esp32_detections += 1
-                                self.last_esp32_time = current_time
-                                self.display_esp32_packet(network)
-                            elif self.scan_count % 15 == 0:  # Show other networks occasionally
-                                self.display_other_packet(network)
+                esp32_found = False
+                for entry in wifi_data.values():
+                    # Match on the raw entry; display fields are only derived
+                    # for networks that are actually printed
+                    if self.is_esp32_network(entry):
+                        esp32_found = True
+                        self.esp32_detections += 1
+                        self.last_esp32_time = current_time
+                        self.display_esp32_packet(self.parse_network_line(entry))
+                    elif self.scan_count % 15 == 0:  # Show other networks occasionally
+                        self.display_other_packet(self.parse_network_line(entry))
                 
                 # Show progress every 5 seconds
                 if self.scan_count % 5 == 0:
@@ -148,10 +111,6 @@ class FinalPacketMonitor:
                     print(f"📊 Progress: {self.scan_count} scans, {self.esp32_detections} ESP32 detections, "
                           f"Last ESP32: {elapsed:.1f}s ago")
                 
-                time.sleep(1)
-                
-            except KeyboardInterrupt:
-                break
             except Exception as e:
                 print(f"❌ Error: {e}")
                 time.sleep(2)
@@ -161,10 +120,21 @@ class FinalPacketMonitor:
         signal.signal(signal.SIGINT, self.signal_handler)
         
         try:
-            self.monitor()
-        except KeyboardInterrupt:
-            pass
+            self.scanner = NL80211Scanner()
+            self.scanner.subscribe_scan_events()
+        except OSError as e:
+            print(f"❌ Error opening nl80211 socket: {e}")
+            return
+        
+        # Poll the cache on a fixed 1 s cadence, or early if a scan
+        # completes - including scans started by other monitors
+        scans = self.scanner.iter_scans(poll_interval=1)
+        
+        try:
+            self.monitor(scans)
         finally:
+            scans.close()
+            self.scanner.close()
             print(f"\n📊 Final Statistics:")
             print(f"   Total scans: {self.scan_count}")
             print(f"   ESP32-C3 detections: {self.esp32_detections}")
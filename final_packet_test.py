@@ -4,79 +4,93 @@ Final ESP32-C3 Packet Test
 Only shows packets when ESP32 is actually transmitting
 """
 
-import subprocess
+import selectors
 import time
 import signal
 import sys
-from datetime import datetime
+
+from nl80211_scanner import NL80211Scanner, entry_row
+from timestamp_format import format_datetime
+
+# Per-packet and offline reports, separators included, filled with % and
+# written in one call
+PACKET_TEMPLATE = (
+    "\n🚁 ESP32-C3 PACKET #%(packet_num)d - %(rid_timestamp)s\n"
+    + "=" * 80 + "\n"
+    "📡 MAC: %(mac)s | SSID: %(ssid)s\n"
+    "⏰ RID Timestamp: %(rid_timestamp)s\n"
+    "⏱️  Runtime: %(elapsed).1fs | Packets: %(packet_num)d\n"
+    "📍 Location: Aldrich Park, Irvine, CA\n"
+    "✅ Status: ACTIVE - Real-time transmission!\n"
+    "🔍 Raw data: %(raw_line)s\n"
+    + "=" * 80 + "\n"
+)
+OFFLINE_TEMPLATE = (
+    "\n❌ ESP32-C3 OFFLINE - %(clock)s\n"
+    + "=" * 80 + "\n"
+    "📡 MAC: %(mac)s | SSID: %(ssid)s\n"
+    "⏱️  Runtime: %(elapsed).1fs | Packets: %(packet_count)d\n"
+    "📍 Location: Aldrich Park, Irvine, CA\n"
+    "❌ Status: OFFLINE - No transmission detected!\n"
+    "⏰ Time since last seen: %(since_seen).1fs\n"
+    + "=" * 80 + "\n"
+)
 
 class FinalPacketTest:
     def __init__(self):
         self.esp32_mac = "84:FC:E6:00:FC:05"
         self.esp32_ssid = "TEST-OP-12345"
         self.packet_count = 0
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
         self.esp32_online = False
         self.last_seen_time = 0
+        self.offline_period = 5  # seconds between offline status lines
+        self.next_offline_at = self.start_time + self.offline_period
+        self.scanner = None
         
     def signal_handler(self, sig, frame):
         print("\n\n🛑 Stopping final packet test...")
         sys.exit(0)
     
     def scan_wifi_networks(self):
-        """Scan for WiFi networks with fresh data"""
-        try:
-            # Force a fresh scan each time
-            subprocess.run(['nmcli', 'dev', 'wifi', 'rescan'], 
-                          capture_output=True, text=True, check=True, timeout=2)
-            
-            result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, check=True, timeout=3)
-            return result.stdout
-        except Exception as e:
-            return f"Error: {e}"
+        """Read the kernel BSS cache left by the scan that just completed"""
+        return self.scanner.get_scan_entries()
     
     def is_esp32_present(self, wifi_data):
         """Check if ESP32-C3 is actually present in current scan"""
-        if "Error" in wifi_data:
-            return False, "Scan error"
-        
-        lines = wifi_data.strip().split('\n')
-        for line in lines:
-            if self.esp32_mac in line and self.esp32_ssid in line:
-                return True, line
+        entry = wifi_data.get(self.esp32_mac)
+        if entry and entry.ssid == self.esp32_ssid:
+            return True, entry_row(entry)
         return False, "ESP32-C3 not found in current scan"
     
     def display_packet(self, packet_num, raw_line):
         """Display packet information"""
-        current_time = datetime.now()
-        rid_timestamp = current_time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        elapsed = time.time() - self.start_time
+        rid_timestamp = format_datetime()
+        elapsed = time.monotonic() - self.start_time
         
-        print(f"\n🚁 ESP32-C3 PACKET #{packet_num} - {rid_timestamp}")
-        print("=" * 80)
-        print(f"📡 MAC: {self.esp32_mac} | SSID: {self.esp32_ssid}")
-        print(f"⏰ RID Timestamp: {rid_timestamp}")
-        print(f"⏱️  Runtime: {elapsed:.1f}s | Packets: {packet_num}")
-        print(f"📍 Location: Aldrich Park, Irvine, CA")
-        print(f"✅ Status: ACTIVE - Real-time transmission!")
-        print(f"🔍 Raw data: {raw_line}")
-        print("=" * 80)
+        sys.stdout.write(PACKET_TEMPLATE % {
+            'packet_num': packet_num,
+            'rid_timestamp': rid_timestamp,
+            'mac': self.esp32_mac,
+            'ssid': self.esp32_ssid,
+            'elapsed': elapsed,
+            'raw_line': raw_line,
+        })
     
     def display_offline(self):
         """Display offline status"""
-        current_time = datetime.now()
-        elapsed = time.time() - self.start_time
-        time_since_last_seen = time.time() - self.last_seen_time if self.last_seen_time > 0 else 0
+        now = time.monotonic()
+        elapsed = now - self.start_time
+        time_since_last_seen = now - self.last_seen_time if self.last_seen_time > 0 else 0
         
-        print(f"\n❌ ESP32-C3 OFFLINE - {current_time.strftime('%H:%M:%S')}")
-        print("=" * 80)
-        print(f"📡 MAC: {self.esp32_mac} | SSID: {self.esp32_ssid}")
-        print(f"⏱️  Runtime: {elapsed:.1f}s | Packets: {self.packet_count}")
-        print(f"📍 Location: Aldrich Park, Irvine, CA")
-        print(f"❌ Status: OFFLINE - No transmission detected!")
-        print(f"⏰ Time since last seen: {time_since_last_seen:.1f}s")
-        print("=" * 80)
+        sys.stdout.write(OFFLINE_TEMPLATE % {
+            'clock': time.strftime('%H:%M:%S'),
+            'mac': self.esp32_mac,
+            'ssid': self.esp32_ssid,
+            'elapsed': elapsed,
+            'packet_count': self.packet_count,
+            'since_seen': time_since_last_seen,
+        })
     
     def run(self):
         """Run the final packet test"""
@@ -88,30 +102,57 @@ class FinalPacketTest:
         
         signal.signal(signal.SIGINT, self.signal_handler)
         
-        while True:
-            wifi_data = self.scan_wifi_networks()
-            is_present, details = self.is_esp32_present(wifi_data)
-            
-            if is_present:
-                # ESP32 is online
-                if not self.esp32_online:
-                    print(f"\n🟢 ESP32-C3 CAME ONLINE at {datetime.now().strftime('%H:%M:%S')}")
-                    self.esp32_online = True
+        try:
+            self.scanner = NL80211Scanner()
+            self.scanner.subscribe_scan_events()
+        except OSError as e:
+            print(f"❌ Error opening nl80211 socket: {e}")
+            return
+        
+        selector = selectors.DefaultSelector()
+        selector.register(self.scanner, selectors.EVENT_READ)
+        # Scan once now; after that the kernel's background scans and
+        # refresh_scan() every rescan_interval keep the BSS cache fresh
+        self.scanner.trigger_scan()
+        
+        try:
+            while True:
+                # Block until the kernel reports new scan results or the next
+                # offline status line is due
+                timeout = self.next_offline_at - time.monotonic()
+                if selector.select(timeout=timeout) and self.scanner.read_scan_event():
+                    try:
+                        wifi_data = self.scan_wifi_networks()
+                    except OSError as e:
+                        print(f"❌ Error reading scan results: {e}")
+                        continue
+                    is_present, details = self.is_esp32_present(wifi_data)
+                    
+                    if is_present:
+                        # ESP32 is online
+                        if not self.esp32_online:
+                            print(f"\n🟢 ESP32-C3 CAME ONLINE at {time.strftime('%H:%M:%S')}")
+                            self.esp32_online = True
+                        
+                        self.packet_count += 1
+                        self.last_seen_time = time.monotonic()
+                        self.display_packet(self.packet_count, details)
+                    elif self.esp32_online:
+                        # ESP32 is offline
+                        print(f"\n🔴 ESP32-C3 WENT OFFLINE at {time.strftime('%H:%M:%S')}")
+                        self.esp32_online = False
                 
-                self.packet_count += 1
-                self.last_seen_time = time.time()
-                self.display_packet(self.packet_count, details)
-            else:
-                # ESP32 is offline
-                if self.esp32_online:
-                    print(f"\n🔴 ESP32-C3 WENT OFFLINE at {datetime.now().strftime('%H:%M:%S')}")
-                    self.esp32_online = False
+                # Show offline status once per offline_period
+                now = time.monotonic()
+                if now >= self.next_offline_at:
+                    if not self.esp32_online:
+                        self.display_offline()
+                    self.next_offline_at = now + self.offline_period
                 
-                # Show offline status every 5 seconds
-                if int(time.time() - self.start_time) % 5 == 0:
-                    self.display_offline()
-            
-            time.sleep(1)
+                self.scanner.refresh_scan()
+        finally:
+            selector.close()
+            self.scanner.close()
 
 if __name__ == "__main__":
     test = FinalPacketTest()
@@ -3,120 +3,31 @@
 Final Remote ID Packet Analysis
 """
 
-import subprocess
+import sys
 import time
-import re
+
+from nmcli_output import find_matching_line, run_nmcli
+from rid_report import HEADER, NEXT_STEPS, emit_report
+
+ESP32_MAC = b'84:FC:E6:00:FC:05'
+ESP32_SSID = b'TEST-OP-12345'
 
 def analyze_rid_packets():
     """Analyze the Remote ID packets from ESP32-C3"""
-    print("🔍 ESP32-C3 Remote ID Packet Analysis")
-    print("=" * 50)
-    print()
+    sys.stdout.write(HEADER)
     
     try:
         # Get the WiFi scan results
-        result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                              capture_output=True, text=True, timeout=10)
-        
-        # Find our ESP32-C3 signal
-        esp32_line = None
-        for line in result.stdout.split('\n'):
-            if 'TEST-OP-12345' in line and '84:FC:E6:00:FC:05' in line:
-                esp32_line = line.strip()
-                break
+        result = run_nmcli('dev', 'wifi', 'list', timeout=10)
         
-        if not esp32_line:
+        # Find our ESP32-C3 signal in the raw output; only that row is decoded
+        line = find_matching_line(result.stdout, (ESP32_MAC,))
+        if line is None or ESP32_SSID not in line:
             print("❌ ESP32-C3 Remote ID signal not found")
             return False
+        esp32_line = line.decode('utf-8', 'replace').strip()
         
-        print("📡 Captured WiFi Beacon Frame:")
-        print(f"Raw data: {esp32_line}")
-        print()
-        
-        # Parse the data more carefully
-        # Format: "BSSID SSID MODE CHAN RATE SIGNAL BARS SECURITY"
-        parts = esp32_line.split()
-        
-        if len(parts) >= 8:
-            bssid = parts[1]      # 84:FC:E6:00:FC:05
-            ssid = parts[2]       # TEST-OP-12345
-            mode = parts[3]       # Infra
-            channel = parts[4]    # 6
-            rate = parts[5]       # 65
-            signal = parts[6]     # Mbit/s
-            bars = parts[7]       # 99
-            security = parts[8]   # ▂▄▆█
-            wpa2 = parts[9] if len(parts) > 9 else ""  # WPA2
-            
-            print("📊 Parsed Beacon Frame Data:")
-            print(f"  BSSID (MAC): {bssid}")
-            print(f"  SSID: {ssid}")
-            print(f"  Mode: {mode}")
-            print(f"  Channel: {channel}")
-            print(f"  Data Rate: {rate} Mbit/s")
-            print(f"  Signal Strength: {bars}%")
-            print(f"  Security: {wpa2}")
-            print()
-            
-            # Verify the data
-            print("✅ Remote ID Data Verification:")
-            print(f"  ✓ Operator ID in SSID: {ssid}")
-            print(f"  ✓ ESP32-C3 MAC: {bssid}")
-            print(f"  ✓ WiFi Channel: {channel} (2.4GHz)")
-            print(f"  ✓ Signal Strength: {bars}% (Excellent)")
-            print(f"  ✓ Security: {wpa2} (Standard for RID)")
-            print()
-            
-            # Expected RID message structure
-            print("📋 Expected Remote ID Message Content:")
-            print("┌─────────────────────────────────────────┐")
-            print("│           Remote ID Message             │")
-            print("├─────────────────────────────────────────┤")
-            print("│ Message Type: Basic ID + Location       │")
-            print("│ Basic ID: TEST-UAV-C3-001              │")
-            print("│ Operator ID: TEST-OP-12345             │")
-            print("│ Location: 33.6405°N, 117.8443°W        │")
-            print("│ Altitude: 100m MSL (50m AGL)           │")
-            print("│ Speed: 25 knots                        │")
-            print("│ Heading: Variable (square pattern)     │")
-            print("│ Timestamp: Current UTC time            │")
-            print("│ Status: Active flight                  │")
-            print("│ Emergency Status: None                 │")
-            print("└─────────────────────────────────────────┘")
-            print()
-            
-            # Technical analysis
-            print("🔬 Technical Analysis:")
-            print("  ✓ Beacon frame format: IEEE 802.11 compliant")
-            print("  ✓ SSID contains operator identification")
-            print("  ✓ BSSID matches ESP32-C3 MAC address")
-            print("  ✓ Channel 6 is appropriate for 2.4GHz")
-            print("  ✓ Signal strength indicates good transmission")
-            print("  ✓ WPA2 security follows RID standards")
-            print()
-            
-            # Compliance check
-            print("📋 ASTM F3411-19 Compliance Check:")
-            print("  ✓ Operator ID transmitted")
-            print("  ✓ UAV identification transmitted")
-            print("  ✓ Location data transmitted")
-            print("  ✓ Altitude information transmitted")
-            print("  ✓ Speed and heading transmitted")
-            print("  ✓ Timestamp transmitted")
-            print("  ✓ Emergency status transmitted")
-            print()
-            
-            print("🎯 Conclusion:")
-            print("✅ ESP32-C3 Remote ID transmission is WORKING CORRECTLY")
-            print("✅ All required data fields are being transmitted")
-            print("✅ Signal follows ASTM F3411-19 standard")
-            print("✅ Ready for detection by Remote ID scanner apps")
-            print("✅ Signal is detectable by authorized parties")
-            
-            return True
-        else:
-            print("❌ Could not parse WiFi data properly")
-            return False
+        return emit_report(esp32_line)
             
     except Exception as e:
         print(f"❌ Error analyzing packets: {e}")
@@ -127,12 +38,7 @@ def main():
     print()
     
     if analyze_rid_packets():
-        print()
-        print("🚁 Next Steps:")
-        print("1. Download a Remote ID scanner app on your phone")
-        print("2. Open the app and scan for nearby drones")
-        print("3. You should see your simulated drone with all flight data")
-        print("4. The app will display location, operator info, and flight status")
+        sys.stdout.write(NEXT_STEPS)
     else:
         print("❌ Remote ID signal not detected")
         print("Make sure ESP32-C3 is powered on and running the sketch")
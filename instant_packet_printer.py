@@ -4,86 +4,54 @@ Instant ESP32-C3 Packet Printer
 Prints packets immediately as they are received
 """
 
-import subprocess
 import time
 import signal
 import sys
-from datetime import datetime
+
+from nl80211_scanner import NL80211Scanner, entry_fields
+from timestamp_format import format_time
+
+# Per-packet report, filled with % and written in one call
+PACKET_TEMPLATE = (
+    "\n🚁 ESP32-C3 REMOTE ID PACKET RECEIVED! [%(timestamp)s]\n"
+    + "=" * 70 + "\n"
+    "📡 BSSID: %(bssid)s | SSID: %(ssid)s\n"
+    "📡 Channel: %(channel)s | Rate: %(rate)s\n"
+    "📡 Signal: %(signal)s%% | Security: %(security)s\n"
+    "📍 Location: Aldrich Park, Irvine, CA\n"
+    "✈️  Status: ACTIVE - Real-time transmission!\n"
+    "✅ Ready for Remote ID detection\n"
+    + "=" * 70 + "\n"
+)
 
 class InstantPacketPrinter:
     def __init__(self):
         self.esp32_mac = "84:FC:E6:00:FC:05"
         self.esp32_ssid = "TEST-OP-12345"
         self.running = True
+        self.scanner = None
 
     def signal_handler(self, sig, frame):
         print("\n\n🛑 Stopping instant packet printer...")
+        # Only flag the loop; it exits at its next wakeup and the finally
+        # block closes the netlink sockets
         self.running = False
-        sys.exit(0)
-
-    def scan_wifi_networks(self):
-        """Scan for WiFi networks with fresh data"""
-        try:
-            subprocess.run(['nmcli', 'dev', 'wifi', 'rescan'],
-                          capture_output=True, text=True, check=True, timeout=2)
-
-            result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'],
-                                  capture_output=True, text=True, check=True, timeout=3)
-            return result.stdout
-        except Exception as e:
-            return f"Error: {e}"
 
     def find_esp32_packet(self, wifi_data):
         """Find ESP32-C3 packet in WiFi data"""
-        if "Error" in wifi_data:
-            return None
-
-        lines = wifi_data.strip().split('\n')
-        for line in lines:
-            if self.esp32_mac in line and self.esp32_ssid in line:
-                return line
+        entry = wifi_data.get(self.esp32_mac)
+        if entry and entry.ssid == self.esp32_ssid:
+            return entry
         return None
 
-    def parse_packet_data(self, beacon_line):
-        """Parse packet data for display"""
-        if not beacon_line:
-            return None
-
-        parts = beacon_line.split()
-        if len(parts) < 9:
-            return None
-
-        # Extract key information
-        bssid = parts[0]  # 84:FC:E6:00:FC:05
-        ssid = parts[1]   # TEST-OP-12345
-        channel = parts[3]  # 6
-        rate = f"{parts[4]} {parts[5]}"  # "65 Mbit/s"
-        signal = parts[6]  # 100
-        security = parts[8] if len(parts) > 8 else 'Unknown'  # WPA2
-
-        return {
-            'bssid': bssid,
-            'ssid': ssid,
-            'channel': channel,
-            'rate': rate,
-            'signal': signal,
-            'security': security,
-            'raw_line': beacon_line
-        }
+    def parse_packet_data(self, entry):
+        """Convert the ESP32-C3 scan entry into display fields"""
+        return entry_fields(entry)
 
     def print_packet(self, packet_data):
         """Print packet information immediately"""
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
-
-        print(f"\n🚁 ESP32-C3 REMOTE ID PACKET RECEIVED! [{timestamp}]")
-        print("=" * 70)
-        print(f"📡 BSSID: {packet_data['bssid']} | SSID: {packet_data['ssid']}")
-        print(f"📡 Channel: {packet_data['channel']} | Rate: {packet_data['rate']}")
-        print(f"📡 Signal: {packet_data['signal']}% | Security: {packet_data['security']}")
-        print(f"📍 Location: Aldrich Park, Irvine, CA")
-        print(f"✈️  Status: ACTIVE - Real-time transmission!")
-        print(f"✅ Ready for Remote ID detection")
-        print("=" * 70)
+        timestamp = format_time()
+        sys.stdout.write(PACKET_TEMPLATE % dict(packet_data, timestamp=timestamp))
 
     def run(self):
         """Run the instant packet printer"""
@@ -95,24 +63,35 @@ class InstantPacketPrinter:
 
         signal.signal(signal.SIGINT, self.signal_handler)
 
-        packet_count = 0
-
-        while self.running:
-            wifi_data = self.scan_wifi_networks()
-            esp32_line = self.find_esp32_packet(wifi_data)
+        try:
+            self.scanner = NL80211Scanner()
+            self.scanner.subscribe_scan_events()
+        except OSError as e:
+            print(f"❌ Error opening nl80211 socket: {e}")
+            return
 
-            if esp32_line:
-                packet_count += 1
-                packet_data = self.parse_packet_data(esp32_line)
+        packet_count = 0
+        # Check every 500ms for immediate response, or as soon as any
+        # scan completes - including scans started by other monitors
+        scans = self.scanner.iter_scans(poll_interval=0.5)
 
-                if packet_data:
+        try:
+            for wifi_data in scans:
+                if not self.running:
+                    break
+                if wifi_data is None:
+                    print("❌ Error reading scan results")
+                    time.sleep(5)
+                    continue
+                esp32_entry = self.find_esp32_packet(wifi_data)
+
+                if esp32_entry:
+                    packet_count += 1
+                    packet_data = self.parse_packet_data(esp32_entry)
                     self.print_packet(packet_data)
-                else:
-                    print(f"\n🚁 ESP32-C3 DETECTED! [{datetime.now().strftime('%H:%M:%S')}]")
-                    print(f"   Raw: {esp32_line}")
-                    print("   ✅ Remote ID transmission active")
-
-            time.sleep(0.5)  # Check every 500ms for immediate response
+        finally:
+            scans.close()
+            self.scanner.close()
 
 if __name__ == "__main__":
     printer = InstantPacketPrinter()
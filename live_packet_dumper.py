@@ -4,20 +4,26 @@ Live ESP32-C3 Packet Dumper
 Real-time packet display with immediate feedback
 """
 
-import subprocess
+import selectors
 import time
 import signal
 import sys
-from datetime import datetime
+
+from esp32_rid_common import ESP32_CHANNEL, ESP32_MAC, ESP32_SSID, find_esp32_entry, open_esp32_scanner
+from nl80211_scanner import entry_fields
+from timestamp_format import format_time
 
 class LivePacketDumper:
     def __init__(self):
         self.running = True
-        self.esp32_mac = "84:FC:E6:00:FC:05"
-        self.esp32_ssid = "TEST-OP-12345"
+        self.esp32_mac = ESP32_MAC
+        self.esp32_ssid = ESP32_SSID
+        self.esp32_channel = ESP32_CHANNEL
         self.packet_count = 0
         self.esp32_packets = 0
         self.last_esp32_time = 0
+        self.scanner = None
+        self.selector = None
         
     def signal_handler(self, sig, frame):
         print("\n\n🛑 Stopping live packet dumper...")
@@ -25,51 +31,23 @@ class LivePacketDumper:
         sys.exit(0)
     
     def scan_wifi_networks(self):
-        """Scan for WiFi networks with immediate response"""
+        """Read the kernel BSS cache, asking for a fresh scan every rescan_interval"""
         try:
-            result = subprocess.run(['timeout', '2', 'nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, timeout=3)
-            return result.stdout if result.returncode == 0 else None
-        except:
-            return None
+            return self.scanner.get_scan_entries()
+        finally:
+            self.scanner.refresh_scan()
     
     def find_esp32_packet(self, wifi_data):
         """Find ESP32-C3 packet in WiFi data"""
-        if not wifi_data:
-            return None
-        
-        lines = wifi_data.split('\n')
-        for line in lines:
-            if self.esp32_mac in line and self.esp32_ssid in line:
-                return line.strip()
-        return None
+        return find_esp32_entry(wifi_data)
     
-    def parse_esp32_packet(self, line):
-        """Parse ESP32-C3 packet line"""
-        if not line:
-            return None
-        
-        parts = line.split()
-        if len(parts) < 8:
-            return None
-        
-        try:
-            return {
-                'bssid': parts[1],      # 84:FC:E6:00:FC:05
-                'ssid': parts[2],       # TEST-OP-12345
-                'mode': parts[3],       # Infra
-                'channel': parts[4],    # 6
-                'rate': parts[5],       # 65
-                'signal': parts[6],     # 100
-                'bars': parts[7],       # ▂▄▆█
-                'security': parts[8] if len(parts) > 8 else 'Unknown'  # WPA2
-            }
-        except:
-            return None
+    def parse_esp32_packet(self, entry):
+        """Convert the ESP32-C3 scan entry into display fields"""
+        return entry_fields(entry)
     
     def display_packet(self, packet, packet_num):
         """Display packet in compact format"""
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+        timestamp = format_time()
         
         print(f"\n🚁 ESP32-C3 PACKET #{packet_num} - {timestamp}")
         print("=" * 60)
@@ -93,33 +71,36 @@ class LivePacketDumper:
         
         while self.running:
             try:
-                # Scan WiFi networks
-                wifi_data = self.scan_wifi_networks()
+                # Sleep until a scan of our interface finishes; if none does,
+                # re-arm the pinned scan once rescan_interval has passed
+                if not self.selector.select(timeout=self.scanner.rescan_due_in()):
+                    self.scanner.refresh_scan()
+                    continue
+                if not self.scanner.read_scan_event():
+                    continue
+                
+                # Read the fresh results
+                try:
+                    wifi_data = self.scan_wifi_networks()
+                except OSError as e:
+                    print(f"❌ WiFi scan failed: {e}")
+                    wifi_data = {}
                 self.packet_count += 1
                 current_time = time.time()
                 
-                if wifi_data:
-                    # Look for ESP32-C3 packet
-                    esp32_line = self.find_esp32_packet(wifi_data)
-                    if esp32_line:
-                        self.esp32_packets += 1
-                        self.last_esp32_time = current_time
-                        consecutive_misses = 0
-                        
-                        packet = self.parse_esp32_packet(esp32_line)
-                        if packet:
-                            self.display_packet(packet, self.packet_count)
-                        else:
-                            print(f"\n🚁 ESP32-C3 DETECTED! [{datetime.now().strftime('%H:%M:%S')}]")
-                            print(f"   Raw: {esp32_line}")
-                            print("   ✅ Remote ID transmission active")
-                            print("-" * 50)
-                    else:
-                        consecutive_misses += 1
-                        if consecutive_misses % 5 == 0:
-                            print(f"⏳ Scanning... (missed {consecutive_misses} scans)")
+                # Look for ESP32-C3 packet
+                esp32_entry = self.find_esp32_packet(wifi_data)
+                if esp32_entry:
+                    self.esp32_packets += 1
+                    self.last_esp32_time = current_time
+                    consecutive_misses = 0
+                    
+                    packet = self.parse_esp32_packet(esp32_entry)
+                    self.display_packet(packet, self.packet_count)
                 else:
-                    print("❌ WiFi scan failed")
+                    consecutive_misses += 1
+                    if consecutive_misses % 5 == 0:
+                        print(f"⏳ Scanning... (missed {consecutive_misses} scans)")
                 
                 # Show status every 10 scans
                 if self.packet_count % 10 == 0:
@@ -127,8 +108,6 @@ class LivePacketDumper:
                     print(f"\n📊 Status: {self.packet_count} scans, {self.esp32_packets} ESP32 packets, "
                           f"Last ESP32: {elapsed:.1f}s ago")
                 
-                time.sleep(0.5)  # Scan every 500ms for faster response
-                
             except KeyboardInterrupt:
                 break
             except Exception as e:
@@ -139,11 +118,23 @@ class LivePacketDumper:
         """Run the packet dumper"""
         signal.signal(signal.SIGINT, self.signal_handler)
         
+        try:
+            # Passive scans of only the ESP32's channel, re-armed 0.5 s after each one completes
+            self.scanner = open_esp32_scanner((self.esp32_channel,))
+        except OSError as e:
+            print(f"❌ Error opening nl80211 socket: {e}")
+            return
+        
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.scanner, selectors.EVENT_READ)
+        
         try:
             self.monitor()
         except KeyboardInterrupt:
             pass
         finally:
+            self.selector.close()
+            self.scanner.close()
             print(f"\n📊 Final Statistics:")
             print(f"   Total scans: {self.packet_count}")
             print(f"   ESP32-C3 packets: {self.esp32_packets}")
@@ -0,0 +1,414 @@
+#!/usr/bin/env python3
+"""
+nl80211 WiFi Scanner
+Reads BSS scan results straight from the kernel over generic netlink
+instead of forking nmcli for every scan
+"""
+
+import errno
+import os
+import selectors
+import socket
+import struct
+import time
+from collections import namedtuple
+
+# Netlink / generic netlink constants
+NETLINK_GENERIC = 16
+SOL_NETLINK = 270
+NETLINK_ADD_MEMBERSHIP = 1
+NLM_F_REQUEST = 0x1
+NLM_F_ACK = 0x4
+NLM_F_DUMP = 0x300
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+GENL_ID_CTRL = 0x10
+CTRL_CMD_GETFAMILY = 3
+CTRL_ATTR_FAMILY_ID = 1
+CTRL_ATTR_FAMILY_NAME = 2
+CTRL_ATTR_MCAST_GROUPS = 7
+CTRL_ATTR_MCAST_GRP_NAME = 1
+CTRL_ATTR_MCAST_GRP_ID = 2
+
+# nl80211 constants (include/uapi/linux/nl80211.h)
+NL80211_CMD_GET_SCAN = 32
+NL80211_CMD_TRIGGER_SCAN = 33
+NL80211_CMD_NEW_SCAN_RESULTS = 34
+NL80211_CMD_SCAN_ABORTED = 35
+NL80211_ATTR_IFINDEX = 3
+NL80211_ATTR_SCAN_FREQUENCIES = 44
+NL80211_ATTR_BSS = 47
+NL80211_ATTR_SCAN_FLAGS = 158
+NL80211_ATTR_MEASUREMENT_DURATION = 235
+NL80211_SCAN_FLAG_FLUSH = 1 << 1
+NL80211_BSS_BSSID = 1
+NL80211_BSS_FREQUENCY = 2
+NL80211_BSS_CAPABILITY = 5
+NL80211_BSS_INFORMATION_ELEMENTS = 6
+NL80211_BSS_SIGNAL_MBM = 7
+NL80211_BSS_SEEN_MS_AGO = 10
+
+# 802.11 capability bits and information element ids
+WLAN_CAPABILITY_ESS = 0x0001
+WLAN_CAPABILITY_PRIVACY = 0x0010
+WLAN_EID_SSID = 0
+WLAN_EID_SUPP_RATES = 1
+WLAN_EID_RSN = 48
+WLAN_EID_EXT_SUPP_RATES = 50
+WLAN_EID_VENDOR_SPECIFIC = 221
+WPA_OUI_TYPE = b"\x00\x50\xf2\x01"
+
+NLMSGHDR = struct.Struct("=IHHII")
+GENLMSGHDR = struct.Struct("=BBH")
+NLATTR = struct.Struct("=HH")
+RECV_SIZE = 1 << 16
+
+# Seconds between active scans from refresh_scan(); RID_NO_RESCAN=1 leaves
+# scanning to NetworkManager and only ever reads the cache
+RESCAN_INTERVAL = None if os.getenv("RID_NO_RESCAN") else 10
+
+# One BSS from a scan dump; signal_mbm is dBm * 100, ies the raw element blob,
+# seen_ms_ago how long before the dump the kernel last received a frame from it
+ScanEntry = namedtuple("ScanEntry", "bssid ssid frequency signal_mbm capability ies seen_ms_ago", defaults=(0,))
+
+
+def find_wireless_interface():
+    """Return the first interface that exposes a wireless phy"""
+    for ifname in sorted(os.listdir("/sys/class/net")):
+        if os.path.exists(f"/sys/class/net/{ifname}/phy80211"):
+            return ifname
+    return None
+
+
+def parse_attrs(data, offset=0, end=None):
+    """Parse netlink attributes into a {type: payload} dict"""
+    attrs = {}
+    end = len(data) if end is None else end
+    while offset + NLATTR.size <= end:
+        nla_len, nla_type = NLATTR.unpack_from(data, offset)
+        if nla_len < NLATTR.size:
+            break
+        attrs[nla_type & 0x3FFF] = data[offset + NLATTR.size:offset + nla_len]
+        offset += (nla_len + 3) & ~3
+    return attrs
+
+
+def pack_attr(nla_type, payload):
+    """Pack a single netlink attribute, padded to 4 bytes"""
+    nla_len = NLATTR.size + len(payload)
+    padding = b"\0" * (((nla_len + 3) & ~3) - nla_len)
+    return NLATTR.pack(nla_len, nla_type) + payload + padding
+
+
+def iter_ies(ies):
+    """Yield (element id, payload) pairs from raw information elements"""
+    offset = 0
+    while offset + 2 <= len(ies):
+        ie_id, ie_len = ies[offset], ies[offset + 1]
+        yield ie_id, ies[offset + 2:offset + 2 + ie_len]
+        offset += 2 + ie_len
+
+
+def ssid_from_ies(ies):
+    """Extract the SSID element (id 0) from raw information elements"""
+    for ie_id, payload in iter_ies(ies):
+        if ie_id == WLAN_EID_SSID:
+            return payload.decode("utf-8", "replace")
+    return ""
+
+
+def frequency_from_channel(channel):
+    """Map a 2.4/5 GHz channel number to its centre frequency in MHz"""
+    if channel == 14:
+        return 2484
+    if channel < 14:
+        return 2407 + channel * 5
+    return 5000 + channel * 5
+
+
+def channel_from_frequency(freq):
+    """Map a centre frequency in MHz to its 2.4/5 GHz channel number"""
+    if freq == 2484:
+        return 14
+    if freq < 2484:
+        return (freq - 2407) // 5
+    return (freq - 5000) // 5
+
+
+def signal_quality(signal_mbm):
+    """Signal percentage the way NetworkManager derives it from dBm"""
+    dbm = min(max(signal_mbm // 100, -100), -40)
+    return 100 - (100 * (-40 - dbm)) // 60
+
+
+def signal_bars(quality):
+    """nmcli's four-bar rendering of a signal percentage"""
+    if quality > 80:
+        return "▂▄▆█"
+    if quality > 55:
+        return "▂▄▆_"
+    if quality > 30:
+        return "▂▄__"
+    if quality > 5:
+        return "▂___"
+    return "____"
+
+
+def max_rate_from_ies(ies):
+    """Highest legacy rate in Mbit/s from the (extended) supported rates elements"""
+    rate = 0
+    for ie_id, payload in iter_ies(ies):
+        if ie_id in (WLAN_EID_SUPP_RATES, WLAN_EID_EXT_SUPP_RATES):
+            for value in payload:
+                rate = max(rate, (value & 0x7F) // 2)
+    return rate
+
+
+def security_from_ies(capability, ies):
+    """Summarise the advertised security like nmcli's SECURITY column"""
+    modes = []
+    for ie_id, payload in iter_ies(ies):
+        if ie_id == WLAN_EID_VENDOR_SPECIFIC and payload[:4] == WPA_OUI_TYPE:
+            modes.insert(0, "WPA1")
+        elif ie_id == WLAN_EID_RSN:
+            modes.append("WPA2")
+    if modes:
+        return " ".join(modes)
+    return "WEP" if capability & WLAN_CAPABILITY_PRIVACY else "--"
+
+
+def entry_fields(entry):
+    """Render a ScanEntry as the nmcli 'dev wifi list' columns"""
+    quality = signal_quality(entry.signal_mbm)
+    return {
+        'bssid': entry.bssid,
+        'ssid': entry.ssid or "Hidden",
+        'mode': "Infra" if entry.capability & WLAN_CAPABILITY_ESS else "Ad-Hoc",
+        'channel': str(channel_from_frequency(entry.frequency)),
+        'rate': f"{max_rate_from_ies(entry.ies)} Mbit/s",
+        'signal': str(quality),
+        'bars': signal_bars(quality),
+        'security': security_from_ies(entry.capability, entry.ies),
+    }
+
+
+def entry_row(entry):
+    """Render a ScanEntry as one nmcli 'dev wifi list' row, columns in nmcli order"""
+    return "  ".join(entry_fields(entry).values())
+
+
+def same_beacon(entry, other):
+    """True if two ScanEntry values hold the same cached beacon; seen_ms_ago is
+    recomputed by the kernel on every dump, so it is left out of the comparison"""
+    return other is not None and entry[:-1] == other[:-1]
+
+
+class NL80211Scanner:
+    """Long-lived nl80211 socket that dumps and triggers WiFi scans"""
+
+    def __init__(self, ifname=None, rescan_interval=RESCAN_INTERVAL, scan_freqs=None, dwell_tu=None):
+        self.ifname = ifname or find_wireless_interface()
+        if not self.ifname:
+            raise OSError("no wireless interface found")
+        self.ifindex = socket.if_nametoindex(self.ifname)
+        self.seq = 0
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_GENERIC)
+        self.sock.bind((0, 0))
+        self.family_id, self.mcast_groups = self._resolve_family("nl80211")
+        self.event_sock = None
+        self.rescan_interval = rescan_interval
+        self.scan_freqs = scan_freqs  # MHz; None scans every channel the phy supports
+        self.dwell_tu = dwell_tu  # per-channel dwell in TUs (1.024 ms); dropped if the driver rejects it
+        self.last_scan = float("-inf")  # monotonic time of the last scan we saw or started
+
+    def close(self):
+        self.sock.close()
+        if self.event_sock:
+            self.event_sock.close()
+
+    def fileno(self):
+        """Event socket fd, readable when a scan finishes (for selectors)"""
+        return self.event_sock.fileno()
+
+    def subscribe_scan_events(self):
+        """Join the nl80211 "scan" multicast group on a separate socket"""
+        self.event_sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_GENERIC)
+        self.event_sock.bind((0, 0))
+        self.event_sock.setsockopt(SOL_NETLINK, NETLINK_ADD_MEMBERSHIP, self.mcast_groups["scan"])
+
+    def read_scan_event(self):
+        """Read one event datagram; True if a scan on our interface finished"""
+        data = self.event_sock.recv(RECV_SIZE)
+        finished = False
+        offset = 0
+        while offset + NLMSGHDR.size + GENLMSGHDR.size <= len(data):
+            msg_len = NLMSGHDR.unpack_from(data, offset)[0]
+            if msg_len < NLMSGHDR.size:
+                break
+            cmd = data[offset + NLMSGHDR.size]
+            if cmd in (NL80211_CMD_NEW_SCAN_RESULTS, NL80211_CMD_SCAN_ABORTED):
+                attrs = parse_attrs(data, offset + NLMSGHDR.size + GENLMSGHDR.size, offset + msg_len)
+                ifindex = attrs.get(NL80211_ATTR_IFINDEX)
+                if ifindex and struct.unpack("=I", ifindex)[0] == self.ifindex:
+                    finished = True
+            offset += (msg_len + 3) & ~3
+        if finished:
+            self.last_scan = time.monotonic()
+        return finished
+
+    def _send(self, msg_type, flags, cmd, payload=b""):
+        self.seq += 1
+        body = GENLMSGHDR.pack(cmd, 1, 0) + payload
+        header = NLMSGHDR.pack(NLMSGHDR.size + len(body), msg_type, flags, self.seq, 0)
+        self.sock.send(header + body)
+        return self.seq
+
+    def _recv_messages(self, seq):
+        """Yield generic netlink payloads for a request until it completes"""
+        while True:
+            data = self.sock.recv(RECV_SIZE)
+            offset = 0
+            while offset + NLMSGHDR.size <= len(data):
+                msg_len, msg_type, _, msg_seq, _ = NLMSGHDR.unpack_from(data, offset)
+                if msg_len < NLMSGHDR.size:
+                    return
+                if msg_seq == seq:
+                    if msg_type == NLMSG_DONE:
+                        return
+                    if msg_type == NLMSG_ERROR:
+                        error = struct.unpack_from("=i", data, offset + NLMSGHDR.size)[0]
+                        if error:
+                            raise OSError(-error, os.strerror(-error))
+                        return
+                    yield data[offset + NLMSGHDR.size + GENLMSGHDR.size:offset + msg_len]
+                offset += (msg_len + 3) & ~3
+
+    def _resolve_family(self, name):
+        payload = pack_attr(CTRL_ATTR_FAMILY_NAME, name.encode() + b"\0")
+        seq = self._send(GENL_ID_CTRL, NLM_F_REQUEST | NLM_F_ACK, CTRL_CMD_GETFAMILY, payload)
+        family_id = None
+        groups = {}
+        for msg in self._recv_messages(seq):
+            attrs = parse_attrs(msg)
+            family_id = struct.unpack("=H", attrs[CTRL_ATTR_FAMILY_ID][:2])[0]
+            for group in parse_attrs(attrs.get(CTRL_ATTR_MCAST_GROUPS, b"")).values():
+                group_attrs = parse_attrs(group)
+                group_name = group_attrs[CTRL_ATTR_MCAST_GRP_NAME].rstrip(b"\0").decode()
+                groups[group_name] = struct.unpack("=I", group_attrs[CTRL_ATTR_MCAST_GRP_ID])[0]
+        if family_id is None:
+            raise OSError(f"{name} generic netlink family not available")
+        return family_id, groups
+
+    def trigger_scan(self, flush=False):
+        """Ask the driver for a fresh scan; returns False if it was refused
+
+        No NL80211_ATTR_SCAN_SSIDS is sent, so the scan is passive: the radio
+        only listens for beacons and never transmits probe requests.
+        """
+        payload = pack_attr(NL80211_ATTR_IFINDEX, struct.pack("=I", self.ifindex))
+        if self.scan_freqs:
+            freqs = b"".join(pack_attr(i, struct.pack("=I", freq)) for i, freq in enumerate(self.scan_freqs))
+            payload += pack_attr(NL80211_ATTR_SCAN_FREQUENCIES, freqs)
+        if self.dwell_tu:
+            payload += pack_attr(NL80211_ATTR_MEASUREMENT_DURATION, struct.pack("=H", self.dwell_tu))
+        if flush:
+            payload += pack_attr(NL80211_ATTR_SCAN_FLAGS, struct.pack("=I", NL80211_SCAN_FLAG_FLUSH))
+        try:
+            seq = self._send(self.family_id, NLM_F_REQUEST | NLM_F_ACK, NL80211_CMD_TRIGGER_SCAN, payload)
+            for _ in self._recv_messages(seq):
+                pass
+        except OSError as e:
+            if e.errno == errno.EOPNOTSUPP and self.dwell_tu:
+                # Drivers without NL80211_EXT_FEATURE_SET_SCAN_DWELL refuse the
+                # whole scan; retry with their default dwell from now on
+                self.dwell_tu = None
+                return self.trigger_scan(flush)
+            # EBUSY (scan already running) or EPERM (not root) - use cached results
+            return False
+        return True
+
+    def _dump_bss(self):
+        """Yield the attribute dict of every BSS in the kernel's scan cache"""
+        payload = pack_attr(NL80211_ATTR_IFINDEX, struct.pack("=I", self.ifindex))
+        seq = self._send(self.family_id, NLM_F_REQUEST | NLM_F_DUMP, NL80211_CMD_GET_SCAN, payload)
+        for msg in self._recv_messages(seq):
+            bss = parse_attrs(parse_attrs(msg).get(NL80211_ATTR_BSS, b""))
+            if NL80211_BSS_BSSID in bss:
+                yield bss
+
+    def refresh_scan(self):
+        """Trigger a scan unless any scan of this interface finished within rescan_interval
+
+        Scans started by other processes (or NetworkManager) count too when
+        subscribed to scan events, so several readers share one scan cadence.
+        """
+        if self.rescan_interval is None:
+            return False
+        now = time.monotonic()
+        if now - self.last_scan < self.rescan_interval:
+            return False
+        self.last_scan = now
+        return self.trigger_scan()
+
+    def rescan_due_in(self):
+        """Seconds until refresh_scan() would trigger again, or None if rescanning is off"""
+        if self.rescan_interval is None:
+            return None
+        return max(self.last_scan + self.rescan_interval - time.monotonic(), 0)
+
+    def iter_scans(self, poll_interval=1):
+        """Yield the {BSSID: ScanEntry} cache every poll_interval seconds, or as
+        soon as a scan of this interface finishes; None when the dump fails
+
+        Needs subscribe_scan_events().  Owns the rescan cadence: after every
+        dump refresh_scan() re-arms a scan once rescan_interval has passed.
+        """
+        selector = selectors.DefaultSelector()
+        selector.register(self, selectors.EVENT_READ)
+        next_poll = time.monotonic() + poll_interval
+        try:
+            while True:
+                try:
+                    entries = self.get_scan_entries()
+                except OSError:
+                    entries = None
+                finally:
+                    self.refresh_scan()
+                yield entries
+
+                # Wait for the next poll; only a finished scan of this interface
+                # ends the wait early, not scan starts or other interfaces' events
+                while True:
+                    timeout = next_poll - time.monotonic()
+                    if timeout <= 0:
+                        next_poll += poll_interval
+                        # After an overrun, skip the missed ticks rather than bursting
+                        now = time.monotonic()
+                        if next_poll <= now:
+                            next_poll = now + poll_interval
+                        break
+                    if selector.select(timeout=timeout) and self.read_scan_event():
+                        break
+        finally:
+            selector.close()
+
+    def get_scan_results(self):
+        """Dump the kernel's BSS cache as a {BSSID: SSID} dict"""
+        networks = {}
+        for bss in self._dump_bss():
+            bssid = bss[NL80211_BSS_BSSID].hex(":").upper()
+            networks[bssid] = ssid_from_ies(bss.get(NL80211_BSS_INFORMATION_ELEMENTS, b""))
+        return networks
+
+    def get_scan_entries(self):
+        """Dump the kernel's BSS cache as a {BSSID: ScanEntry} dict"""
+        networks = {}
+        for bss in self._dump_bss():
+            bssid = bss[NL80211_BSS_BSSID].hex(":").upper()
+            ies = bss.get(NL80211_BSS_INFORMATION_ELEMENTS, b"")
+            frequency = struct.unpack("=I", bss[NL80211_BSS_FREQUENCY])[0] if NL80211_BSS_FREQUENCY in bss else 0
+            signal_mbm = struct.unpack("=i", bss[NL80211_BSS_SIGNAL_MBM])[0] if NL80211_BSS_SIGNAL_MBM in bss else -10000
+            capability = struct.unpack("=H", bss[NL80211_BSS_CAPABILITY])[0] if NL80211_BSS_CAPABILITY in bss else 0
+            seen_ms_ago = struct.unpack("=I", bss[NL80211_BSS_SEEN_MS_AGO])[0] if NL80211_BSS_SEEN_MS_AGO in bss else 0
+            networks[bssid] = ScanEntry(bssid, ssid_from_ies(ies), frequency, signal_mbm, capability, ies, seen_ms_ago)
+        return networks
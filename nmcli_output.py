@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+nmcli Output Helpers
+Launching nmcli and single-pass scanning of its raw output kept as bytes
+"""
+
+import functools
+import re
+import shutil
+import subprocess
+
+# Absolute path resolved once: subprocess only takes the posix_spawn (vfork)
+# fast path for a path with a directory and close_fds=False
+NMCLI = shutil.which('nmcli') or 'nmcli'
+
+# One `nmcli -t` field: anything but an unescaped colon, then a separator or EOL
+TERSE_FIELD_RE = re.compile(rb'((?:[^\\:]|\\.)*)(:|$)')
+TERSE_UNESCAPE_RE = re.compile(rb'\\(.)')
+# One `nmcli dev wifi list` table row:
+#   [*] BSSID SSID MODE CHAN RATE UNIT SIGNAL BARS SECURITY
+# SSID and SECURITY may contain spaces, so they are matched lazily
+LIST_ROW_RE = re.compile(
+    r'^\s*\*?\s*([0-9A-Fa-f:]{17})\s+(.*?)\s+(\S+)\s+(\d+)\s+(\d+)\s+(\S+)\s+(\d+)\s+(\S+)\s+(.*?)\s*$'
+)
+# The same row, found anywhere in a whole multi-line listing with finditer;
+# separators are [ \t] so that no field can run on into the next row
+LIST_ROWS_RE = re.compile(
+    r'^[ \t]*\*?[ \t]*(?P<bssid>[0-9A-Fa-f:]{17})[ \t]+(?P<ssid>.*?)[ \t]+(?P<mode>\S+)[ \t]+'
+    r'(?P<channel>\d+)[ \t]+(?P<rate>\d+[ \t]+\S+)[ \t]+(?P<signal>\d+)[ \t]+(?P<bars>\S+)[ \t]+'
+    r'(?P<security>.*?)[ \t]*$',
+    re.MULTILINE,
+)
+
+
+def run_nmcli(*args, timeout, **kwargs):
+    """Run nmcli with the given arguments, capturing raw bytes output unless text=True"""
+    return subprocess.run([NMCLI, *args], capture_output=True, timeout=timeout, close_fds=False, **kwargs)
+
+
+@functools.lru_cache(maxsize=None)
+def needle_pattern(needles):
+    """Compile a tuple of byte needles into one alternation, once per tuple"""
+    return re.compile(b"|".join(re.escape(needle) for needle in needles))
+
+
+def iter_matching_lines(blob, needles):
+    """Yield each line of blob that contains any of the byte needles"""
+    pattern = needle_pattern(tuple(needles))
+    pos = 0
+    while True:
+        # One left-to-right pass finds the earliest needle of any kind
+        match = pattern.search(blob, pos)
+        if not match:
+            return
+        hit = match.start()
+        start = blob.rfind(b"\n", 0, hit) + 1
+        end = blob.find(b"\n", hit)
+        if end == -1:
+            end = len(blob)
+        yield blob[start:end]
+        pos = end + 1
+
+
+def find_matching_line(blob, needles):
+    """Return the first line of blob containing any of the byte needles, or None"""
+    return next(iter_matching_lines(blob, needles), None)
+
+
+def iter_list_rows(output):
+    """Yield a field dict for every `nmcli dev wifi list` row in the whole output"""
+    for match in LIST_ROWS_RE.finditer(output):
+        yield match.groupdict()
+
+
+def split_terse_fields(line):
+    """Split a `nmcli -t` bytes line on unescaped colons into unescaped str fields"""
+    fields = []
+    for match in TERSE_FIELD_RE.finditer(line):
+        fields.append(TERSE_UNESCAPE_RE.sub(rb'\1', match.group(1)).decode('utf-8', 'replace'))
+        if not match.group(2):
+            break
+    return fields
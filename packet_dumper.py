@@ -4,158 +4,137 @@ WiFi Packet Dumper
 Dumps each WiFi packet in detailed human-readable format
 """
 
-import subprocess
 import time
 import signal
 import sys
 import json
-from datetime import datetime
+from esp32_rid_common import ESP32_MAC, ESP32_SSID
+from nl80211_scanner import NL80211Scanner, entry_fields, entry_row
+from timestamp_format import format_datetime, format_time
+
+# dump_packet report pieces, filled with % and written in one call
+PACKET_HEADER = (
+    "\n" + "=" * 80 + "\n"
+    "📦 PACKET #%(packet_num)d - %(timestamp)s\n"
+    + "=" * 80 + "\n"
+)
+BASIC_INFO = (
+    "📡 Basic Information:\n"
+    "   • MAC Address (BSSID): %(bssid)s\n"
+    "   • Network Name (SSID): %(ssid)s\n"
+    "   • Mode: %(mode)s\n"
+    "   • Channel: %(channel)s\n"
+    "   • Data Rate: %(rate)s\n"
+    "   • Signal Strength: %(signal)s%%\n"
+    "   • Signal Bars: %(bars)s\n"
+    "   • Security: %(security)s\n"
+)
+PACKET_FOOTER = (
+    "\n⏰ Packet Timing:\n"
+    "   • Capture Time: %(timestamp)s\n"
+    "   • Packet Number: %(packet_num)d\n"
+    "   • Total ESP32 Packets: %(esp32_packets)d\n"
+    + "=" * 80 + "\n"
+)
+ESP32_PACKET_TEMPLATE = (
+    PACKET_HEADER
+    + "🚁 ESP32-C3 REMOTE ID PACKET\n"
+    + "=" * 50 + "\n"
+    + BASIC_INFO
+    + "\n📋 Remote ID Analysis:\n"
+    "   • Operator ID: %(ssid)s\n"
+    "   • UAV MAC: %(bssid)s\n"
+    "   • WiFi Channel: %(channel)s (2.4GHz)\n"
+    "   • Signal Quality: %(signal)s%% (Excellent)\n"
+    "   • Security Protocol: %(security)s (RID Standard)\n"
+    "\n📊 Flight Data (Simulated):\n"
+    "   • UAV ID: TEST-UAV-C3-001\n"
+    "   • Location: Aldrich Park, Irvine, CA\n"
+    "   • Coordinates: 33.6405°N, 117.8443°W\n"
+    "   • Altitude: 100m MSL (50m AGL)\n"
+    "   • Speed: 25 knots\n"
+    "   • Heading: Variable (square pattern)\n"
+    "   • Flight Status: Active simulation\n"
+    "   • Emergency Status: None\n"
+    "\n🔍 Technical Details:\n"
+    "   • Packet Type: WiFi Beacon Frame\n"
+    "   • Protocol: IEEE 802.11\n"
+    "   • Frequency Band: 2.4GHz\n"
+    "   • Channel Width: 20MHz\n"
+    "   • Modulation: OFDM\n"
+    "   • Encryption: WPA2\n"
+    "\n✅ Compliance Check:\n"
+    "   • ASTM F3411-19: COMPLIANT\n"
+    "   • Operator ID: TRANSMITTED\n"
+    "   • Location Data: TRANSMITTED\n"
+    "   • Altitude Data: TRANSMITTED\n"
+    "   • Speed Data: TRANSMITTED\n"
+    "   • Timestamp: TRANSMITTED\n"
+    "   • Emergency Status: TRANSMITTED\n"
+    "\n🎯 Detection Status:\n"
+    "   • Remote ID Scanner: DETECTABLE\n"
+    "   • WiFi Analyzer: DETECTABLE\n"
+    "   • Packet Sniffer: DETECTABLE\n"
+    "   • Aviation Authority: DETECTABLE\n"
+    + PACKET_FOOTER
+)
+NETWORK_PACKET_TEMPLATE = (
+    PACKET_HEADER
+    + "📡 WiFi NETWORK PACKET\n"
+    + "=" * 30 + "\n"
+    + BASIC_INFO
+    + "\n📊 Network Analysis:\n"
+    "   • Network Type: %(mode)s\n"
+    "   • Channel: %(channel)s (2.4GHz)\n"
+    "   • Signal Quality: %(signal)s%%\n"
+    "   • Security: %(security)s\n"
+    "   • Data Rate: %(rate)s\n"
+    + PACKET_FOOTER
+)
 
 class PacketDumper:
     def __init__(self):
         self.running = True
-        self.esp32_mac = "84:FC:E6:00:FC:05"
-        self.esp32_ssid = "TEST-OP-12345"
+        self.esp32_mac = ESP32_MAC
+        self.esp32_ssid = ESP32_SSID
         self.packet_count = 0
         self.esp32_packets = 0
+        self.scanner = None
         
     def signal_handler(self, sig, frame):
         print("\n\n🛑 Stopping packet dumper...")
         self.running = False
         sys.exit(0)
     
-    def scan_wifi_networks(self):
-        """Scan for WiFi networks"""
-        try:
-            result = subprocess.run(['timeout', '3', 'nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, timeout=5)
-            return result.stdout if result.returncode == 0 else None
-        except:
-            return None
+    def parse_network_line(self, entry):
+        """Convert a scan entry into nmcli-style display fields"""
+        return entry_fields(entry)
     
-    def parse_network_line(self, line):
-        """Parse a WiFi network line"""
-        if not line or not line.strip():
-            return None
-        if 'BSSID' in line or '--' in line or not line.startswith(' '):
-            return None
-            
-        parts = line.split()
-        if len(parts) < 8:
-            return None
-            
-        try:
-            return {
-                'bssid': parts[1],
-                'ssid': parts[2],
-                'mode': parts[3],
-                'channel': parts[4],
-                'rate': parts[5],
-                'signal': parts[6],
-                'bars': parts[7],
-                'security': parts[8] if len(parts) > 8 else 'Unknown'
-            }
-        except:
-            return None
-    
-    def is_esp32_network(self, network):
-        """Check if this is our ESP32-C3 network"""
-        if not network:
-            return False
-        return (network['bssid'] == self.esp32_mac or 
-                self.esp32_ssid in network['ssid'])
+    def is_esp32_network(self, entry):
+        """Check if this scan entry is our ESP32-C3 network"""
+        return entry.bssid == self.esp32_mac or self.esp32_ssid in entry.ssid
     
     def dump_packet(self, network, packet_num, is_esp32=False):
         """Dump packet in detailed human-readable format"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-        
-        print(f"\n{'='*80}")
-        print(f"📦 PACKET #{packet_num} - {timestamp}")
-        print(f"{'='*80}")
-        
-        if is_esp32:
-            print("🚁 ESP32-C3 REMOTE ID PACKET")
-            print("=" * 50)
-        else:
-            print("📡 WiFi NETWORK PACKET")
-            print("=" * 30)
-        
-        print(f"📡 Basic Information:")
-        print(f"   • MAC Address (BSSID): {network['bssid']}")
-        print(f"   • Network Name (SSID): {network['ssid']}")
-        print(f"   • Mode: {network['mode']}")
-        print(f"   • Channel: {network['channel']}")
-        print(f"   • Data Rate: {network['rate']}")
-        print(f"   • Signal Strength: {network['signal']}%")
-        print(f"   • Signal Bars: {network['bars']}")
-        print(f"   • Security: {network['security']}")
-        
-        if is_esp32:
-            print(f"\n📋 Remote ID Analysis:")
-            print(f"   • Operator ID: {network['ssid']}")
-            print(f"   • UAV MAC: {network['bssid']}")
-            print(f"   • WiFi Channel: {network['channel']} (2.4GHz)")
-            print(f"   • Signal Quality: {network['signal']}% (Excellent)")
-            print(f"   • Security Protocol: {network['security']} (RID Standard)")
-            
-            print(f"\n📊 Flight Data (Simulated):")
-            print(f"   • UAV ID: TEST-UAV-C3-001")
-            print(f"   • Location: Aldrich Park, Irvine, CA")
-            print(f"   • Coordinates: 33.6405°N, 117.8443°W")
-            print(f"   • Altitude: 100m MSL (50m AGL)")
-            print(f"   • Speed: 25 knots")
-            print(f"   • Heading: Variable (square pattern)")
-            print(f"   • Flight Status: Active simulation")
-            print(f"   • Emergency Status: None")
-            
-            print(f"\n🔍 Technical Details:")
-            print(f"   • Packet Type: WiFi Beacon Frame")
-            print(f"   • Protocol: IEEE 802.11")
-            print(f"   • Frequency Band: 2.4GHz")
-            print(f"   • Channel Width: 20MHz")
-            print(f"   • Modulation: OFDM")
-            print(f"   • Encryption: WPA2")
-            
-            print(f"\n✅ Compliance Check:")
-            print(f"   • ASTM F3411-19: COMPLIANT")
-            print(f"   • Operator ID: TRANSMITTED")
-            print(f"   • Location Data: TRANSMITTED")
-            print(f"   • Altitude Data: TRANSMITTED")
-            print(f"   • Speed Data: TRANSMITTED")
-            print(f"   • Timestamp: TRANSMITTED")
-            print(f"   • Emergency Status: TRANSMITTED")
-            
-            print(f"\n🎯 Detection Status:")
-            print(f"   • Remote ID Scanner: DETECTABLE")
-            print(f"   • WiFi Analyzer: DETECTABLE")
-            print(f"   • Packet Sniffer: DETECTABLE")
-            print(f"   • Aviation Authority: DETECTABLE")
-        else:
-            print(f"\n📊 Network Analysis:")
-            print(f"   • Network Type: {network['mode']}")
-            print(f"   • Channel: {network['channel']} (2.4GHz)")
-            print(f"   • Signal Quality: {network['signal']}%")
-            print(f"   • Security: {network['security']}")
-            print(f"   • Data Rate: {network['rate']}")
-        
-        print(f"\n⏰ Packet Timing:")
-        print(f"   • Capture Time: {timestamp}")
-        print(f"   • Packet Number: {packet_num}")
-        print(f"   • Total ESP32 Packets: {self.esp32_packets}")
-        
-        print(f"{'='*80}")
+        template = ESP32_PACKET_TEMPLATE if is_esp32 else NETWORK_PACKET_TEMPLATE
+        sys.stdout.write(template % dict(
+            network,
+            timestamp=format_datetime(),
+            packet_num=packet_num,
+            esp32_packets=self.esp32_packets,
+        ))
     
     def dump_raw_packet(self, line, packet_num):
         """Dump raw packet data"""
-        timestamp = datetime.now().strftime("%H:%M:%S.%f")[:-3]
+        timestamp = format_time()
         
         print(f"\n📦 RAW PACKET #{packet_num} - {timestamp}")
         print("-" * 60)
         print(f"Raw Data: {line.strip()}")
         print("-" * 60)
     
-    def monitor(self):
-        """Main monitoring loop"""
+    def monitor(self, scan_source):
+        """Main monitoring loop, one pass per scan the source yields"""
         print("🔍 WiFi Packet Dumper")
         print("=" * 50)
         print("Dumping each WiFi packet in human-readable format...")
@@ -163,35 +142,34 @@ class PacketDumper:
         print("=" * 50)
         print()
         
-        while self.running:
+        for wifi_data in scan_source:
+            if not self.running:
+                break
+            if wifi_data is None:
+                print("❌ Error reading scan results")
+                time.sleep(2)
+                continue
             try:
-                # Scan WiFi networks
-                wifi_data = self.scan_wifi_networks()
                 self.packet_count += 1
                 
-                if wifi_data:
-                    lines = wifi_data.split('\n')
+                for entry in wifi_data.values():
+                    # Checked on the raw ScanEntry; no display fields needed to decide
+                    is_esp32 = self.is_esp32_network(entry)
+                    network = self.parse_network_line(entry)
+                    
+                    if is_esp32:
+                        self.esp32_packets += 1
+                    
+                    # Dump every packet
+                    self.dump_packet(network, self.packet_count, is_esp32)
                     
-                    for line in lines:
-                        network = self.parse_network_line(line)
-                        if network:
-                            is_esp32 = self.is_esp32_network(network)
-                            
-                            if is_esp32:
-                                self.esp32_packets += 1
-                            
-                            # Dump every packet
-                            self.dump_packet(network, self.packet_count, is_esp32)
-                            
-                            # Also dump raw data
-                            self.dump_raw_packet(line, self.packet_count)
+                    # Also dump raw data
+                    self.dump_raw_packet(entry_row(entry), self.packet_count)
                 
                 # Show summary every 10 packets
                 if self.packet_count % 10 == 0:
                     print(f"\n📊 SUMMARY: {self.packet_count} packets, {self.esp32_packets} ESP32 packets")
                 
-                time.sleep(2)  # Wait 2 seconds between scans
-                
             except KeyboardInterrupt:
                 break
             except Exception as e:
@@ -203,10 +181,23 @@ class PacketDumper:
         signal.signal(signal.SIGINT, self.signal_handler)
         
         try:
-            self.monitor()
+            self.scanner = NL80211Scanner()
+            self.scanner.subscribe_scan_events()
+        except OSError as e:
+            print(f"❌ Error opening nl80211 socket: {e}")
+            return
+        
+        # Dump the cache every 2 seconds, or as soon as a scan of our
+        # interface finishes
+        scans = self.scanner.iter_scans(poll_interval=2)
+        
+        try:
+            self.monitor(scans)
         except KeyboardInterrupt:
             pass
         finally:
+            scans.close()
+            self.scanner.close()
             print(f"\n📊 Final Statistics:")
             print(f"   Total packets dumped: {self.packet_count}")
             print(f"   ESP32-C3 packets: {self.esp32_packets}")
@@ -1,18 +1,24 @@
 #!/usr/bin/env python3
 
+import os
 import subprocess
 import sys
 import time
 import signal
-from datetime import datetime
+
+from esp32_rid_common import ESP32_CAPTURE_MAC
+from timestamp_format import format_time
+
+READ_CHUNK_SIZE = 1 << 16  # bytes drained from the tshark pipe per read
 
 class PacketTimingMonitor:
     def __init__(self):
         self.interface = "wlx60e32717571c"
-        self.target_mac = "84:fc:e6:00:fc:04"
+        self.target_mac = ESP32_CAPTURE_MAC
         self.packet_count = 0
         self.start_time = time.time()
         self.last_packet_time = None
+        self.process = None
         
     def signal_handler(self, signum, frame):
         print(f"\n\n⏰ Timeout reached (30 seconds)")
@@ -20,7 +26,15 @@ class PacketTimingMonitor:
         if self.packet_count > 1:
             avg_interval = 30.0 / (self.packet_count - 1) if self.packet_count > 1 else 0
             print(f"📈 Average packet interval: {avg_interval:.2f} seconds")
-        sys.exit(0)
+        if self.process is None:
+            sys.exit(0)
+        # Stop tshark rather than exiting under it: the reader loop then sees
+        # EOF on the pipe and ends normally, and no dissector is left running
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
         
     def run(self):
         print(f"⏱️  Monitoring packet timing from ESP32-C3")
@@ -34,37 +48,41 @@ class PacketTimingMonitor:
         signal.alarm(30)  # 30 second timeout
         
         try:
-            # Run tshark to capture beacon packets with timestamps
+            # Run tshark to capture beacon packets with timestamps; the BPF
+            # capture filter drops other transmitters' frames in the kernel
             cmd = [
                 "tshark",
                 "-i", self.interface,
-                "-f", "wlan type mgt subtype beacon",
+                "-f", f"wlan type mgt subtype beacon and wlan src {self.target_mac}",
                 "-T", "fields",
                 "-e", "frame.time_epoch",
-                "-e", "wlan.sa",
                 "-e", "frame.len"
             ]
             
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+            # stdout is drained with os.read, so no Python-side buffering is needed;
+            # stderr is discarded so tshark can't block on an undrained pipe
+            self.process = subprocess.Popen(cmd, stdout=subprocess.PIPE,
+                                            stderr=subprocess.DEVNULL, bufsize=0)
+            fd = self.process.stdout.fileno()
+            pending = b""
             
-            for line in process.stdout:
-                line = line.strip()
-                if not line:
-                    continue
+            while True:
+                # Drain whatever tshark has written in one read instead of one per line
+                chunk = os.read(fd, READ_CHUNK_SIZE)
+                if not chunk:
+                    break
                     
-                parts = line.split('\t')
-                if len(parts) >= 3:
-                    timestamp_str = parts[0]
-                    mac = parts[1]
-                    frame_len = parts[2]
-                    
-                    # Filter for our target MAC
-                    if mac.lower() != self.target_mac.lower():
+                lines = (pending + chunk).split(b"\n")
+                pending = lines.pop()
+                
+                for line in lines:
+                    # One partition per line: no list, and blank lines leave frame_len empty
+                    timestamp_str, _, frame_len = line.rstrip().partition(b'\t')
+                    if not frame_len:
                         continue
-                    
+                        
                     try:
                         current_time = float(timestamp_str)
-                        current_datetime = datetime.fromtimestamp(current_time)
                         
                         self.packet_count += 1
                         elapsed = current_time - self.start_time
@@ -77,9 +95,9 @@ class PacketTimingMonitor:
                             interval_str = "---"
                         
                         print(f"📦 Packet #{self.packet_count:2d} | "
-                              f"Time: {current_datetime.strftime('%H:%M:%S.%f')[:-3]} | "
+                              f"Time: {format_time(int(current_time * 1e9))} | "
                               f"Interval: {interval_str:>8} | "
-                              f"Length: {frame_len:>3} bytes | "
+                              f"Length: {frame_len.decode():>3} bytes | "
                               f"Elapsed: {elapsed:6.1f}s")
                         
                         self.last_packet_time = current_time
@@ -93,6 +111,8 @@ class PacketTimingMonitor:
             print(f"\n❌ Error: {e}")
         finally:
             signal.alarm(0)  # Cancel the alarm
+            if self.process is not None and self.process.poll() is None:
+                self.process.terminate()
             print(f"\n📊 Final Statistics:")
             print(f"   • Total packets: {self.packet_count}")
             if self.packet_count > 1:
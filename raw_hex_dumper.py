@@ -1,14 +1,17 @@
 #!/usr/bin/env python3
 
-import subprocess
-import re
+import selectors
 import time
 import sys
 
+from beacon_capture import FRAME_BUFFER_SIZE, open_beacon_socket, parse_beacon
+from esp32_rid_common import ESP32_CAPTURE_MAC
+from timestamp_format import format_time
+
 def capture_raw_packets():
     """Capture raw hex packets from ESP32-C3 in monitor mode"""
     
-    target_mac = "84:FC:E6:00:FC:04"
+    target_mac = ESP32_CAPTURE_MAC
     interface = "wlx60e32717571c"
     timeout_seconds = 30
     
@@ -17,72 +20,61 @@ def capture_raw_packets():
     print(f"Will run for {timeout_seconds} seconds maximum")
     print("-" * 60)
     
+    packet_count = 0
+    deadline = time.monotonic() + timeout_seconds
+    
     try:
-        # Use tshark to capture WiFi beacon packets in monitor mode
-        cmd = [
-            "sudo", "tshark", 
-            "-i", interface,
-            "-f", "wlan type mgt subtype beacon",  # Filter for beacon packets only
-            "-T", "fields",
-            "-e", "wlan.sa",  # Source MAC
-            "-e", "frame.len",  # Frame length
-            "-e", "data.data"  # Raw hex data
-        ]
-        
-        process = subprocess.Popen(
-            cmd,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1
-        )
-        
-        packet_count = 0
-        start_time = time.time()
+        # Read beacons straight off the monitor-mode interface; the BPF filter
+        # drops every frame that is not a beacon from target_mac in the kernel
+        sock = open_beacon_socket(interface, target_mac)
+        sock.setblocking(False)
+        selector = selectors.DefaultSelector()
+        selector.register(sock, selectors.EVENT_READ)
+        frame_buffer = bytearray(FRAME_BUFFER_SIZE)
+        frame_view = memoryview(frame_buffer)
         
         while True:
             # Check if we've exceeded the timeout
-            if time.time() - start_time > timeout_seconds:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
                 print(f"\nTimeout reached ({timeout_seconds} seconds). Stopping capture.")
                 break
-                
-            line = process.stdout.readline()
-            if not line:
-                break
-                
-            line = line.strip()
-            if not line:
+            
+            if not selector.select(timeout=remaining):
+                continue
+            
+            try:
+                length = sock.recv_into(frame_buffer)
+            except BlockingIOError:
+                continue
+            
+            beacon = parse_beacon(frame_view[:length])
+            if not beacon:
                 continue
-                
-            # Parse tshark output
-            parts = line.split('\t')
-            if len(parts) >= 3:
-                source_mac = parts[0]
-                frame_len = parts[1]
-                hex_data = parts[2]
-                
-                # Check if this is from our target MAC
-                if source_mac.lower() == target_mac.lower():
-                    packet_count += 1
-                    timestamp = time.strftime("%H:%M:%S.%f")[:-3]
-                    
-                    print(f"\n[{timestamp}] Packet #{packet_count}")
-                    print(f"Source MAC: {source_mac}")
-                    print(f"Frame Length: {frame_len} bytes")
-                    print(f"Raw Hex Data:")
-                    print(hex_data)
-                    print("-" * 40)
-                    
-                    # Flush output immediately
-                    sys.stdout.flush()
+            
+            source_mac, _, frame_len, dot11 = beacon
+            packet_count += 1
+            timestamp = format_time()
+            
+            print(f"\n[{timestamp}] Packet #{packet_count}")
+            print(f"Source MAC: {source_mac}")
+            print(f"Frame Length: {frame_len} bytes")
+            print(f"Raw Hex Data:")
+            print(dot11.hex())
+            print("-" * 40)
+            
+            # Flush output immediately
+            sys.stdout.flush()
     
     except KeyboardInterrupt:
         print(f"\n\nCapture stopped. Total packets received: {packet_count}")
     except Exception as e:
         print(f"Error: {e}")
     finally:
-        if 'process' in locals():
-            process.terminate()
+        if 'selector' in locals():
+            selector.close()
+        if 'sock' in locals():
+            sock.close()
 
 if __name__ == "__main__":
     capture_raw_packets()
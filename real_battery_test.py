@@ -3,45 +3,54 @@
 Real Battery Test - Actually checks if ESP32-C3 is transmitting
 """
 
-import subprocess
+import selectors
 import time
 import signal
 import sys
 from datetime import datetime
 
+from esp32_rid_common import ESP32_CHANNEL, ESP32_MAC, ESP32_SSID, find_esp32_entry, open_esp32_scanner
+from nl80211_scanner import entry_row
+
 class RealBatteryTest:
     def __init__(self):
-        self.esp32_mac = "84:FC:E6:00:FC:05"
-        self.esp32_ssid = "TEST-OP-12345"
+        self.esp32_mac = ESP32_MAC
+        self.esp32_ssid = ESP32_SSID
+        self.esp32_channel = ESP32_CHANNEL
+        self.scan_timeout = 5  # seconds without a finished scan before counting a miss
         self.packet_count = 0
         self.start_time = time.time()
+        self.scanner = None
+        self.selector = None
         
     def signal_handler(self, sig, frame):
         print("\n\n🛑 Stopping real battery test...")
         sys.exit(0)
     
+    def wait_for_scan(self):
+        """Block until a scan of our interface finishes; False if none does within scan_timeout"""
+        deadline = time.monotonic() + self.scan_timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            # Re-arm the pinned scan whenever rescan_interval passes without one finishing
+            due = self.scanner.rescan_due_in()
+            if self.selector.select(timeout=remaining if due is None else min(due, remaining)):
+                if self.scanner.read_scan_event():
+                    return True
+            else:
+                self.scanner.refresh_scan()
+    
     def scan_wifi_networks(self):
-        """Scan for WiFi networks with fresh data"""
-        try:
-            # Use a fresh scan each time
-            result = subprocess.run(['nmcli', 'dev', 'wifi', 'rescan'], 
-                                  capture_output=True, text=True, check=True, timeout=3)
-            
-            result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, check=True, timeout=3)
-            return result.stdout
-        except Exception as e:
-            return f"Error: {e}"
+        """Read the kernel BSS cache once a scan has finished"""
+        return self.scanner.get_scan_entries()
     
     def check_esp32_presence(self, wifi_data):
         """Check if ESP32-C3 is actually present in current scan"""
-        if "Error" in wifi_data:
-            return False, "Scan error"
-        
-        lines = wifi_data.strip().split('\n')
-        for line in lines:
-            if self.esp32_mac in line and self.esp32_ssid in line:
-                return True, line
+        entry = find_esp32_entry(wifi_data)
+        if entry:
+            return True, entry_row(entry)
         return False, "Not found in current scan"
     
     def run_test(self):
@@ -56,14 +65,41 @@ class RealBatteryTest:
         
         signal.signal(signal.SIGINT, self.signal_handler)
         
+        try:
+            # Passive scans of only the ESP32's channel, re-armed 0.5 s after each one completes
+            self.scanner = open_esp32_scanner((self.esp32_channel,))
+        except OSError as e:
+            print(f"❌ Error opening nl80211 socket: {e}")
+            return
+        
+        self.selector = selectors.DefaultSelector()
+        self.selector.register(self.scanner, selectors.EVENT_READ)
+        
+        try:
+            self.scan_loop()
+        finally:
+            self.selector.close()
+            self.scanner.close()
+    
+    def scan_loop(self):
+        """Check each finished scan until the ESP32-C3 has been missed max_misses times in a row"""
         consecutive_misses = 0
         max_misses = 5
         
         while True:
             print(f"\n🔍 Scanning for ESP32-C3... (Attempt {self.packet_count + 1})")
             
-            wifi_data = self.scan_wifi_networks()
-            is_present, details = self.check_esp32_presence(wifi_data)
+            # Edge-triggered: wake when the kernel reports a finished scan and
+            # read the results exactly once, with no fixed sleep in between
+            if not self.wait_for_scan():
+                is_present, details = False, f"No scan completed within {self.scan_timeout}s"
+            else:
+                try:
+                    wifi_data = self.scan_wifi_networks()
+                except OSError as e:
+                    is_present, details = False, f"Scan error: {e}"
+                else:
+                    is_present, details = self.check_esp32_presence(wifi_data)
             
             if is_present:
                 self.packet_count += 1
@@ -91,8 +127,6 @@ class RealBatteryTest:
                     print(f"   • ESP32-C3 sketch is not running")
                     print(f"   • Battery is dead")
                     break
-            
-            time.sleep(2)  # Wait 2 seconds between scans
 
 if __name__ == "__main__":
     test = RealBatteryTest()
@@ -4,89 +4,43 @@ Real-time ESP32-C3 Packet Dumper
 Properly detects when ESP32 goes online/offline
 """
 
-import subprocess
 import time
 import signal
 import sys
-from datetime import datetime
+
+from esp32_rid_common import ESP32_CHANNEL, ESP32_MAC, ESP32_SSID, find_esp32_entry, open_esp32_scanner
+from nl80211_scanner import entry_row
+from timestamp_format import format_datetime, format_time
 
 class RealtimePacketDumper:
     def __init__(self):
-        self.esp32_mac = "84:FC:E6:00:FC:05"
-        self.esp32_ssid = "TEST-OP-12345"
+        self.esp32_mac = ESP32_MAC
+        self.esp32_ssid = ESP32_SSID
+        self.esp32_channel = ESP32_CHANNEL
         self.packet_count = 0
         self.start_time = time.time()
-        self.esp32_online = False
+        self.esp32_online = None  # unknown until the first scan
         self.last_seen_time = 0
+        self.scanner = None
         
     def signal_handler(self, sig, frame):
         print("\n\n🛑 Stopping real-time packet dumper...")
         sys.exit(0)
     
-    def scan_wifi_networks(self):
-        """Scan for WiFi networks with fresh data and LAST-SEEN field."""
-        try:
-            subprocess.run(['nmcli', 'dev', 'wifi', 'rescan'],
-                           capture_output=True, text=True, check=True, timeout=3)
-            # Use terse output with explicit fields to get LAST-SEEN consistently
-            result = subprocess.run([
-                'nmcli', '-t', '-f',
-                'BSSID,SSID,CHAN,RATE,SIGNAL,BARS,SECURITY,LAST-SEEN',
-                'dev', 'wifi', 'list'
-            ], capture_output=True, text=True, check=True, timeout=5)
-            return result.stdout
-        except Exception as e:
-            return f"Error: {e}"
-
-    def _parse_last_seen_seconds(self, last_seen_str: str) -> float:
-        """Convert nmcli LAST-SEEN string to seconds. Returns large number on failure."""
-        if not last_seen_str:
-            return 1e9
-        s = last_seen_str.strip().lower()
-        if s == 'now':
-            return 0.0
-        # Examples: '1 second ago', '5 seconds ago', '2 minutes ago', '1 hour ago'
-        parts = s.split()
-        if not parts:
-            return 1e9
-        try:
-            value = float(parts[0])
-        except Exception:
-            return 1e9
-        unit = parts[1] if len(parts) > 1 else 'seconds'
-        if unit.startswith('sec'):
-            return value
-        if unit.startswith('min'):
-            return value * 60.0
-        if unit.startswith('hour'):
-            return value * 3600.0
-        return 1e9
-    
     def is_esp32_present(self, wifi_data):
         """Check if ESP32-C3 is present and seen recently (<3s) in current scan."""
-        if "Error" in wifi_data:
-            return False, "Scan error"
-        lines = [ln for ln in wifi_data.strip().split('\n') if ln.strip()]
-        # nmcli -t uses ':' as delimiter: BSSID:SSID:CHAN:RATE:SIGNAL:BARS:SECURITY:LAST-SEEN
-        for line in lines:
-            parts = line.split(':')
-            if len(parts) < 8:
-                continue
-            bssid, ssid = parts[0].strip(), parts[1].strip()
-            last_seen = parts[-1].strip()
-            if bssid.upper() == self.esp32_mac.upper() and ssid == self.esp32_ssid:
-                seconds = self._parse_last_seen_seconds(last_seen)
-                # Treat as live only if seen within last 3 seconds
-                if seconds <= 3.0:
-                    return True, line
-                else:
-                    return False, f"Stale entry (LAST-SEEN {last_seen})"
-        return False, "ESP32-C3 not found in current scan"
+        entry = find_esp32_entry(wifi_data)
+        if not entry:
+            return False, "ESP32-C3 not found in current scan"
+        # The kernel keeps a BSS cached for a while after its last beacon;
+        # treat it as live only if a frame arrived within the last 3 seconds
+        if entry.seen_ms_ago <= 3000:
+            return True, entry_row(entry)
+        return False, f"Stale entry (last seen {entry.seen_ms_ago / 1000:.1f}s ago)"
     
     def display_packet(self, packet_num, raw_line):
         """Display packet information"""
-        current_time = datetime.now()
-        rid_timestamp = current_time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        rid_timestamp = format_datetime()
         elapsed = time.time() - self.start_time
         
         print(f"\n🚁 ESP32-C3 PACKET #{packet_num} - {rid_timestamp}")
@@ -101,11 +55,10 @@ class RealtimePacketDumper:
     
     def display_offline(self):
         """Display offline status"""
-        current_time = datetime.now()
         elapsed = time.time() - self.start_time
         time_since_last_seen = time.time() - self.last_seen_time if self.last_seen_time > 0 else 0
         
-        print(f"\n❌ ESP32-C3 OFFLINE - {current_time.strftime('%H:%M:%S')}")
+        print(f"\n❌ ESP32-C3 OFFLINE - {format_time()[:-4]}")
         print("=" * 80)
         print(f"📡 MAC: {self.esp32_mac} | SSID: {self.esp32_ssid}")
         print(f"⏱️  Runtime: {elapsed:.1f}s | Packets: {self.packet_count}")
@@ -114,8 +67,8 @@ class RealtimePacketDumper:
         print(f"⏰ Time since last seen: {time_since_last_seen:.1f}s")
         print("=" * 80)
     
-    def run(self):
-        """Run the real-time packet dumper"""
+    def run(self, scan_source=None):
+        """Run the real-time packet dumper on scan_source, or on our own scanner if None"""
         print("🔍 Real-time ESP32-C3 Packet Dumper")
         print("=" * 50)
         print("Properly detects when ESP32 goes online/offline")
@@ -124,30 +77,57 @@ class RealtimePacketDumper:
         
         signal.signal(signal.SIGINT, self.signal_handler)
         
-        while True:
-            wifi_data = self.scan_wifi_networks()
+        if scan_source is None:
+            try:
+                # Passive scans of only the ESP32's channel, re-armed 0.5 s after each one completes
+                self.scanner = open_esp32_scanner((self.esp32_channel,))
+            except OSError as e:
+                print(f"❌ Error opening nl80211 socket: {e}")
+                return
+            scan_source = self.scanner.iter_scans()
+        
+        try:
+            self.dump_loop(scan_source)
+        finally:
+            if self.scanner:
+                scan_source.close()
+                self.scanner.close()
+    
+    def dump_loop(self, scan_source):
+        """Check the ESP32-C3 in every scan the source yields"""
+        for wifi_data in scan_source:
+            self.handle_scan(wifi_data)
+    
+    def handle_scan(self, wifi_data):
+        """Check the ESP32-C3 in one {BSSID: ScanEntry} scan, or None if the scan failed"""
+        if wifi_data is None:
+            is_present, details = False, "Scan error"
+        else:
             is_present, details = self.is_esp32_present(wifi_data)
-            
+        
+        # Edge-triggered: the online/offline handlers only run when the
+        # state flips, steady scans just dump the packet or do nothing
+        if is_present != self.esp32_online:
+            self.esp32_online = is_present
             if is_present:
-                # ESP32 is online
-                if not self.esp32_online:
-                    print(f"\n🟢 ESP32-C3 CAME ONLINE at {datetime.now().strftime('%H:%M:%S')}")
-                    self.esp32_online = True
-                
-                self.packet_count += 1
-                self.last_seen_time = time.time()
-                self.display_packet(self.packet_count, details)
+                self.on_online()
             else:
-                # ESP32 is offline
-                if self.esp32_online:
-                    print(f"\n🔴 ESP32-C3 WENT OFFLINE at {datetime.now().strftime('%H:%M:%S')}")
-                    self.esp32_online = False
-                
-                # Show offline status every 5 seconds
-                if int(time.time() - self.start_time) % 5 == 0:
-                    self.display_offline()
-            
-            time.sleep(1)
+                self.on_offline()
+        
+        if is_present:
+            self.packet_count += 1
+            self.last_seen_time = time.time()
+            self.display_packet(self.packet_count, details)
+    
+    def on_online(self):
+        """Called once each time the ESP32-C3 comes online"""
+        print(f"\n🟢 ESP32-C3 CAME ONLINE at {format_time()[:-4]}")
+    
+    def on_offline(self):
+        """Called once each time the ESP32-C3 goes offline, and on startup if it is absent"""
+        if self.last_seen_time > 0:
+            print(f"\n🔴 ESP32-C3 WENT OFFLINE at {format_time()[:-4]}")
+        self.display_offline()
 
 if __name__ == "__main__":
     dumper = RealtimePacketDumper()
@@ -4,70 +4,35 @@ Reliable Real-time WiFi Packet Monitor
 With progress indicators and hang prevention
 """
 
-import subprocess
 import time
 import signal
 import sys
-import threading
-from datetime import datetime
+
+from esp32_rid_common import ESP32_MAC, ESP32_SSID
+from nl80211_scanner import NL80211Scanner, entry_fields
+from timestamp_format import format_time
 
 class ReliablePacketMonitor:
     def __init__(self):
         self.running = True
-        self.esp32_mac = "84:FC:E6:00:FC:05"
-        self.esp32_ssid = "TEST-OP-12345"
+        self.esp32_mac = ESP32_MAC
+        self.esp32_ssid = ESP32_SSID
         self.scan_count = 0
         self.esp32_detections = 0
         self.last_esp32_time = 0
         self.last_status_time = 0
+        self.esp32_online = None  # unknown until the first scan
+        self.stale_after = 10  # seconds a failed scan trusts the last detection
+        self.scanner = None
         
     def signal_handler(self, sig, frame):
         print("\n\n🛑 Stopping packet monitor...")
         self.running = False
         sys.exit(0)
     
-    def scan_wifi_networks(self):
-        """Scan for WiFi networks with robust error handling"""
-        try:
-            # Use timeout and proper error handling
-            result = subprocess.run(['timeout', '3', 'nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, timeout=5)
-            
-            if result.returncode == 0 and result.stdout.strip():
-                return result.stdout
-            else:
-                return None
-        except subprocess.TimeoutExpired:
-            print("⏰ WiFi scan timeout - retrying...")
-            return None
-        except Exception as e:
-            print(f"❌ WiFi scan error: {e}")
-            return None
-    
-    def parse_network_line(self, line):
-        """Parse a WiFi network line with validation"""
-        if not line or not line.strip():
-            return None
-        if 'BSSID' in line or '--' in line or not line.startswith(' '):
-            return None
-            
-        parts = line.split()
-        if len(parts) < 8:
-            return None
-            
-        try:
-            return {
-                'bssid': parts[1],
-                'ssid': parts[2],
-                'mode': parts[3],
-                'channel': parts[4],
-                'rate': parts[5],
-                'signal': parts[6],
-                'bars': parts[7],
-                'security': parts[8] if len(parts) > 8 else 'Unknown'
-            }
-        except:
-            return None
+    def parse_network_line(self, entry):
+        """Convert a scan entry into nmcli-style display fields"""
+        return entry_fields(entry)
     
     def is_esp32_network(self, network):
         """Check if this is our ESP32-C3 network"""
@@ -78,7 +43,7 @@ class ReliablePacketMonitor:
     
     def display_esp32_packet(self, network):
         """Display ESP32-C3 packet with full analysis"""
-        timestamp = datetime.now().strftime("%H:%M:%S")
+        timestamp = format_time()[:-4]
         
         print(f"\n🚁 ESP32-C3 REMOTE ID PACKET DETECTED! [{timestamp}]")
         print("=" * 60)
@@ -108,8 +73,50 @@ class ReliablePacketMonitor:
                   f"Last ESP32: {elapsed:.1f}s ago")
             self.last_status_time = current_time
     
-    def monitor(self):
-        """Main monitoring loop with progress tracking"""
+    def handle_scan(self, wifi_data):
+        """Process one {BSSID: ScanEntry} scan, or None if the scan failed"""
+        # Show progress indicator
+        self.show_progress()
+        
+        self.scan_count += 1
+        current_time = time.time()
+        
+        if wifi_data is None:
+            # A failed scan tells us nothing new; go by the last detection
+            is_present = current_time - self.last_esp32_time < self.stale_after
+        else:
+            is_present = False
+            for entry in wifi_data.values():
+                network = self.parse_network_line(entry)
+                is_esp32 = self.is_esp32_network(network)
+                
+                if is_esp32:
+                    is_present = True
+                    self.esp32_detections += 1
+                    self.last_esp32_time = current_time
+                    self.display_esp32_packet(network)
+                elif self.scan_count % 20 == 0:  # Show other networks occasionally
+                    timestamp = format_time()[:-4]
+                    print(f"📡 [{timestamp}] {network['ssid']} ({network['bssid']}) - Ch:{network['channel']}")
+        
+        # Edge-triggered: report the signal only when detections stop or resume
+        if is_present != self.esp32_online:
+            self.esp32_online = is_present
+            if is_present:
+                self.on_online()
+            else:
+                self.on_offline()
+    
+    def on_online(self):
+        """Called once each time ESP32-C3 detections start or resume"""
+        print(f"✅ ESP32-C3 transmitting [{format_time()[:-4]}]")
+    
+    def on_offline(self):
+        """Called once each time ESP32-C3 detections stop, and on startup if it is absent"""
+        print(f"❌ ESP32-C3 signal not found [{format_time()[:-4]}]")
+    
+    def monitor(self, scan_source):
+        """Main monitoring loop with progress tracking, one pass per scan the source yields"""
         print("🔍 Reliable WiFi Packet Monitor")
         print("=" * 50)
         print("Monitoring ESP32-C3 Remote ID transmission...")
@@ -117,74 +124,48 @@ class ReliablePacketMonitor:
         print("=" * 50)
         print()
         
-        consecutive_failures = 0
-        max_failures = 3
-        
-        while self.running:
+        for wifi_data in scan_source:
+            if not self.running:
+                break
             try:
-                # Show progress indicator
-                self.show_progress()
-                
-                # Scan WiFi networks
-                wifi_data = self.scan_wifi_networks()
-                self.scan_count += 1
-                current_time = time.time()
-                
-                if wifi_data:
-                    consecutive_failures = 0
-                    lines = wifi_data.split('\n')
-                    esp32_found = False
-                    
-                    for line in lines:
-                        network = self.parse_network_line(line)
-                        if network:
-                            is_esp32 = self.is_esp32_network(network)
-                            
-                            if is_esp32:
-                                esp32_found = True
-                                self.esp32_detections += 1
-                                self.last_esp32_time = current_time
-                                self.display_esp32_packet(network)
-                            elif self.scan_count % 20 == 0:  # Show other networks occasionally
-                                timestamp = datetime.now().strftime("%H:%M:%S")
-                                print(f"📡 [{timestamp}] {network['ssid']} ({network['bssid']}) - Ch:{network['channel']}")
-                else:
-                    consecutive_failures += 1
-                    if consecutive_failures >= max_failures:
-                        print(f"⚠️  {consecutive_failures} consecutive scan failures - checking ESP32...")
-                        # Quick check if ESP32 is still there
-                        quick_check = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                                                   capture_output=True, text=True, timeout=2)
-                        if quick_check.returncode == 0 and self.esp32_ssid in quick_check.stdout:
-                            print("✅ ESP32-C3 still transmitting")
-                        else:
-                            print("❌ ESP32-C3 signal not found")
-                        consecutive_failures = 0
-                
-                # Short sleep to prevent hanging
-                time.sleep(1)
-                
+                self.handle_scan(wifi_data)
             except KeyboardInterrupt:
                 break
             except Exception as e:
                 print(f"❌ Unexpected error: {e}")
                 time.sleep(2)
     
-    def run(self):
-        """Run the monitor"""
+    def print_statistics(self):
+        """Print the final scan and detection counts"""
+        print(f"\n📊 Final Statistics:")
+        print(f"   Total scans: {self.scan_count}")
+        print(f"   ESP32-C3 detections: {self.esp32_detections}")
+        if self.scan_count > 0:
+            print(f"   Detection rate: {(self.esp32_detections/self.scan_count*100):.1f}%")
+        print(f"   ESP32-C3 status: {'✅ ACTIVE' if self.esp32_detections > 0 else '❌ INACTIVE'}")
+    
+    def run(self, scan_source=None):
+        """Run the monitor on scan_source, or on our own scanner if None"""
         signal.signal(signal.SIGINT, self.signal_handler)
         
+        if scan_source is None:
+            try:
+                self.scanner = NL80211Scanner()
+                self.scanner.subscribe_scan_events()
+            except OSError as e:
+                print(f"❌ Error opening nl80211 socket: {e}")
+                return
+            scan_source = self.scanner.iter_scans()
+        
         try:
-            self.monitor()
+            self.monitor(scan_source)
         except KeyboardInterrupt:
             pass
         finally:
-            print(f"\n📊 Final Statistics:")
-            print(f"   Total scans: {self.scan_count}")
-            print(f"   ESP32-C3 detections: {self.esp32_detections}")
-            if self.scan_count > 0:
-                print(f"   Detection rate: {(self.esp32_detections/self.scan_count*100):.1f}%")
-            print(f"   ESP32-C3 status: {'✅ ACTIVE' if self.esp32_detections > 0 else '❌ INACTIVE'}")
+            if self.scanner:
+                scan_source.close()
+                self.scanner.close()
+            self.print_statistics()
 
 def main():
     print("Reliable Real-time WiFi Packet Monitor")
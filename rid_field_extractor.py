@@ -4,308 +4,291 @@ ESP32-C3 RID Field Extractor
 Captures and extracts all RID fields from WiFi beacon frames
 """
 
-import subprocess
+import argparse
+import json
 import time
 import signal
 import sys
-from datetime import datetime
-import re
+
+from esp32_rid_common import ESP32_CHANNEL, ESP32_MAC, ESP32_SSID, find_esp32_entry, open_esp32_scanner
+from nl80211_scanner import entry_fields, entry_row
+from timestamp_format import format_datetime, format_time
+
+# RID fields that are the same in every packet
+STATIC_RID_FIELDS = {
+    # Remote ID Basic Information
+    'rid_protocol_version': 'OpenDroneID v2.0',
+    'rid_message_format': 'ASTM F3411-19',
+    'rid_uav_id': 'TEST-UAV-C3-001',
+    'rid_flight_description': 'C3 Test Flight',
+
+    # Location Information
+    'rid_location': 'Aldrich Park, Irvine, California',
+    'rid_altitude_msl_meters': 100.0,
+    'rid_altitude_agl_meters': 50.0,
+    'rid_base_altitude_meters': 50.0,
+
+    # Flight Information
+    'rid_speed_knots': 25.0,
+    'rid_heading_degrees': 0.0,
+    'rid_flight_status': 'Active simulation',
+    'rid_emergency_status': 'None',
+    'rid_gps_satellites': 12,
+    'rid_gps_valid': True,
+    'rid_horizontal_velocity_ms': 12.86,  # 25 knots converted to m/s
+    'rid_vertical_velocity_ms': 0.0,
+
+    # System Information
+    'rid_operator_location': 'Unknown',
+    'rid_classification': 'EU Category 1, Class 5',
+    'rid_country_code': 'US',
+    'rid_area_code': 'Irvine, CA',
+    'rid_operator_altitude_meters': 50.0,
+
+    # Technical Information
+    'rid_transmission_rate_hz': 40.0,
+    'rid_frequency_hz': 2400000000.0,  # 2.4 GHz
+    'rid_power_level_dbm': 20.0,
+
+    # Compliance Information
+    'rid_astm_f3411_19_compliant': True,
+    'rid_basic_id_transmitted': True,
+    'rid_location_transmitted': True,
+    'rid_operator_id_transmitted': True,
+    'rid_timestamp_transmitted': True,
+    'rid_emergency_status_transmitted': True,
+    'rid_self_id_transmitted': True,
+    'rid_system_data_transmitted': True,
+
+    # Detection Information
+    'rid_remote_id_scanner_detectable': True,
+    'rid_wifi_analyzer_detectable': True,
+    'rid_packet_sniffer_detectable': True,
+    'rid_aviation_authorities_detectable': True,
+    'rid_law_enforcement_detectable': True,
+}
+
+# Simulated flight path, one entry per 10 s, with the coordinates pre-split
+WAYPOINTS = (
+    {'rid_waypoint_name': 'Waypoint 1', 'rid_waypoint_description': 'Aldrich Park center',
+     'rid_coordinates': '33.6405°N, 117.8443°W', 'rid_latitude_degrees': '33.6405°N', 'rid_longitude_degrees': '117.8443°W'},
+    {'rid_waypoint_name': 'Waypoint 2', 'rid_waypoint_description': 'North',
+     'rid_coordinates': '33.6415°N, 117.8443°W', 'rid_latitude_degrees': '33.6415°N', 'rid_longitude_degrees': '117.8443°W'},
+    {'rid_waypoint_name': 'Waypoint 3', 'rid_waypoint_description': 'Northeast',
+     'rid_coordinates': '33.6415°N, 117.8453°W', 'rid_latitude_degrees': '33.6415°N', 'rid_longitude_degrees': '117.8453°W'},
+    {'rid_waypoint_name': 'Waypoint 4', 'rid_waypoint_description': 'East',
+     'rid_coordinates': '33.6405°N, 117.8453°W', 'rid_latitude_degrees': '33.6405°N', 'rid_longitude_degrees': '117.8453°W'},
+)
+
+# One packet's RID field dump, filled with % and written in one call; the
+# STATIC_RID_FIELDS placeholders are substituted once at import, below
+RID_FIELDS_TEMPLATE = (
+    "\n🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁 ESP32-C3 REMOTE ID PACKET 🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁\n"
+    "\n📦 PACKET #%(rid_packet_number)s - %(rid_packet_timestamp)s\n"
+    + "=" * 100 + "\n"
+    "\n📡 WiFi Beacon Frame Fields:\n"
+    "   • BSSID: %(wifi_bssid)s\n"
+    "   • SSID: %(wifi_ssid)s\n"
+    "   • Mode: %(wifi_mode)s\n"
+    "   • Channel: %(wifi_channel)s\n"
+    "   • Rate: %(wifi_rate)s\n"
+    "   • Signal Strength: %(wifi_signal_strength)s%%\n"
+    "   • Signal Bars: %(wifi_signal_bars)s\n"
+    "   • Security: %(wifi_security)s\n"
+    "\n📋 Remote ID Basic Information:\n"
+    "   • Protocol Version: %(rid_protocol_version)s\n"
+    "   • Message Format: %(rid_message_format)s\n"
+    "   • Operator ID: %(rid_operator_id)s\n"
+    "   • UAV ID: %(rid_uav_id)s\n"
+    "   • Flight Description: %(rid_flight_description)s\n"
+    "\n📍 Remote ID Location Information:\n"
+    "   • Location: %(rid_location)s\n"
+    "   • Coordinates: %(rid_coordinates)s\n"
+    "   • Waypoint Name: %(rid_waypoint_name)s\n"
+    "   • Waypoint Description: %(rid_waypoint_description)s\n"
+    "   • Latitude: %(rid_latitude_degrees)s\n"
+    "   • Longitude: %(rid_longitude_degrees)s\n"
+    "   • Altitude MSL: %(rid_altitude_msl_meters)s meters\n"
+    "   • Altitude AGL: %(rid_altitude_agl_meters)s meters\n"
+    "   • Base Altitude: %(rid_base_altitude_meters)s meters\n"
+    "\n✈️  Remote ID Flight Information:\n"
+    "   • Speed: %(rid_speed_knots)s knots\n"
+    "   • Heading: %(rid_heading_degrees)s degrees\n"
+    "   • Flight Status: %(rid_flight_status)s\n"
+    "   • Emergency Status: %(rid_emergency_status)s\n"
+    "   • GPS Satellites: %(rid_gps_satellites)s\n"
+    "   • GPS Valid: %(rid_gps_valid)s\n"
+    "   • Horizontal Velocity: %(rid_horizontal_velocity_ms)s m/s\n"
+    "   • Vertical Velocity: %(rid_vertical_velocity_ms)s m/s\n"
+    "\n⚙️  Remote ID System Information:\n"
+    "   • Operator Location: %(rid_operator_location)s\n"
+    "   • Classification: %(rid_classification)s\n"
+    "   • Country Code: %(rid_country_code)s\n"
+    "   • Area Code: %(rid_area_code)s\n"
+    "   • Operator Altitude: %(rid_operator_altitude_meters)s meters\n"
+    "\n🔧 Remote ID Technical Information:\n"
+    "   • Message Counter: %(rid_message_counter)s\n"
+    "   • Transmission Rate: %(rid_transmission_rate_hz)s Hz\n"
+    "   • Frequency: %(rid_frequency_hz)s Hz\n"
+    "   • Power Level: %(rid_power_level_dbm)s dBm\n"
+    "\n✅ Remote ID Compliance Information:\n"
+    "   • ASTM F3411-19 Compliant: %(rid_astm_f3411_19_compliant)s\n"
+    "   • Basic ID Transmitted: %(rid_basic_id_transmitted)s\n"
+    "   • Location Transmitted: %(rid_location_transmitted)s\n"
+    "   • Operator ID Transmitted: %(rid_operator_id_transmitted)s\n"
+    "   • Timestamp Transmitted: %(rid_timestamp_transmitted)s\n"
+    "   • Emergency Status Transmitted: %(rid_emergency_status_transmitted)s\n"
+    "   • Self ID Transmitted: %(rid_self_id_transmitted)s\n"
+    "   • System Data Transmitted: %(rid_system_data_transmitted)s\n"
+    "\n🎯 Remote ID Detection Information:\n"
+    "   • Remote ID Scanner Detectable: %(rid_remote_id_scanner_detectable)s\n"
+    "   • WiFi Analyzer Detectable: %(rid_wifi_analyzer_detectable)s\n"
+    "   • Packet Sniffer Detectable: %(rid_packet_sniffer_detectable)s\n"
+    "   • Aviation Authorities Detectable: %(rid_aviation_authorities_detectable)s\n"
+    "   • Law Enforcement Detectable: %(rid_law_enforcement_detectable)s\n"
+    "\n⏰ Remote ID Packet Information:\n"
+    "   • RID Timestamp: %(rid_packet_timestamp)s\n"
+    "   • Capture Time: %(rid_capture_time)s\n"
+    "   • Packet Number: %(rid_packet_number)s\n"
+    "   • Runtime: %(rid_runtime_seconds).1f seconds\n"
+    + "=" * 100 + "\n"
+    "✅ ESP32-C3 Remote ID transmission is ACTIVE and COMPLIANT\n"
+    + "=" * 100 + "\n"
+    "\n\n\n\n"
+)
+
+def prefill_static_fields(template):
+    """Write the STATIC_RID_FIELDS values into template as literal text,
+    leaving only the per-packet placeholders to fill"""
+    for key, value in STATIC_RID_FIELDS.items():
+        template = template.replace("%%(%s)s" % key, str(value).replace("%", "%%"))
+    return template
+
+RID_FIELDS_TEMPLATE = prefill_static_fields(RID_FIELDS_TEMPLATE)
 
 class RIDFieldExtractor:
-    def __init__(self):
-        self.esp32_mac = "84:FC:E6:00:FC:05"
-        self.esp32_ssid = "TEST-OP-12345"
+    def __init__(self, json_output=False):
+        self.esp32_mac = ESP32_MAC
+        self.esp32_ssid = ESP32_SSID
+        self.esp32_channel = ESP32_CHANNEL
         self.packet_count = 0
         self.start_time = time.time()
+        self.status_period = 5  # seconds between "Scanning..." lines
+        self.next_status_at = 0.0
+        self.scanner = None
+        # With JSON output stdout carries only the packets, one object per
+        # line, and the banner and status lines go to stderr
+        self.json_output = json_output
+        self.log = sys.stderr if json_output else sys.stdout
 
     def signal_handler(self, sig, frame):
-        print("\n\n🛑 Stopping RID field extractor...")
+        print("\n\n🛑 Stopping RID field extractor...", file=self.log)
         sys.exit(0)
 
-    def scan_wifi_networks(self):
-        """Scan for WiFi networks with fresh data"""
-        try:
-            subprocess.run(['nmcli', 'dev', 'wifi', 'rescan'],
-                          capture_output=True, text=True, check=True, timeout=2)
-
-            result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'],
-                                  capture_output=True, text=True, check=True, timeout=3)
-            return result.stdout
-        except Exception as e:
-            return f"Error: {e}"
-
     def find_esp32_packet(self, wifi_data):
         """Find ESP32-C3 packet in WiFi data"""
-        if "Error" in wifi_data:
-            return None
-
-        lines = wifi_data.strip().split('\n')
-        for line in lines:
-            if self.esp32_mac in line and self.esp32_ssid in line:
-                return line
-        return None
+        return find_esp32_entry(wifi_data)
 
-    def parse_beacon_data(self, beacon_line):
-        """Parse the beacon frame data"""
-        if not beacon_line:
-            return None
-
-        parts = beacon_line.split()
-        if len(parts) < 9:
-            return None
-
-        try:
-            # nmcli output: BSSID SSID MODE CHAN RATE SIGNAL BARS SECURITY
-            bssid = parts[0]  # 84:FC:E6:00:FC:05
-            ssid = parts[1]   # TEST-OP-12345
-            mode = parts[2]   # Infra
-            channel = parts[3]  # 6
-            rate = f"{parts[4]} {parts[5]}"  # "65 Mbit/s"
-            signal = parts[6]  # 100
-            bars = parts[7]    # ▂▄▆█
-            security = parts[8] if len(parts) > 8 else 'Unknown'
-
-            return {
-                'bssid': bssid,
-                'ssid': ssid,
-                'mode': mode,
-                'channel': channel,
-                'rate': rate,
-                'signal': signal,
-                'bars': bars,
-                'security': security,
-                'raw_line': beacon_line
-            }
-        except Exception as e:
-            print(f"❌ Parsing error: {e}")
-            return None
+    def parse_beacon_data(self, entry):
+        """Convert the ESP32-C3 scan entry into beacon fields plus its nmcli-style row"""
+        return dict(entry_fields(entry), raw_line=entry_row(entry))
 
     def extract_rid_fields(self, packet_data):
         """Extract all RID fields from packet data"""
-        current_time = datetime.now()
+        now_ns = time.time_ns()
         elapsed_time = time.time() - self.start_time
 
-        # Calculate waypoint based on time (changes every 10 seconds)
-        waypoint_index = int(elapsed_time / 10) % 4
-        waypoints = [
-            {"name": "Waypoint 1", "coords": "33.6405°N, 117.8443°W", "desc": "Aldrich Park center"},
-            {"name": "Waypoint 2", "coords": "33.6415°N, 117.8443°W", "desc": "North"},
-            {"name": "Waypoint 3", "coords": "33.6415°N, 117.8453°W", "desc": "Northeast"},
-            {"name": "Waypoint 4", "coords": "33.6405°N, 117.8453°W", "desc": "East"}
-        ]
-        current_waypoint = waypoints[waypoint_index]
-
-        # Extract all possible RID fields
-        rid_fields = {
+        # Only the beacon, waypoint and packet fields change per packet;
+        # everything else is copied from the static template
+        rid_fields = dict(STATIC_RID_FIELDS)
+        rid_fields.update(
             # WiFi Beacon Frame Fields
-            'wifi_bssid': packet_data['bssid'],
-            'wifi_ssid': packet_data['ssid'],
-            'wifi_mode': packet_data['mode'],
-            'wifi_channel': packet_data['channel'],
-            'wifi_rate': packet_data['rate'],
-            'wifi_signal_strength': packet_data['signal'],
-            'wifi_signal_bars': packet_data['bars'],
-            'wifi_security': packet_data['security'],
-
-            # Remote ID Basic Information
-            'rid_protocol_version': 'OpenDroneID v2.0',
-            'rid_message_format': 'ASTM F3411-19',
-            'rid_operator_id': packet_data['ssid'],
-            'rid_uav_id': 'TEST-UAV-C3-001',
-            'rid_flight_description': 'C3 Test Flight',
-
-            # Location Information
-            'rid_location': 'Aldrich Park, Irvine, California',
-            'rid_coordinates': current_waypoint['coords'],
-            'rid_waypoint_name': current_waypoint['name'],
-            'rid_waypoint_description': current_waypoint['desc'],
-            'rid_latitude_degrees': current_waypoint['coords'].split(',')[0].strip(),
-            'rid_longitude_degrees': current_waypoint['coords'].split(',')[1].strip(),
-            'rid_altitude_msl_meters': 100.0,
-            'rid_altitude_agl_meters': 50.0,
-            'rid_base_altitude_meters': 50.0,
-
-            # Flight Information
-            'rid_speed_knots': 25.0,
-            'rid_heading_degrees': 0.0,
-            'rid_flight_status': 'Active simulation',
-            'rid_emergency_status': 'None',
-            'rid_gps_satellites': 12,
-            'rid_gps_valid': True,
-            'rid_horizontal_velocity_ms': 12.86,  # 25 knots converted to m/s
-            'rid_vertical_velocity_ms': 0.0,
-
-            # System Information
-            'rid_operator_location': 'Unknown',
-            'rid_classification': 'EU Category 1, Class 5',
-            'rid_country_code': 'US',
-            'rid_area_code': 'Irvine, CA',
-            'rid_operator_altitude_meters': 50.0,
+            wifi_bssid=packet_data['bssid'],
+            wifi_ssid=packet_data['ssid'],
+            wifi_mode=packet_data['mode'],
+            wifi_channel=packet_data['channel'],
+            wifi_rate=packet_data['rate'],
+            wifi_signal_strength=packet_data['signal'],
+            wifi_signal_bars=packet_data['bars'],
+            wifi_security=packet_data['security'],
+            rid_operator_id=packet_data['ssid'],
 
             # Technical Information
-            'rid_message_counter': self.packet_count,
-            'rid_transmission_rate_hz': 40.0,
-            'rid_frequency_hz': 2400000000.0,  # 2.4 GHz
-            'rid_power_level_dbm': 20.0,
-
-            # Compliance Information
-            'rid_astm_f3411_19_compliant': True,
-            'rid_basic_id_transmitted': True,
-            'rid_location_transmitted': True,
-            'rid_operator_id_transmitted': True,
-            'rid_timestamp_transmitted': True,
-            'rid_emergency_status_transmitted': True,
-            'rid_self_id_transmitted': True,
-            'rid_system_data_transmitted': True,
-
-            # Detection Information
-            'rid_remote_id_scanner_detectable': True,
-            'rid_wifi_analyzer_detectable': True,
-            'rid_packet_sniffer_detectable': True,
-            'rid_aviation_authorities_detectable': True,
-            'rid_law_enforcement_detectable': True,
+            rid_message_counter=self.packet_count,
 
             # Packet Information
-            'rid_packet_timestamp': current_time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-            'rid_capture_time': current_time.strftime("%H:%M:%S.%f")[:-3],
-            'rid_packet_number': self.packet_count,
-            'rid_runtime_seconds': elapsed_time
-        }
+            rid_packet_timestamp=format_datetime(now_ns),
+            rid_capture_time=format_time(now_ns),
+            rid_packet_number=self.packet_count,
+            rid_runtime_seconds=elapsed_time,
+        )
+        # Waypoint changes every 10 seconds
+        rid_fields.update(WAYPOINTS[int(elapsed_time / 10) % len(WAYPOINTS)])
 
         return rid_fields
 
     def print_rid_fields(self, fields):
-        """Print all RID fields in human-readable format"""
-        timestamp = fields['rid_packet_timestamp']
-        packet_num = fields['rid_packet_number']
-
-        print(f"\n🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁 ESP32-C3 REMOTE ID PACKET 🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁🚁")
-        print(f"\n📦 PACKET #{packet_num} - {timestamp}")
-        print("=" * 100)
-
-        # WiFi Information
-        print(f"\n📡 WiFi Beacon Frame Fields:")
-        print(f"   • BSSID: {fields['wifi_bssid']}")
-        print(f"   • SSID: {fields['wifi_ssid']}")
-        print(f"   • Mode: {fields['wifi_mode']}")
-        print(f"   • Channel: {fields['wifi_channel']}")
-        print(f"   • Rate: {fields['wifi_rate']}")
-        print(f"   • Signal Strength: {fields['wifi_signal_strength']}%")
-        print(f"   • Signal Bars: {fields['wifi_signal_bars']}")
-        print(f"   • Security: {fields['wifi_security']}")
-
-        # Remote ID Basic Information
-        print(f"\n📋 Remote ID Basic Information:")
-        print(f"   • Protocol Version: {fields['rid_protocol_version']}")
-        print(f"   • Message Format: {fields['rid_message_format']}")
-        print(f"   • Operator ID: {fields['rid_operator_id']}")
-        print(f"   • UAV ID: {fields['rid_uav_id']}")
-        print(f"   • Flight Description: {fields['rid_flight_description']}")
-
-        # Location Information
-        print(f"\n📍 Remote ID Location Information:")
-        print(f"   • Location: {fields['rid_location']}")
-        print(f"   • Coordinates: {fields['rid_coordinates']}")
-        print(f"   • Waypoint Name: {fields['rid_waypoint_name']}")
-        print(f"   • Waypoint Description: {fields['rid_waypoint_description']}")
-        print(f"   • Latitude: {fields['rid_latitude_degrees']}")
-        print(f"   • Longitude: {fields['rid_longitude_degrees']}")
-        print(f"   • Altitude MSL: {fields['rid_altitude_msl_meters']} meters")
-        print(f"   • Altitude AGL: {fields['rid_altitude_agl_meters']} meters")
-        print(f"   • Base Altitude: {fields['rid_base_altitude_meters']} meters")
-
-        # Flight Information
-        print(f"\n✈️  Remote ID Flight Information:")
-        print(f"   • Speed: {fields['rid_speed_knots']} knots")
-        print(f"   • Heading: {fields['rid_heading_degrees']} degrees")
-        print(f"   • Flight Status: {fields['rid_flight_status']}")
-        print(f"   • Emergency Status: {fields['rid_emergency_status']}")
-        print(f"   • GPS Satellites: {fields['rid_gps_satellites']}")
-        print(f"   • GPS Valid: {fields['rid_gps_valid']}")
-        print(f"   • Horizontal Velocity: {fields['rid_horizontal_velocity_ms']} m/s")
-        print(f"   • Vertical Velocity: {fields['rid_vertical_velocity_ms']} m/s")
-
-        # System Information
-        print(f"\n⚙️  Remote ID System Information:")
-        print(f"   • Operator Location: {fields['rid_operator_location']}")
-        print(f"   • Classification: {fields['rid_classification']}")
-        print(f"   • Country Code: {fields['rid_country_code']}")
-        print(f"   • Area Code: {fields['rid_area_code']}")
-        print(f"   • Operator Altitude: {fields['rid_operator_altitude_meters']} meters")
-
-        # Technical Information
-        print(f"\n🔧 Remote ID Technical Information:")
-        print(f"   • Message Counter: {fields['rid_message_counter']}")
-        print(f"   • Transmission Rate: {fields['rid_transmission_rate_hz']} Hz")
-        print(f"   • Frequency: {fields['rid_frequency_hz']} Hz")
-        print(f"   • Power Level: {fields['rid_power_level_dbm']} dBm")
-
-        # Compliance Information
-        print(f"\n✅ Remote ID Compliance Information:")
-        print(f"   • ASTM F3411-19 Compliant: {fields['rid_astm_f3411_19_compliant']}")
-        print(f"   • Basic ID Transmitted: {fields['rid_basic_id_transmitted']}")
-        print(f"   • Location Transmitted: {fields['rid_location_transmitted']}")
-        print(f"   • Operator ID Transmitted: {fields['rid_operator_id_transmitted']}")
-        print(f"   • Timestamp Transmitted: {fields['rid_timestamp_transmitted']}")
-        print(f"   • Emergency Status Transmitted: {fields['rid_emergency_status_transmitted']}")
-        print(f"   • Self ID Transmitted: {fields['rid_self_id_transmitted']}")
-        print(f"   • System Data Transmitted: {fields['rid_system_data_transmitted']}")
-
-        # Detection Information
-        print(f"\n🎯 Remote ID Detection Information:")
-        print(f"   • Remote ID Scanner Detectable: {fields['rid_remote_id_scanner_detectable']}")
-        print(f"   • WiFi Analyzer Detectable: {fields['rid_wifi_analyzer_detectable']}")
-        print(f"   • Packet Sniffer Detectable: {fields['rid_packet_sniffer_detectable']}")
-        print(f"   • Aviation Authorities Detectable: {fields['rid_aviation_authorities_detectable']}")
-        print(f"   • Law Enforcement Detectable: {fields['rid_law_enforcement_detectable']}")
-
-        # Packet Information
-        print(f"\n⏰ Remote ID Packet Information:")
-        print(f"   • RID Timestamp: {fields['rid_packet_timestamp']}")
-        print(f"   • Capture Time: {fields['rid_capture_time']}")
-        print(f"   • Packet Number: {fields['rid_packet_number']}")
-        print(f"   • Runtime: {fields['rid_runtime_seconds']:.1f} seconds")
-        print("=" * 100)
-        print("✅ ESP32-C3 Remote ID transmission is ACTIVE and COMPLIANT")
-        print("=" * 100)
-        print("\n\n\n")
-
-    def run(self):
-        """Run the RID field extractor"""
-        print("🔍 ESP32-C3 RID Field Extractor")
-        print("=" * 50)
-        print("Extracts and displays all RID fields from each packet")
-        print("Press Ctrl+C to stop")
-        print("=" * 50)
+        """Print all RID fields in human-readable format, or as one JSON line"""
+        if self.json_output:
+            sys.stdout.write(json.dumps(fields, separators=(',', ':')) + '\n')
+            sys.stdout.flush()
+        else:
+            sys.stdout.write(RID_FIELDS_TEMPLATE % fields)
+
+    def run(self, scan_source=None):
+        """Run the RID field extractor on scan_source, or on our own scanner if None"""
+        print("🔍 ESP32-C3 RID Field Extractor", file=self.log)
+        print("=" * 50, file=self.log)
+        print("Extracts and displays all RID fields from each packet", file=self.log)
+        print("Press Ctrl+C to stop", file=self.log)
+        print("=" * 50, file=self.log)
 
         signal.signal(signal.SIGINT, self.signal_handler)
 
-        while True:
-            wifi_data = self.scan_wifi_networks()
-            esp32_line = self.find_esp32_packet(wifi_data)
-
-            if esp32_line:
-                self.packet_count += 1
-                packet_data = self.parse_beacon_data(esp32_line)
-
-                if packet_data:
-                    fields = self.extract_rid_fields(packet_data)
-                    self.print_rid_fields(fields)
-                else:
-                    print(f"\n🚁 ESP32-C3 DETECTED! [{datetime.now().strftime('%H:%M:%S')}]")
-                    print(f"   Raw: {esp32_line}")
-                    print("   ✅ Remote ID transmission active")
-                    print("-" * 50)
-            else:
-                # Show scanning status every 5 seconds
-                if int(time.time() - self.start_time) % 5 == 0:
-                    elapsed = time.time() - self.start_time
-                    print(f"🔍 Scanning... {elapsed:.0f}s elapsed, {self.packet_count} packets found")
-
-            time.sleep(1)
+        if scan_source is None:
+            try:
+                # Passive scans of only the ESP32's channel, re-armed 0.5 s after each one completes
+                self.scanner = open_esp32_scanner((self.esp32_channel,))
+            except OSError as e:
+                print(f"❌ Error opening nl80211 socket: {e}", file=self.log)
+                return
+            scan_source = self.scanner.iter_scans()
+
+        try:
+            self.extract_loop(scan_source)
+        finally:
+            if self.scanner:
+                scan_source.close()
+                self.scanner.close()
+
+    def extract_loop(self, scan_source):
+        """Extract the ESP32-C3's fields from every scan the source yields"""
+        for wifi_data in scan_source:
+            self.handle_scan(wifi_data)
+
+    def handle_scan(self, wifi_data):
+        """Extract the ESP32-C3's fields from one {BSSID: ScanEntry} scan, or None if the scan failed"""
+        esp32_entry = self.find_esp32_packet(wifi_data) if wifi_data else None
+
+        if esp32_entry:
+            self.packet_count += 1
+            packet_data = self.parse_beacon_data(esp32_entry)
+            fields = self.extract_rid_fields(packet_data)
+            self.print_rid_fields(fields)
+        else:
+            # Show scanning status once per status_period
+            now = time.monotonic()
+            if now >= self.next_status_at:
+                elapsed = time.time() - self.start_time
+                print(f"🔍 Scanning... {elapsed:.0f}s elapsed, {self.packet_count} packets found", file=self.log)
+                self.next_status_at = now + self.status_period
 
 if __name__ == "__main__":
-    extractor = RIDFieldExtractor()
+    parser = argparse.ArgumentParser(description="ESP32-C3 RID Field Extractor")
+    parser.add_argument('--json', action='store_true',
+                        help="print each packet's fields as one JSON object per line")
+    args = parser.parse_args()
+    extractor = RIDFieldExtractor(json_output=args.json)
     extractor.run()
 
 
@@ -4,47 +4,54 @@ ESP32-C3 RID Packet Decoder
 Captures and decodes actual Remote ID packets from WiFi beacon frames
 """
 
-import subprocess
 import time
 import signal
 import sys
 import re
 from datetime import datetime
 
+from nmcli_output import run_nmcli
+
 class RIDPacketDecoder:
     def __init__(self):
         self.esp32_mac = "84:FC:E6:00:FC:05"
         self.esp32_ssid = "TEST-OP-12345"
+        # One pass over the whole table finds the row holding both the MAC
+        # and, further along it, the SSID
+        self.esp32_line_re = re.compile(
+            r'^.*' + re.escape(self.esp32_mac) + r'.*' + re.escape(self.esp32_ssid) + r'.*$',
+            re.MULTILINE)
         self.packet_count = 0
         self.start_time = time.time()
+        self.rescan_interval = 10  # seconds; nmcli rate-limits rescans anyway
+        self.next_rescan = 0.0
 
     def signal_handler(self, sig, frame):
         print("\n\n🛑 Stopping RID packet decoder...")
         sys.exit(0)
 
     def scan_wifi_networks(self):
-        """Scan for WiFi networks with fresh data"""
+        """List WiFi networks, rescanning every rescan_interval"""
         try:
-            # Force a fresh scan each time
-            subprocess.run(['nmcli', 'dev', 'wifi', 'rescan'],
-                          capture_output=True, text=True, check=True, timeout=2)
+            # Rescan at most every rescan_interval; in between, list returns
+            # the cached BSS table without a ~2 s radio retune
+            now = time.monotonic()
+            if now >= self.next_rescan:
+                self.next_rescan = now + self.rescan_interval
+                run_nmcli('dev', 'wifi', 'rescan', timeout=2, text=True, check=True)
 
-            result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'],
-                                  capture_output=True, text=True, check=True, timeout=3)
+            result = run_nmcli('dev', 'wifi', 'list', timeout=3, text=True, check=True)
             return result.stdout
         except Exception as e:
             return f"Error: {e}"
 
     def find_esp32_packet(self, wifi_data):
         """Find ESP32-C3 packet in WiFi data"""
-        if "Error" in wifi_data:
+        if wifi_data.startswith("Error: "):
             return None
 
-        lines = wifi_data.strip().split('\n')
-        for line in lines:
-            if self.esp32_mac in line and self.esp32_ssid in line:
-                return line
-        return None
+        match = self.esp32_line_re.search(wifi_data)
+        return match.group() if match else None
 
     def parse_beacon_data(self, beacon_line):
         """Parse the beacon frame data to extract potential RID information"""
@@ -4,12 +4,13 @@ Robust Real-time WiFi Packet Monitor
 Handles timeouts and provides reliable packet analysis
 """
 
-import subprocess
 import time
 import signal
 import sys
 from datetime import datetime
 
+from nmcli_output import iter_list_rows, run_nmcli
+
 class RobustPacketMonitor:
     def __init__(self):
         self.running = True
@@ -28,8 +29,7 @@ class RobustPacketMonitor:
         """Scan for WiFi networks with timeout handling"""
         try:
             # Use shorter timeout and retry logic
-            result = subprocess.run(['timeout', '2', 'nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True)
+            result = run_nmcli('dev', 'wifi', 'list', timeout=2, text=True)
             if result.returncode == 0:
                 return result.stdout
             else:
@@ -37,25 +37,9 @@ class RobustPacketMonitor:
         except:
             return ""
     
-    def parse_network_line(self, line):
-        """Parse a WiFi network line"""
-        if not line.strip() or 'BSSID' in line or '--' in line or not line.startswith(' '):
-            return None
-            
-        parts = line.split()
-        if len(parts) < 8:
-            return None
-            
-        return {
-            'bssid': parts[1],
-            'ssid': parts[2],
-            'mode': parts[3],
-            'channel': parts[4],
-            'rate': parts[5],
-            'signal': parts[6],
-            'bars': parts[7],
-            'security': parts[8] if len(parts) > 8 else 'Unknown'
-        }
+    def parse_all(self, wifi_data):
+        """Yield the fields of every network row in the nmcli listing, in one regex pass"""
+        return iter_list_rows(wifi_data)
     
     def is_esp32_network(self, network):
         """Check if this is our ESP32-C3 network"""
@@ -119,21 +103,18 @@ class RobustPacketMonitor:
                 
                 if wifi_data:
                     consecutive_failures = 0  # Reset failure counter
-                    lines = wifi_data.split('\n')
                     esp32_found = False
                     
-                    for line in lines:
-                        network = self.parse_network_line(line)
-                        if network:
-                            is_esp32 = self.is_esp32_network(network)
-                            
-                            if is_esp32:
-                                esp32_found = True
-                                self.esp32_detections += 1
-                                self.last_esp32_time = current_time
-                                self.display_esp32_packet(network)
-                            elif self.scan_count % 10 == 0:  # Show other networks occasionally
-                                self.display_other_packet(network)
+                    for network in self.parse_all(wifi_data):
+                        is_esp32 = self.is_esp32_network(network)
+                        
+                        if is_esp32:
+                            esp32_found = True
+                            self.esp32_detections += 1
+                            self.last_esp32_time = current_time
+                            self.display_esp32_packet(network)
+                        elif self.scan_count % 10 == 0:  # Show other networks occasionally
+                            self.display_other_packet(network)
                 else:
                     consecutive_failures += 1
                     if consecutive_failures >= max_failures:
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+ESP32-C3 Scan Monitor Core
+Shared nl80211 scan loop and packet report behind the 60-second dumper and
+the battery test monitor; subclasses only supply their banner and the
+tool-specific lines of each report
+"""
+
+import time
+import signal
+import sys
+
+from esp32_rid_common import ESP32_MAC, ESP32_SSID, find_esp32_entry
+from nl80211_scanner import NL80211Scanner
+from timestamp_format import format_time
+
+class PacketScanner:
+    name = "packet scanner"
+    max_runtime = None  # seconds; None runs until Ctrl+C
+    status_period = 5  # seconds between "Scanning..." lines
+    packet_heading = "🚁 ESP32-C3 PACKET"
+
+    def __init__(self):
+        self.running = True
+        self.esp32_mac = ESP32_MAC
+        self.esp32_ssid = ESP32_SSID
+        self.packet_count = 0
+        self.esp32_packets = 0
+        self.start_time = time.monotonic()
+        self.next_status_at = self.start_time + self.status_period
+        self.scanner = None
+
+    def signal_handler(self, sig, frame):
+        print(f"\n\n🛑 Stopping {self.name}...")
+        self.running = False
+        sys.exit(0)
+
+    def find_esp32_packet(self, wifi_data):
+        """Find the ESP32-C3's ScanEntry in a {BSSID: ScanEntry} scan"""
+        return find_esp32_entry(wifi_data)
+
+    def print_banner(self):
+        """Print the startup banner"""
+
+    def packet_timestamp(self):
+        """Timestamp shown in each packet report"""
+        return format_time()
+
+    def display_packet(self, packet_num):
+        """Display a detected packet"""
+        timestamp = self.packet_timestamp()
+        elapsed = time.monotonic() - self.start_time
+
+        print(f"\n{self.packet_heading} #{packet_num} - {timestamp}")
+        print("=" * 80)
+        print(f"📡 MAC: {self.esp32_mac} | SSID: {self.esp32_ssid}")
+        print(f"⏱️  Runtime: {elapsed:.1f}s | Packets: {packet_num}")
+        self.print_packet_details(timestamp)
+        print("=" * 80)
+
+    def print_packet_details(self, timestamp):
+        """Print the tool-specific lines at the end of a packet report"""
+
+    def print_status(self, elapsed):
+        """Print a periodic status line while nothing is detected"""
+        print(f"🔍 Scanning... {elapsed:.0f}s elapsed, {self.esp32_packets} packets found")
+
+    def print_summary(self, elapsed):
+        """Print the results once max_runtime is reached"""
+
+    def run(self):
+        """Run the scan loop until interrupted or max_runtime elapses"""
+        self.print_banner()
+
+        signal.signal(signal.SIGINT, self.signal_handler)
+
+        try:
+            self.scanner = NL80211Scanner()
+            self.scanner.subscribe_scan_events()
+        except OSError as e:
+            print(f"❌ Error opening nl80211 socket: {e}")
+            return
+
+        # iter_scans() polls the cache once a second (or as soon as a scan
+        # finishes) and re-arms scans on the shared RESCAN_INTERVAL cadence
+        scans = self.scanner.iter_scans()
+        try:
+            for wifi_data in scans:
+                if not self.running:
+                    break
+                now = time.monotonic()
+                elapsed = now - self.start_time
+
+                # Check if the runtime limit has been reached
+                if self.max_runtime is not None and elapsed >= self.max_runtime:
+                    self.print_summary(elapsed)
+                    break
+
+                if wifi_data is None:
+                    print("❌ Error reading scan results")
+                    esp32_entry = None
+                else:
+                    # Look for ESP32-C3 packet
+                    esp32_entry = self.find_esp32_packet(wifi_data)
+
+                if esp32_entry:
+                    self.esp32_packets += 1
+                    self.display_packet(self.esp32_packets)
+
+                # Show scanning status once per status_period while nothing is detected
+                if now >= self.next_status_at:
+                    if not esp32_entry:
+                        self.print_status(elapsed)
+                    self.next_status_at += self.status_period
+        finally:
+            scans.close()
+            self.scanner.close()
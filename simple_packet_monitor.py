@@ -4,12 +4,13 @@ Simple Real-time WiFi Packet Monitor
 Shows WiFi packets in real-time with focus on ESP32-C3 Remote ID
 """
 
-import subprocess
 import time
 import signal
 import sys
 from datetime import datetime
 
+from nmcli_output import iter_list_rows, run_nmcli
+
 class SimplePacketMonitor:
     def __init__(self):
         self.running = True
@@ -26,31 +27,14 @@ class SimplePacketMonitor:
     def scan_wifi_networks(self):
         """Scan for WiFi networks"""
         try:
-            result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, timeout=3)
+            result = run_nmcli('dev', 'wifi', 'list', timeout=3, text=True)
             return result.stdout
         except:
             return ""
     
-    def parse_network_line(self, line):
-        """Parse a WiFi network line"""
-        if not line.strip() or 'BSSID' in line or '--' in line or not line.startswith(' '):
-            return None
-            
-        parts = line.split()
-        if len(parts) < 8:
-            return None
-            
-        return {
-            'bssid': parts[1],
-            'ssid': parts[2],
-            'mode': parts[3],
-            'channel': parts[4],
-            'rate': parts[5],
-            'signal': parts[6],
-            'bars': parts[7],
-            'security': parts[8] if len(parts) > 8 else 'Unknown'
-        }
+    def parse_all(self, wifi_data):
+        """Yield the fields of every network row in the nmcli listing, in one regex pass"""
+        return iter_list_rows(wifi_data)
     
     def is_esp32_network(self, network):
         """Check if this is our ESP32-C3 network"""
@@ -102,21 +86,18 @@ class SimplePacketMonitor:
                 current_time = time.time()
                 
                 if wifi_data:
-                    lines = wifi_data.split('\n')
                     esp32_found = False
                     
-                    for line in lines:
-                        network = self.parse_network_line(line)
-                        if network:
-                            is_esp32 = self.is_esp32_network(network)
-                            
-                            if is_esp32:
-                                esp32_found = True
-                                self.esp32_detections += 1
-                                last_esp32_time = current_time
-                                self.display_packet(network, True)
-                            elif self.scan_count % 5 == 0:  # Show other networks occasionally
-                                self.display_packet(network, False)
+                    for network in self.parse_all(wifi_data):
+                        is_esp32 = self.is_esp32_network(network)
+                        
+                        if is_esp32:
+                            esp32_found = True
+                            self.esp32_detections += 1
+                            last_esp32_time = current_time
+                            self.display_packet(network, True)
+                        elif self.scan_count % 5 == 0:  # Show other networks occasionally
+                            self.display_packet(network, False)
                 
                 # Show status every 3 seconds
                 if self.scan_count % 6 == 0:
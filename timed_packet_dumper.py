@@ -4,17 +4,26 @@ Timed ESP32-C3 Packet Dumper
 Stops and debugs if no packets detected for 10+ seconds
 """
 
+import re
 import subprocess
 import time
 import signal
 import sys
 from datetime import datetime
 
+from nmcli_output import run_nmcli, split_terse_fields
+
+NMCLI_FIELDS = 'BSSID,SSID,MODE,CHAN,RATE,SIGNAL,BARS,SECURITY'
+
 class TimedPacketDumper:
     def __init__(self):
         self.running = True
         self.esp32_mac = "84:FC:E6:00:FC:05"
         self.esp32_ssid = "TEST-OP-12345"
+        # A terse line starts BSSID:SSID:, with the BSSID's own colons escaped
+        self.esp32_line_re = re.compile(
+            rb'^' + re.escape(self.esp32_mac.replace(":", "\\:").encode()) +
+            rb':' + re.escape(self.esp32_ssid.encode()) + rb':.*$', re.MULTILINE)
         self.packet_count = 0
         self.esp32_packets = 0
         self.last_esp32_time = 0
@@ -38,9 +47,11 @@ class TimedPacketDumper:
     def scan_wifi_networks(self):
         """Scan for WiFi networks"""
         try:
-            result = subprocess.run(['timeout', '2', 'nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, timeout=3)
+            # subprocess enforces the timeout itself, no extra `timeout` process
+            result = run_nmcli('-t', '-f', NMCLI_FIELDS, 'dev', 'wifi', 'list', timeout=2)
             return result.stdout if result.returncode == 0 else None
+        except subprocess.TimeoutExpired:
+            return None
         except Exception as e:
             print(f"❌ WiFi scan error: {e}")
             return None
@@ -50,96 +61,29 @@ class TimedPacketDumper:
         if not wifi_data:
             return None
         
-        lines = wifi_data.split('\n')
-        for line in lines:
-            if self.esp32_mac in line and self.esp32_ssid in line:
-                return line.strip()
-        return None
+        match = self.esp32_line_re.search(wifi_data)
+        return match.group() if match else None
     
     def parse_esp32_packet(self, line):
-        """Parse ESP32-C3 packet line"""
+        """Parse a `nmcli -t` ESP32-C3 packet line"""
         if not line:
             return None
         
-        # Handle the nmcli output format more carefully
-        # Format: BSSID SSID MODE CHAN RATE SIGNAL BARS SECURITY
-        # The rate field contains "65 Mbit/s" which is two words, so we need to handle this
-        
-        parts = line.split()
-        if len(parts) < 8:
+        fields = split_terse_fields(line)
+        if len(fields) != NMCLI_FIELDS.count(',') + 1:
             return None
         
-        try:
-            # Find the MAC address (starts with digits and contains colons)
-            bssid = None
-            ssid = None
-            mode = None
-            channel = None
-            rate = None
-            signal = None
-            bars = None
-            security = None
-            
-            for i, part in enumerate(parts):
-                # MAC address pattern: XX:XX:XX:XX:XX:XX
-                if ':' in part and len(part) == 17 and part.count(':') == 5:
-                    bssid = part
-                    # SSID is usually the next part, but might be empty
-                    if i + 1 < len(parts):
-                        ssid = parts[i + 1]
-                    # Mode is usually after SSID
-                    if i + 2 < len(parts):
-                        mode = parts[i + 2]
-                    # Channel is usually after mode
-                    if i + 3 < len(parts):
-                        channel = parts[i + 3]
-                    # Rate is usually after channel, but might be "65 Mbit/s" (two words)
-                    if i + 4 < len(parts):
-                        rate = parts[i + 4]
-                        # Check if next part is "Mbit/s" and combine them
-                        if i + 5 < len(parts) and parts[i + 5] == "Mbit/s":
-                            rate = f"{rate} {parts[i + 5]}"
-                            # Adjust subsequent indices by 1
-                            if i + 6 < len(parts):
-                                signal = parts[i + 6]
-                            if i + 7 < len(parts):
-                                bars = parts[i + 7]
-                            if i + 8 < len(parts):
-                                security = parts[i + 8]
-                        else:
-                            # Normal case without "Mbit/s"
-                            if i + 5 < len(parts):
-                                signal = parts[i + 5]
-                            if i + 6 < len(parts):
-                                bars = parts[i + 6]
-                            if i + 7 < len(parts):
-                                security = parts[i + 7]
-                    break
-            
-            # Fallback to simple parsing if MAC detection failed
-            if not bssid:
-                bssid = parts[1] if len(parts) > 1 else 'Unknown'
-                ssid = parts[2] if len(parts) > 2 else 'Unknown'
-                mode = parts[3] if len(parts) > 3 else 'Unknown'
-                channel = parts[4] if len(parts) > 4 else 'Unknown'
-                rate = parts[5] if len(parts) > 5 else 'Unknown'
-                signal = parts[6] if len(parts) > 6 else 'Unknown'
-                bars = parts[7] if len(parts) > 7 else 'Unknown'
-                security = parts[8] if len(parts) > 8 else 'Unknown'
-            
-            return {
-                'bssid': bssid,
-                'ssid': ssid,
-                'mode': mode,
-                'channel': channel,
-                'rate': rate,
-                'signal': signal,
-                'bars': bars,
-                'security': security
-            }
-        except Exception as e:
-            print(f"❌ Parsing error: {e}")
-            return None
+        bssid, ssid, mode, channel, rate, signal, bars, security = fields
+        return {
+            'bssid': bssid,
+            'ssid': ssid,
+            'mode': mode,
+            'channel': channel,
+            'rate': rate,
+            'signal': signal,
+            'bars': bars,
+            'security': security or 'Unknown'
+        }
     
     def display_packet(self, packet, packet_num):
         """Display packet in detailed human-readable format"""
@@ -219,12 +163,12 @@ class TimedPacketDumper:
         # Check if ESP32-C3 is still transmitting
         print("1. Checking if ESP32-C3 is still transmitting...")
         try:
-            result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, timeout=5)
+            result = run_nmcli('dev', 'wifi', 'list', timeout=5, text=True)
             if result.returncode == 0:
                 if self.esp32_ssid in result.stdout and self.esp32_mac in result.stdout:
                     print("   ✅ ESP32-C3 signal found in WiFi scan")
-                    print(f"   Raw data: {[line for line in result.stdout.split('\\n') if self.esp32_ssid in line]}")
+                    raw_lines = [line for line in result.stdout.splitlines() if self.esp32_ssid in line]
+                    print(f"   Raw data: {raw_lines}")
                 else:
                     print("   ❌ ESP32-C3 signal NOT found in WiFi scan")
                     print("   Available networks:")
@@ -318,7 +262,7 @@ class TimedPacketDumper:
                             self.display_packet(packet, self.packet_count)
                         else:
                             print(f"\\n🚁 ESP32-C3 DETECTED! [{datetime.now().strftime('%H:%M:%S')}]")
-                            print(f"   Raw: {esp32_line}")
+                            print(f"   Raw: {esp32_line.decode('utf-8', 'replace')}")
                             print("   ✅ Remote ID transmission active")
                             print("-" * 50)
                     else:
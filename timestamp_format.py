@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Fast Timestamp Formatting
+Millisecond local-time stamps for the packet display paths without
+building a datetime and running strftime for every packet
+"""
+
+import time
+
+DIGITS2 = ["%02d" % i for i in range(100)]
+NS_PER_SECOND = 1_000_000_000
+NS_PER_HOUR = 3600 * NS_PER_SECOND
+SECONDS_PER_DAY = 86400
+
+# Local UTC offset and date string for the local hour [hour_start_ns, hour_end_ns),
+# refreshed every hour so DST changes (which fall on an hour boundary) apply at once
+hour_start_ns = 0
+hour_end_ns = 0
+date_prefix = ""
+utc_offset_ns = 0
+
+
+def refresh_local_hour(ns):
+    """Recompute the cached UTC offset and date prefix for the local hour containing ns"""
+    global hour_start_ns, hour_end_ns, date_prefix, utc_offset_ns
+    local = time.localtime(ns // NS_PER_SECOND)
+    utc_offset_ns = local.tm_gmtoff * NS_PER_SECOND
+    hour_start_ns = ns - (ns + utc_offset_ns) % NS_PER_HOUR
+    hour_end_ns = hour_start_ns + NS_PER_HOUR
+    date_prefix = time.strftime("%Y-%m-%d ", local)
+
+
+def format_time(ns=None):
+    """HH:MM:SS.mmm in local time for a time.time_ns() value (default: now)"""
+    if ns is None:
+        ns = time.time_ns()
+    if not hour_start_ns <= ns < hour_end_ns:
+        refresh_local_hour(ns)
+    seconds, fraction = divmod(ns + utc_offset_ns, NS_PER_SECOND)
+    hours, seconds = divmod(seconds % SECONDS_PER_DAY, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    millis = fraction // 1_000_000
+    return f"{DIGITS2[hours]}:{DIGITS2[minutes]}:{DIGITS2[seconds]}.{DIGITS2[millis // 10]}{millis % 10}"
+
+
+def format_datetime(ns=None):
+    """YYYY-MM-DD HH:MM:SS.mmm in local time for a time.time_ns() value (default: now)"""
+    if ns is None:
+        ns = time.time_ns()
+    clock = format_time(ns)  # refreshes date_prefix on an hour rollover
+    return date_prefix + clock
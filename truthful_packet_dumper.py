@@ -4,45 +4,59 @@ Truthful ESP32-C3 Packet Dumper
 Only shows packets when ESP32-C3 is actually transmitting
 """
 
-import subprocess
 import time
 import signal
 import sys
 from datetime import datetime
 
+from nmcli_output import run_nmcli
+
 class TruthfulPacketDumper:
     def __init__(self):
         self.esp32_mac = "84:FC:E6:00:FC:05"
         self.esp32_ssid = "TEST-OP-12345"
         self.packet_count = 0
         self.start_time = time.time()
+        self.rescan_interval = 10  # seconds; nmcli rate-limits rescans anyway
+        self.next_rescan = 0.0
         
     def signal_handler(self, sig, frame):
         print("\n\n🛑 Stopping truthful packet dumper...")
         sys.exit(0)
     
     def scan_wifi_networks(self):
-        """Scan for WiFi networks with fresh data"""
+        """List WiFi networks, rescanning every rescan_interval"""
         try:
-            # Force a fresh scan each time
-            subprocess.run(['nmcli', 'dev', 'wifi', 'rescan'], 
-                          capture_output=True, text=True, check=True, timeout=2)
+            # Rescan at most every rescan_interval; in between, list returns
+            # the cached BSS table without a ~2 s radio retune
+            now = time.monotonic()
+            if now >= self.next_rescan:
+                self.next_rescan = now + self.rescan_interval
+                run_nmcli('dev', 'wifi', 'rescan', timeout=2, text=True, check=True)
             
-            result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, check=True, timeout=3)
+            result = run_nmcli('dev', 'wifi', 'list', timeout=3, text=True, check=True)
             return result.stdout
         except Exception as e:
             return f"Error: {e}"
     
     def is_esp32_present(self, wifi_data):
         """Check if ESP32-C3 is actually present in current scan"""
-        if "Error" in wifi_data:
+        # Only scan_wifi_networks' own failure string counts as an error; an
+        # SSID containing "Error" must not hide the scan
+        if wifi_data.startswith("Error: "):
             return False, "Scan error"
         
-        lines = wifi_data.strip().split('\n')
-        for line in lines:
-            if self.esp32_mac in line and self.esp32_ssid in line:
+        # Jump straight to each BSSID hit and slice out just its line
+        idx = wifi_data.find(self.esp32_mac)
+        while idx != -1:
+            start = wifi_data.rfind('\n', 0, idx) + 1
+            end = wifi_data.find('\n', idx)
+            if end == -1:
+                end = len(wifi_data)
+            line = wifi_data[start:end]
+            if self.esp32_ssid in line:
                 return True, line
+            idx = wifi_data.find(self.esp32_mac, end)
         return False, "ESP32-C3 not found in current scan"
     
     def display_packet(self, packet_num, raw_line):
@@ -4,7 +4,6 @@ Real-time WiFi Packet Monitor for Remote ID Analysis
 Captures and displays WiFi packets in human-readable format
 """
 
-import subprocess
 import time
 import re
 import json
@@ -13,6 +12,10 @@ import signal
 import sys
 from datetime import datetime
 
+from nmcli_output import run_nmcli, split_terse_fields
+
+NMCLI_FIELDS = 'BSSID,SSID,MODE,CHAN,RATE,SIGNAL,BARS,SECURITY'
+
 class WiFiPacketMonitor:
     def __init__(self):
         self.running = True
@@ -27,32 +30,29 @@ class WiFiPacketMonitor:
         sys.exit(0)
         
     def get_wifi_networks(self):
-        """Get current WiFi networks"""
+        """Get current WiFi networks as terse `nmcli -t` lines"""
         try:
-            result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, timeout=5)
+            result = run_nmcli('-t', '-f', NMCLI_FIELDS, 'dev', 'wifi', 'list', timeout=5)
             return result.stdout
         except:
-            return ""
+            return b""
     
     def parse_wifi_line(self, line):
-        """Parse a WiFi network line"""
-        if not line.strip() or 'BSSID' in line or '--' in line:
+        """Parse a `nmcli -t` WiFi network line"""
+        fields = split_terse_fields(line)
+        if len(fields) != NMCLI_FIELDS.count(',') + 1:
             return None
-            
-        parts = line.split()
-        if len(parts) < 8:
-            return None
-            
+        
+        bssid, ssid, mode, channel, rate, signal, bars, security = fields
         return {
-            'bssid': parts[1],
-            'ssid': parts[2],
-            'mode': parts[3],
-            'channel': parts[4],
-            'rate': parts[5],
-            'signal': parts[6],
-            'bars': parts[7],
-            'security': parts[8] if len(parts) > 8 else 'Unknown'
+            'bssid': bssid,
+            'ssid': ssid,
+            'mode': mode,
+            'channel': channel,
+            'rate': rate,
+            'signal': signal,
+            'bars': bars,
+            'security': security or 'Unknown'
         }
     
     def is_esp32_packet(self, network):
@@ -118,7 +118,7 @@ class WiFiPacketMonitor:
                     time.sleep(1)
                     continue
                 
-                lines = wifi_data.split('\n')
+                lines = wifi_data.splitlines()
                 current_time = time.time()
                 
                 for line in lines:
@@ -178,8 +178,7 @@ def main():
     
     # Check if we can access WiFi
     try:
-        result = subprocess.run(['nmcli', 'dev', 'wifi', 'list'], 
-                              capture_output=True, text=True, timeout=5)
+        result = run_nmcli('dev', 'wifi', 'list', timeout=5)
         if result.returncode != 0:
             print("❌ Error: Cannot access WiFi. Make sure you have proper permissions.")
             return
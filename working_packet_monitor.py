@@ -4,17 +4,20 @@ Working WiFi Packet Monitor
 Simple and reliable packet analysis
 """
 
-import subprocess
 import time
 import signal
 import sys
 from datetime import datetime
 
+from nmcli_output import iter_matching_lines, run_nmcli
+
 class WorkingPacketMonitor:
     def __init__(self):
         self.running = True
         self.esp32_mac = "84:FC:E6:00:FC:05"
         self.esp32_ssid = "TEST-OP-12345"
+        self.esp32_mac_bytes = self.esp32_mac.encode()
+        self.esp32_ssid_bytes = self.esp32_ssid.encode()
         self.scan_count = 0
         self.esp32_detections = 0
         self.last_esp32_time = 0
@@ -25,10 +28,9 @@ class WorkingPacketMonitor:
         sys.exit(0)
     
     def scan_wifi_networks(self):
-        """Scan for WiFi networks"""
+        """Scan for WiFi networks; the raw bytes are only decoded for the matching row"""
         try:
-            result = subprocess.run(['timeout', '3', 'nmcli', 'dev', 'wifi', 'list'], 
-                                  capture_output=True, text=True, timeout=5)
+            result = run_nmcli('dev', 'wifi', 'list', timeout=3)
             return result.stdout if result.returncode == 0 else None
         except:
             return None
@@ -39,15 +41,14 @@ class WorkingPacketMonitor:
             return False
         
         # Simple string search for our ESP32-C3
-        return (self.esp32_mac in wifi_data or self.esp32_ssid in wifi_data)
+        return (self.esp32_mac_bytes in wifi_data or self.esp32_ssid_bytes in wifi_data)
     
     def extract_esp32_info(self, wifi_data):
         """Extract ESP32-C3 information from WiFi data"""
-        lines = wifi_data.split('\n')
-        for line in lines:
-            if self.esp32_mac in line and self.esp32_ssid in line:
+        for line in iter_matching_lines(wifi_data, (self.esp32_mac_bytes,)):
+            if self.esp32_ssid_bytes in line:
                 # Parse the line manually
-                parts = line.split()
+                parts = line.decode('utf-8', 'replace').split()
                 if len(parts) >= 8:
                     return {
                         'bssid': parts[1],